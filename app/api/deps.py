@@ -1,11 +1,178 @@
 #Dependencias (get_current_user, get_db, etc)
-from fastapi import Depends, HTTPException, status
+import asyncio
+import functools
+import hashlib
+import secrets
+import time
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.core.database import get_db
+from app.core.database import get_db, LazyCursor
+from app.core.cache import TTLCache, CacheRespostas
 
 security = HTTPBearer()
 
+# Cache de usuários autenticados, chave: (tipo, id)
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+def invalidar_principal(tipo_usuario: str, user_id: int, cursor=None):
+    """
+    Remove o usuário do cache de autenticação
+    Chamar sempre que `ativo`, `email_verificado` ou o perfil mudarem.
+    Se o cursor for informado, invalida de novo após o commit.
+    """
+    chave = (tipo_usuario, user_id)
+    principal_cache.delete(chave)
+    if cursor is not None:
+        cursor.apos_commit(lambda: principal_cache.delete(chave))
+
+# ==================== ROTA COM LIBERAÇÃO ANTECIPADA DA CONEXÃO ====================
+
+def _liberar_cursores(kwargs: dict, commit: bool):
+    for valor in kwargs.values():
+        if isinstance(valor, LazyCursor):
+            valor.release(commit=commit)
+
+def _liberar_conexao_ao_final(endpoint):
+    """
+    Envolve o endpoint para devolver a conexão ao pool assim que ele
+    retorna, antes da serialização da resposta
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                resultado = await endpoint(*args, **kwargs)
+            except BaseException:
+                await run_in_threadpool(_liberar_cursores, kwargs, False)
+                raise
+            await run_in_threadpool(_liberar_cursores, kwargs, True)
+            return resultado
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                resultado = endpoint(*args, **kwargs)
+            except BaseException:
+                _liberar_cursores(kwargs, False)
+                raise
+            _liberar_cursores(kwargs, True)
+            return resultado
+    return wrapper
+
+class DatabaseRoute(APIRoute):
+    """
+    Rota que devolve a conexão do `get_db` ao pool assim que o handler
+    termina (e não depois do envio da resposta) e informa, no header
+    `X-DB-Hold-Time`, quanto tempo a requisição ficou com a conexão.
+    Endpoints marcados com `resposta_em_cache` têm a resposta cacheada.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        self.cache_ttl = getattr(endpoint, "_cache_ttl", None) if settings.RESPONSE_CACHE_ENABLED else None
+        super().__init__(path, _liberar_conexao_ao_final(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            response = await handler(request)
+
+            # Cursor usado só por dependências (ex: get_current_user)
+            cursor = getattr(request.state, "db_cursor", None)
+            if cursor is not None:
+                if cursor.conectado:
+                    await run_in_threadpool(cursor.release)
+                response.headers["X-DB-Hold-Time"] = f"{cursor.hold_time * 1000:.2f}ms"
+
+            return response
+
+        if not self.cache_ttl:
+            return route_handler
+
+        ttl = self.cache_ttl
+        # Só os parâmetros declarados entram na chave: `?x=1` não pode
+        # furar o cache nem o single-flight
+        declarados = {
+            param.alias for param in get_flat_dependant(self.dependant).query_params
+        }
+
+        async def cached_route_handler(request: Request):
+            if request.method != "GET":
+                return await route_handler(request)
+
+            chave = (self.path, tuple(sorted(
+                (nome, valor) for nome, valor in request.query_params.multi_items()
+                if nome in declarados
+            )))
+            gerada = None
+
+            async def calcular():
+                nonlocal gerada
+                gerada = await route_handler(request)
+                if gerada.status_code != status.HTTP_200_OK or not hasattr(gerada, "body"):
+                    return None
+                return {
+                    "corpo": gerada.body,
+                    "status": gerada.status_code,
+                    "media_type": gerada.media_type,
+                    "etag": '"' + hashlib.sha1(gerada.body).hexdigest() + '"',
+                    "expira_em": time.time() + ttl
+                }
+
+            entrada, origem = await respostas_cache.obter(self.path, chave, ttl, calcular)
+            if entrada is None:
+                # Resposta não cacheável (erro, por exemplo): segue sem cache
+                return gerada if gerada is not None else await route_handler(request)
+            return _resposta_do_cache(request, self.path, entrada, origem)
+
+        return cached_route_handler
+
+# ==================== CACHE DE RESPOSTAS ====================
+
+respostas_cache = CacheRespostas(maxsize=settings.RESPONSE_CACHE_SIZE)
+
+def resposta_em_cache(ttl: float):
+    """
+    Marca um endpoint GET público para ter a resposta cacheada por `ttl`
+    segundos (a DatabaseRoute aplica o cache, com single-flight e ETag).
+    Só para respostas iguais para todos: a chave é a rota + os parâmetros
+    de query declarados no endpoint (os demais são ignorados).
+    Usage:
+        @router.get("/stats")
+        @resposta_em_cache(ttl=60)
+        def get_stats(cursor = Depends(get_db)): ...
+    """
+    def decorador(endpoint):
+        endpoint._cache_ttl = ttl
+        return endpoint
+    return decorador
+
+def _resposta_do_cache(request: Request, rota: str, entrada: dict, origem: str) -> Response:
+    restante = max(int(entrada["expira_em"] - time.time()), 0)
+    headers = {
+        "ETag": entrada["etag"],
+        "Cache-Control": f"public, max-age={restante}",
+        "X-Cache": origem.upper()
+    }
+    if request.headers.get("if-none-match") == entrada["etag"]:
+        respostas_cache.contar_304(rota)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=entrada["corpo"],
+        status_code=entrada["status"],
+        media_type=entrada["media_type"],
+        headers=headers
+    )
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     cursor = Depends(get_db)
@@ -54,19 +221,28 @@ def get_current_user(
             detail="Token inválido"
         )
     
-    # Buscar usuário no banco
-    if tipo_usuario == "user":
-        cursor.execute(
-            "SELECT id, nome_completo, email, email_verificado, ativo FROM users WHERE id = %s",
-            (user_id,)
-        )
-    else:  # empresa
-        cursor.execute(
-            "SELECT id, nome_empresa as nome_completo, email_corporativo as email, email_verificado, ativo FROM empresas WHERE id = %s",
-            (user_id,)
-        )
+    # Buscar usuário (cache em memória, senão banco)
+    chave = (tipo_usuario, user_id)
+    user = principal_cache.get(chave)
     
-    user = cursor.fetchone()
+    if user is None:
+        if tipo_usuario == "user":
+            cursor.execute(
+                "SELECT id, nome_completo, email, email_verificado, ativo FROM users WHERE id = %s",
+                (user_id,)
+            )
+        else:  # empresa
+            cursor.execute(
+                "SELECT id, nome_empresa as nome_completo, email_corporativo as email, email_verificado, ativo FROM empresas WHERE id = %s",
+                (user_id,)
+            )
+        
+        user = cursor.fetchone()
+        
+        if user and user['ativo']:
+            principal_cache.set(chave, dict(user))
+    else:
+        user = dict(user)
     
     # print(f"🔍 DEBUG - Usuário encontrado no banco: {user}")
     
@@ -111,4 +287,17 @@ def get_current_empresa(current_user: dict = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Acesso restrito a empresas"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def verificar_token_metricas(x_metrics_token: Optional[str] = Header(None)):
+    """
+    Dependency do /metrics (pools, caches, filas e workers internos)
+    Sem METRICS_TOKEN configurado o endpoint não existe (404)
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metrics_token or not secrets.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token de métricas inválido"
+        )
@@ -6,10 +6,11 @@ from app.schemas.auth import (
 )
 from app.core.database import get_db
 from app.core.security import hash_password, verify_password, create_access_token, create_verification_token
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, DatabaseRoute, invalidar_principal
+from app.services.ranking_service import leaderboard_global
 from mysql.connector import IntegrityError
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 security = HTTPBearer()
 
 # ==================== REGISTER USER ====================
@@ -44,6 +45,9 @@ def register_user(user_data: UserRegister, cursor = Depends(get_db)):
         ))
         
         user_id = cursor.lastrowid
+        cursor.apos_commit(lambda: leaderboard_global.atualizar(
+            user_id, 0, 'iniciante', user_data.area_interesse
+        ))
         
         # TODO: Enviar email de verificação aqui
         # send_verification_email(user_data.email, token_verificacao)
@@ -172,6 +176,7 @@ def verify_email(verification: EmailVerification, cursor = Depends(get_db)):
             "UPDATE users SET email_verificado = TRUE, token_verificacao = NULL WHERE id = %s",
             (user['id'],)
         )
+        invalidar_principal('user', user['id'], cursor)
         return EmailVerificationResponse(
             message="Email verificado com sucesso!",
             email_verificado=True
@@ -189,6 +194,7 @@ def verify_email(verification: EmailVerification, cursor = Depends(get_db)):
             "UPDATE empresas SET email_verificado = TRUE, token_verificacao = NULL WHERE id = %s",
             (empresa['id'],)
         )
+        invalidar_principal('empresa', empresa['id'], cursor)
         return EmailVerificationResponse(
             message="Email verificado com sucesso!",
             email_verificado=True
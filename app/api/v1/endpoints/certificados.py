@@ -4,9 +4,10 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from app.core.database import get_db
-from app.api.deps import get_current_user, get_current_empresa
+from app.api.deps import get_current_user, get_current_empresa, DatabaseRoute, resposta_em_cache
+from app.services.atividade_service import registro_atividades
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== SCHEMAS ====================
 
@@ -291,6 +292,7 @@ def certificados_emitidos(
 # ==================== ESTATÍSTICAS DE CERTIFICADOS ====================
 
 @router.get("/stats/geral", response_model=dict)
+@resposta_em_cache(ttl=300)
 def stats_certificados(cursor = Depends(get_db)):
     """Estatísticas gerais de certificados da plataforma"""
     
@@ -407,19 +409,17 @@ def revogar_certificado(
         f'Seu certificado "{certificado["titulo"]}" foi revogado. Motivo: {motivo}'
     ))
     
-    # Log da ação
-    import json
-    cursor.execute("""
-        INSERT INTO logs_atividade (
-            empresa_id, tipo_usuario, acao, detalhes
-        ) VALUES (%s, 'empresa', 'revogar_certificado', %s)
-    """, (
-        current_empresa['id'],
-        json.dumps({
-            "certificado_id": certificado_id,
-            "user_afetado": certificado['nome_completo'],
-            "motivo": motivo
-        })
+    # Log da ação (gravado em lote depois do commit)
+    detalhes = {
+        "certificado_id": certificado_id,
+        "user_afetado": certificado['nome_completo'],
+        "motivo": motivo
+    }
+    cursor.apos_commit(lambda: registro_atividades.registrar(
+        'revogar_certificado',
+        empresa_id=current_empresa['id'],
+        tipo_usuario='empresa',
+        detalhes=detalhes
     ))
     
     return {
@@ -1,13 +1,19 @@
+import asyncio
 from fastapi import APIRouter, Depends
 from typing import Dict, List
+from app.core.config import settings
+from app.core.cache import TTLCache
 from app.core.database import get_db
-from app.api.deps import get_current_user, get_current_empresa
+from app.core.async_database import AsyncDatabase
+from app.api.deps import get_current_user, get_current_empresa, DatabaseRoute, resposta_em_cache
+from app.services.ranking_service import posicoes_do_usuario_async
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== DASHBOARD GERAL DA PLATAFORMA ====================
 
 @router.get("/stats", response_model=Dict)
+@resposta_em_cache(ttl=60)
 def get_platform_stats(cursor = Depends(get_db)):
     """
     Estatísticas gerais da plataforma (público)
@@ -66,59 +72,71 @@ def get_platform_stats(cursor = Depends(get_db)):
 
 # ==================== DASHBOARD DO USUÁRIO ====================
 
+# Partes do dashboard que podem ficar alguns segundos desatualizadas, chave: (user_id, parte)
+dashboard_cache = TTLCache(
+    maxsize=settings.DASHBOARD_CACHE_SIZE,
+    ttl=settings.DASHBOARD_CACHE_TTL
+)
+
+async def _consultar(query: str, params: tuple, varias: bool = True):
+    """Executa uma consulta em uma conexão própria do pool assíncrono"""
+    async with AsyncDatabase.get_cursor() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchall() if varias else await cursor.fetchone()
+
+async def _consultar_em_cache(user_id: int, parte: str, query: str, params: tuple):
+    """Consulta uma parte cacheável do dashboard (lista de linhas)"""
+    chave = (user_id, parte)
+    linhas = dashboard_cache.get(chave)
+    if linhas is None:
+        linhas = await _consultar(query, params)
+        dashboard_cache.set(chave, linhas)
+    return linhas
+
 @router.get("/user/overview", response_model=Dict)
-def get_user_dashboard(
-    current_user = Depends(get_current_user),
-    cursor = Depends(get_db)
+async def get_user_dashboard(
+    current_user = Depends(get_current_user)
 ):
     """
     Dashboard completo do usuário logado
+
+    As consultas independentes rodam ao mesmo tempo, cada uma em uma conexão
+    do pool assíncrono; problemas recomendados e progresso semanal ficam
+    em cache por usuário (DASHBOARD_CACHE_TTL)
     """
+    user_id = current_user['id']
     
-    # Dados básicos do usuário
-    cursor.execute("""
-        SELECT 
-            pontos_totais,
-            nivel_atual,
-            patente,
-            created_at
-        FROM users
-        WHERE id = %s
-    """, (current_user['id'],))
-    user_data = cursor.fetchone()
-    
-    # Estatísticas de soluções
-    cursor.execute("""
+    # Dados do usuário, estatísticas de soluções e certificados (uma consulta)
+    resumo = _consultar("""
         SELECT 
-            COUNT(*) as total_solucoes,
-            SUM(CASE WHEN status = 'aprovada' THEN 1 ELSE 0 END) as aprovadas,
-            SUM(CASE WHEN status = 'em_analise' THEN 1 ELSE 0 END) as pendentes,
-            SUM(CASE WHEN status = 'reprovada' THEN 1 ELSE 0 END) as reprovadas,
-            AVG(pontuacao_final) as media_pontuacao,
-            SUM(pontos_ganhos) as total_pontos_ganhos
-        FROM solucoes
-        WHERE user_id = %s
-    """, (current_user['id'],))
-    stats_solucoes = cursor.fetchone()
-    
-    # Posição no ranking global
-    cursor.execute("""
-        SELECT COUNT(*) + 1 as posicao_global
-        FROM users
-        WHERE pontos_totais > %s AND ativo = TRUE
-    """, (user_data['pontos_totais'],))
-    ranking = cursor.fetchone()
-    
-    # Certificados obtidos
-    cursor.execute("""
-        SELECT COUNT(*) as total
-        FROM certificados
-        WHERE user_id = %s
-    """, (current_user['id'],))
-    certificados = cursor.fetchone()
+            u.pontos_totais,
+            u.nivel_atual,
+            u.patente,
+            u.created_at,
+            s.total_solucoes,
+            s.aprovadas,
+            s.pendentes,
+            s.reprovadas,
+            s.media_pontuacao,
+            s.total_pontos_ganhos,
+            (SELECT COUNT(*) FROM certificados c WHERE c.user_id = u.id) as total_certificados
+        FROM users u
+        CROSS JOIN (
+            SELECT 
+                COUNT(*) as total_solucoes,
+                SUM(CASE WHEN status = 'aprovada' THEN 1 ELSE 0 END) as aprovadas,
+                SUM(CASE WHEN status = 'em_analise' THEN 1 ELSE 0 END) as pendentes,
+                SUM(CASE WHEN status = 'reprovada' THEN 1 ELSE 0 END) as reprovadas,
+                AVG(pontuacao_final) as media_pontuacao,
+                SUM(pontos_ganhos) as total_pontos_ganhos
+            FROM solucoes
+            WHERE user_id = %s
+        ) s
+        WHERE u.id = %s
+    """, (user_id, user_id), varias=False)
     
     # Atividade recente (últimas 5 ações)
-    cursor.execute("""
+    atividades = _consultar("""
         SELECT 
             acao,
             detalhes,
@@ -127,11 +145,10 @@ def get_user_dashboard(
         WHERE user_id = %s AND tipo_usuario = 'user'
         ORDER BY created_at DESC
         LIMIT 5
-    """, (current_user['id'],))
-    atividades_recentes = cursor.fetchall()
+    """, (user_id,))
     
     # Próximos problemas recomendados (baseado em área de interesse)
-    cursor.execute("""
+    recomendados = _consultar_em_cache(user_id, "recomendados", """
         SELECT 
             p.id,
             p.titulo,
@@ -149,40 +166,43 @@ def get_user_dashboard(
             AND (p.area = %s OR %s IS NULL)
         ORDER BY p.created_at DESC
         LIMIT 5
-    """, (current_user['id'], current_user.get('area_interesse'), current_user.get('area_interesse')))
-    problemas_recomendados = cursor.fetchall()
+    """, (user_id, current_user.get('area_interesse'), current_user.get('area_interesse')))
     
-    # Progresso semanal (últimos 7 dias)
-    cursor.execute("""
+    # Progresso semanal (últimos 7 dias; rollup diário)
+    progresso = _consultar_em_cache(user_id, "progresso_semanal", """
         SELECT 
-            DATE(created_at) as data,
-            COUNT(*) as atividades
-        FROM logs_atividade
+            data,
+            atividades
+        FROM atividade_diaria
         WHERE user_id = %s 
-            AND tipo_usuario = 'user'
-            AND created_at >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-        GROUP BY DATE(created_at)
+            AND data >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
         ORDER BY data
-    """, (current_user['id'],))
-    progresso_semanal = cursor.fetchall()
+    """, (user_id,))
+    
+    # Posição no ranking (global, patente e área; em memória)
+    user_data, atividades_recentes, problemas_recomendados, progresso_semanal, posicoes = await asyncio.gather(
+        resumo, atividades, recomendados, progresso, posicoes_do_usuario_async(user_id)
+    )
     
     return {
         "usuario": {
             "pontos_totais": user_data['pontos_totais'],
             "nivel_atual": user_data['nivel_atual'],
             "patente": user_data['patente'],
-            "posicao_ranking": ranking['posicao_global'],
+            "posicao_ranking": posicoes['posicao_global'],
+            "posicao_ranking_patente": posicoes['posicao_patente'],
+            "posicao_ranking_area": posicoes['posicao_area'],
             "membro_desde": user_data['created_at']
         },
         "solucoes": {
-            "total": stats_solucoes['total_solucoes'] or 0,
-            "aprovadas": stats_solucoes['aprovadas'] or 0,
-            "pendentes": stats_solucoes['pendentes'] or 0,
-            "reprovadas": stats_solucoes['reprovadas'] or 0,
-            "media_pontuacao": float(stats_solucoes['media_pontuacao']) if stats_solucoes['media_pontuacao'] else 0,
-            "pontos_ganhos": stats_solucoes['total_pontos_ganhos'] or 0
+            "total": user_data['total_solucoes'] or 0,
+            "aprovadas": user_data['aprovadas'] or 0,
+            "pendentes": user_data['pendentes'] or 0,
+            "reprovadas": user_data['reprovadas'] or 0,
+            "media_pontuacao": float(user_data['media_pontuacao']) if user_data['media_pontuacao'] else 0,
+            "pontos_ganhos": user_data['total_pontos_ganhos'] or 0
         },
-        "certificados_obtidos": certificados['total'],
+        "certificados_obtidos": user_data['total_certificados'],
         "atividades_recentes": atividades_recentes,
         "problemas_recomendados": problemas_recomendados,
         "progresso_semanal": progresso_semanal
@@ -251,12 +271,10 @@ def get_empresa_dashboard(
             p.titulo,
             p.area,
             p.visualizacoes,
-            COUNT(DISTINCT s.id) as total_solucoes
+            p.total_solucoes
         FROM problemas p
-        LEFT JOIN solucoes s ON p.id = s.problema_id
         WHERE p.empresa_id = %s
-        GROUP BY p.id
-        ORDER BY p.visualizacoes DESC, total_solucoes DESC
+        ORDER BY p.visualizacoes DESC, p.total_solucoes DESC
         LIMIT 5
     """, (current_empresa['id'],))
     top_problemas = cursor.fetchall()
@@ -298,10 +316,9 @@ def get_empresa_dashboard(
     cursor.execute("""
         SELECT 
             p.area,
-            COUNT(DISTINCT p.id) as total_problemas,
-            COUNT(DISTINCT s.id) as total_solucoes
+            COUNT(*) as total_problemas,
+            SUM(p.total_solucoes) as total_solucoes
         FROM problemas p
-        LEFT JOIN solucoes s ON p.id = s.problema_id
         WHERE p.empresa_id = %s
         GROUP BY p.area
         ORDER BY total_problemas DESC
@@ -396,6 +413,7 @@ def get_stats_periodo(
 # ==================== ÁREAS MAIS POPULARES ====================
 
 @router.get("/stats/areas-populares", response_model=List[Dict])
+@resposta_em_cache(ttl=300)
 def get_areas_populares(cursor = Depends(get_db)):
     """
     Áreas mais populares da plataforma
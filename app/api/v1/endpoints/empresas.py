@@ -1,12 +1,13 @@
 #CRUD empresas 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from app.core.database import get_db
-from app.api.deps import get_current_empresa, get_current_user
+from app.api.deps import get_current_empresa, get_current_user, DatabaseRoute, invalidar_principal
 from app.core.security import hash_password, verify_password
+from app.utils.helpers import codificar_cursor, decodificar_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== SCHEMAS ====================
 
@@ -174,6 +175,7 @@ def update_my_profile(
     
     query = f"UPDATE empresas SET {', '.join(update_fields)} WHERE id = %s"
     cursor.execute(query, values)
+    invalidar_principal('empresa', current_empresa['id'], cursor)
     
     return {"message": "Perfil da empresa atualizado com sucesso!"}
 
@@ -236,20 +238,28 @@ def get_my_stats(
 
 @router.get("/", response_model=List[EmpresaPublic])
 def listar_empresas(
+    response: Response,
     setor: Optional[str] = None,
     provincia: Optional[str] = None,
     limit: int = Query(50, le=100),
     offset: int = 0,
+    pagina_cursor: Optional[str] = Query(None, alias="cursor"),
     cursor = Depends(get_db)
 ):
-    """Listar empresas ativas na plataforma"""
+    """
+    Listar empresas ativas na plataforma
+
+    Paginação por cursor: envie em `cursor` o valor do header
+    X-Next-Cursor da página anterior (o `offset` continua aceito)
+    """
     
+    # Contador mantido pelos triggers de `problemas` (migrations/007): a página
+    # é lida direto do índice (ativo, problemas_ativos DESC, id), sem GROUP BY
     query = """
     SELECT 
         e.*,
-        COUNT(DISTINCT p.id) as total_problemas_ativos
+        e.problemas_ativos as total_problemas_ativos
     FROM empresas e
-    LEFT JOIN problemas p ON e.id = p.empresa_id AND p.status = 'ativo'
     WHERE e.ativo = TRUE
     """
     params = []
@@ -262,11 +272,28 @@ def listar_empresas(
         query += " AND e.provincia = %s"
         params.append(provincia)
     
-    query += " GROUP BY e.id ORDER BY total_problemas_ativos DESC LIMIT %s OFFSET %s"
+    if pagina_cursor:
+        try:
+            ultimo = decodificar_cursor(pagina_cursor, {"total": int, "id": int})
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query += " AND (e.problemas_ativos < %s OR (e.problemas_ativos = %s AND e.id > %s))"
+        params.extend([ultimo["total"], ultimo["total"], ultimo["id"]])
+        offset = 0
+    
+    query += " ORDER BY e.problemas_ativos DESC, e.id ASC LIMIT %s OFFSET %s"
     params.extend([limit, offset])
     
     cursor.execute(query, params)
-    return cursor.fetchall()
+    empresas = cursor.fetchall()
+    
+    if len(empresas) == limit:
+        response.headers["X-Next-Cursor"] = codificar_cursor({
+            "total": empresas[-1]["total_problemas_ativos"],
+            "id": empresas[-1]["id"]
+        })
+    
+    return empresas
 
 # ==================== TOP EMPRESAS ====================
 
@@ -277,22 +304,31 @@ def get_top_empresas(
 ):
     """Top empresas mais ativas (mais problemas publicados)"""
     
+    # O top é escolhido só com os contadores de `problemas`;
+    # usuários distintos são contados apenas para as empresas do top
     query = """
     SELECT 
-        e.id,
-        e.nome_empresa,
-        e.logo_url,
-        e.setor_atuacao,
-        COUNT(DISTINCT p.id) as total_problemas,
-        COUNT(DISTINCT s.id) as total_solucoes,
-        COUNT(DISTINCT s.user_id) as usuarios_engajados
-    FROM empresas e
-    LEFT JOIN problemas p ON e.id = p.empresa_id
-    LEFT JOIN solucoes s ON p.id = s.problema_id
-    WHERE e.ativo = TRUE
-    GROUP BY e.id
-    ORDER BY total_problemas DESC, total_solucoes DESC
-    LIMIT %s
+        t.*,
+        (SELECT COUNT(DISTINCT s.user_id)
+         FROM solucoes s
+         INNER JOIN problemas p ON s.problema_id = p.id
+         WHERE p.empresa_id = t.id) as usuarios_engajados
+    FROM (
+        SELECT 
+            e.id,
+            e.nome_empresa,
+            e.logo_url,
+            e.setor_atuacao,
+            COUNT(p.id) as total_problemas,
+            COALESCE(SUM(p.total_solucoes), 0) as total_solucoes
+        FROM empresas e
+        LEFT JOIN problemas p ON e.id = p.empresa_id
+        WHERE e.ativo = TRUE
+        GROUP BY e.id
+        ORDER BY total_problemas DESC, total_solucoes DESC
+        LIMIT %s
+    ) t
+    ORDER BY t.total_problemas DESC, t.total_solucoes DESC
     """
     
     cursor.execute(query, (limit,))
@@ -347,6 +383,7 @@ def deactivate_account(
         "UPDATE empresas SET ativo = FALSE WHERE id = %s",
         (current_empresa['id'],)
     )
+    invalidar_principal('empresa', current_empresa['id'], cursor)
     
     return {"message": "Conta desativada. Entre em contato com o suporte para reativar."}
 
@@ -1,12 +1,18 @@
 #CRUD de problemas
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from datetime import date
+from datetime import date, datetime
 from app.core.database import get_db
-from app.api.deps import get_current_user, get_current_empresa
+from app.api.deps import get_current_user, get_current_empresa, DatabaseRoute
+from app.services.avaliacao_worker import avaliacao_worker
+from app.services.atividade_service import registro_atividades
+from app.services.visualizacoes_service import contador_visualizacoes
+from app.services.ranking_service import ranking_areas
+from app.services.busca_service import indice_problemas, tokenizar
+from app.utils.helpers import codificar_cursor, decodificar_cursor, destacar_trecho, expressao_fulltext, termos_busca
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== SCHEMAS ====================
 
@@ -100,6 +106,7 @@ def criar_problema(
     ))
     
     problema_id = cursor.lastrowid
+    cursor.apos_commit(lambda: indice_problemas.atualizar(problema_id))
     
     return {
         "message": "Problema criado com sucesso!",
@@ -110,26 +117,32 @@ def criar_problema(
 
 @router.get("/", response_model=List[dict])
 def listar_problemas(
+    response: Response,
     area: Optional[str] = None,
     nivel: Optional[str] = None,
     tipo: Optional[str] = None,
     status_problema: str = "ativo",
     limit: int = Query(50, le=100),
     offset: int = 0,
+    pagina_cursor: Optional[str] = Query(None, alias="cursor"),
     cursor = Depends(get_db)
 ):
-    """Listar problemas ativos com filtros"""
+    """
+    Listar problemas ativos com filtros
+
+    Paginação por cursor: envie em `cursor` o valor do header X-Next-Cursor
+    da página anterior (o `offset` continua aceito, mas fica lento em
+    páginas profundas)
+    """
     
     # Base query
     query = """
     SELECT 
         p.*,
         e.nome_empresa,
-        e.logo_url as empresa_logo,
-        COUNT(DISTINCT s.id) as total_solucoes
+        e.logo_url as empresa_logo
     FROM problemas p
     INNER JOIN empresas e ON p.empresa_id = e.id
-    LEFT JOIN solucoes s ON p.id = s.problema_id
     WHERE p.status = %s
     """
     params = [status_problema]
@@ -147,14 +160,187 @@ def listar_problemas(
         query += " AND p.tipo = %s"
         params.append(tipo)
     
-    query += " GROUP BY p.id ORDER BY p.created_at DESC LIMIT %s OFFSET %s"
+    if pagina_cursor:
+        try:
+            ultimo = decodificar_cursor(pagina_cursor, {"created_at": datetime, "id": int})
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query += " AND (p.created_at < %s OR (p.created_at = %s AND p.id < %s))"
+        params.extend([ultimo["created_at"], ultimo["created_at"], ultimo["id"]])
+        offset = 0
+    
+    query += " ORDER BY p.created_at DESC, p.id DESC LIMIT %s OFFSET %s"
     params.extend([limit, offset])
     
     cursor.execute(query, params)
     problemas = cursor.fetchall()
     
+    if len(problemas) == limit:
+        ultimo = problemas[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor({
+            "created_at": ultimo["created_at"],
+            "id": ultimo["id"]
+        })
+    
+    return problemas
+
+# ==================== BUSCAR PROBLEMAS ====================
+
+# Declarada antes de /{problema_id} para "search" não ser lido como ID
+@router.get("/search", response_model=List[dict])
+def buscar_problemas(
+    response: Response,
+    q: str = Query(..., min_length=3, max_length=200),
+    area: Optional[str] = None,
+    nivel: Optional[str] = None,
+    tipo: Optional[str] = None,
+    status_problema: str = "ativo",
+    limit: int = Query(20, le=100),
+    pagina_cursor: Optional[str] = Query(None, alias="cursor"),
+    cursor = Depends(get_db)
+):
+    """
+    Busca textual em título e descrição (índice FULLTEXT idx_fulltext_problemas)
+    Resultados por relevância, com os mesmos filtros da listagem
+
+    Cada termo também casa como prefixo ("anali" encontra "análise").
+    `titulo_destacado` e `trecho` trazem os termos entre <mark></mark>.
+    Paginação por cursor: envie em `cursor` o valor do header X-Next-Cursor.
+
+    Problemas ativos são buscados no índice em memória (BM25, sem acessar
+    o banco); o FULLTEXT do MySQL fica para outros status e para quando o
+    índice ainda não está pronto.
+    """
+    
+    termos = termos_busca(q)
+    if not termos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe ao menos uma palavra com 3 ou mais letras"
+        )
+    
+    ultimo = None
+    if pagina_cursor:
+        try:
+            ultimo = decodificar_cursor(pagina_cursor, {"relevancia": float, "id": int})
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if indice_problemas.pronto and status_problema == "ativo":
+        apos = (ultimo["relevancia"], ultimo["id"]) if ultimo else None
+        problemas = [
+            {**documento, "relevancia": relevancia}
+            for relevancia, documento in indice_problemas.buscar(q, limit, area, nivel, tipo, apos)
+        ]
+        termos = tokenizar(q)
+    else:
+        problemas = _buscar_problemas_sql(termos, area, nivel, tipo, status_problema, limit, ultimo, cursor)
+    
+    if len(problemas) == limit:
+        response.headers["X-Next-Cursor"] = codificar_cursor({
+            "relevancia": problemas[-1]["relevancia"],
+            "id": problemas[-1]["id"]
+        })
+    
+    for problema in problemas:
+        problema["titulo_destacado"] = destacar_trecho(problema["titulo"], termos, tamanho=255)
+        problema["trecho"] = destacar_trecho(problema.pop("descricao"), termos)
+    
     return problemas
 
+def _buscar_problemas_sql(termos, area, nivel, tipo, status_problema, limit, ultimo, cursor):
+    """Busca no índice FULLTEXT do MySQL"""
+    
+    expressao = expressao_fulltext(termos)
+    match = "MATCH(p.titulo, p.descricao) AGAINST (%s IN BOOLEAN MODE)"
+    
+    query = f"""
+    SELECT 
+        p.id,
+        p.empresa_id,
+        p.titulo,
+        p.descricao,
+        p.area,
+        p.nivel_dificuldade,
+        p.tipo,
+        p.pontos_recompensa,
+        p.oferece_certificado,
+        p.status,
+        p.data_inicio,
+        p.data_fim,
+        e.nome_empresa,
+        e.logo_url as empresa_logo,
+        {match} as relevancia
+    FROM problemas p
+    INNER JOIN empresas e ON p.empresa_id = e.id
+    WHERE p.status = %s AND {match}
+    """
+    params = [expressao, status_problema, expressao]
+    
+    # Adicionar filtros
+    if area:
+        query += " AND p.area = %s"
+        params.append(area)
+    
+    if nivel:
+        query += " AND p.nivel_dificuldade = %s"
+        params.append(nivel)
+    
+    if tipo:
+        query += " AND p.tipo = %s"
+        params.append(tipo)
+    
+    if ultimo:
+        query += f" AND ({match} < %s OR ({match} = %s AND p.id < %s))"
+        params.extend([expressao, ultimo["relevancia"], expressao, ultimo["relevancia"], ultimo["id"]])
+    
+    query += " ORDER BY relevancia DESC, p.id DESC LIMIT %s"
+    params.append(limit)
+    
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+# ==================== AUTOCOMPLETE ====================
+
+@router.get("/autocomplete", response_model=List[dict])
+def autocomplete_problemas(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(8, le=20),
+    cursor = Depends(get_db)
+):
+    """
+    Sugestões de problemas ativos enquanto o usuário digita
+    Servido pelo índice em memória (a última palavra casa como prefixo);
+    usa o FULLTEXT do MySQL só enquanto o índice não está pronto
+    """
+    
+    if indice_problemas.pronto:
+        resultados = [documento for _, documento in indice_problemas.buscar(q, limit)]
+        termos = tokenizar(q)
+    else:
+        termos = termos_busca(q)
+        if not termos:
+            return []
+        cursor.execute("""
+            SELECT p.id, p.titulo, p.area
+            FROM problemas p
+            WHERE p.status = 'ativo'
+                AND MATCH(p.titulo, p.descricao) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY MATCH(p.titulo, p.descricao) AGAINST (%s IN BOOLEAN MODE) DESC, p.id DESC
+            LIMIT %s
+        """, (expressao_fulltext(termos), expressao_fulltext(termos), limit))
+        resultados = cursor.fetchall()
+    
+    return [
+        {
+            "id": problema["id"],
+            "titulo": problema["titulo"],
+            "titulo_destacado": destacar_trecho(problema["titulo"], termos, tamanho=255),
+            "area": problema["area"]
+        }
+        for problema in resultados
+    ]
+
 # ==================== DETALHES DO PROBLEMA ====================
 
 @router.get("/{problema_id}", response_model=dict)
@@ -170,14 +356,10 @@ def get_problema(
         p.*,
         e.nome_empresa,
         e.logo_url as empresa_logo,
-        e.descricao as empresa_descricao,
-        COUNT(DISTINCT s.id) as total_solucoes,
-        AVG(s.pontuacao_final) as media_pontuacao
+        e.descricao as empresa_descricao
     FROM problemas p
     INNER JOIN empresas e ON p.empresa_id = e.id
-    LEFT JOIN solucoes s ON p.id = s.problema_id
     WHERE p.id = %s
-    GROUP BY p.id
     """
     
     cursor.execute(query, (problema_id,))
@@ -189,17 +371,19 @@ def get_problema(
             detail="Problema não encontrado"
         )
     
-    # Registrar visualização
-    log_query = """
-    INSERT INTO logs_atividade (user_id, tipo_usuario, acao, detalhes)
-    VALUES (%s, %s, 'visualizar_problema', %s)
-    """
-    import json
-    cursor.execute(log_query, (
-        current_user['id'],
-        current_user['tipo_usuario'],
-        json.dumps({"problema_id": problema_id})
-    ))
+    # Contar visualização (gravada em lote pelo contador em memória)
+    contador_visualizacoes.registrar(problema_id)
+    problema['visualizacoes'] = (problema['visualizacoes'] or 0) + contador_visualizacoes.pendentes(problema_id)
+    
+    # Registrar no log de atividades (gravado em lote, fora desta transação)
+    empresa = current_user['tipo_usuario'] == 'empresa'
+    registro_atividades.registrar(
+        'visualizar_problema',
+        user_id=None if empresa else current_user['id'],
+        empresa_id=current_user['id'] if empresa else None,
+        tipo_usuario=current_user['tipo_usuario'],
+        detalhes={"problema_id": problema_id}
+    )
     
     return problema
 
@@ -212,16 +396,11 @@ def meus_problemas(
 ):
     """Listar problemas da empresa logada"""
     
+    # total_solucoes, solucoes_pendentes e solucoes_aprovadas já vêm em p.*
     query = """
-    SELECT 
-        p.*,
-        COUNT(DISTINCT s.id) as total_solucoes,
-        COUNT(DISTINCT CASE WHEN s.status = 'em_analise' THEN s.id END) as solucoes_pendentes,
-        COUNT(DISTINCT CASE WHEN s.status = 'aprovada' THEN s.id END) as solucoes_aprovadas
+    SELECT p.*
     FROM problemas p
-    LEFT JOIN solucoes s ON p.id = s.problema_id
     WHERE p.empresa_id = %s
-    GROUP BY p.id
     ORDER BY p.created_at DESC
     """
     
@@ -241,7 +420,7 @@ def atualizar_problema(
     
     # Verificar se problema pertence à empresa
     cursor.execute(
-        "SELECT empresa_id FROM problemas WHERE id = %s",
+        "SELECT empresa_id, area FROM problemas WHERE id = %s",
         (problema_id,)
     )
     problema = cursor.fetchone()
@@ -285,6 +464,13 @@ def atualizar_problema(
         problema_id
     ))
     
+    # Mudou de área: os pontos das soluções aprovadas mudam de ranking
+    if problema['area'] != problema_update.area:
+        areas = [problema['area'], problema_update.area]
+        cursor.apos_commit(lambda: ranking_areas.recarregar_areas(areas))
+    
+    cursor.apos_commit(lambda: indice_problemas.atualizar(problema_id))
+    
     return {"message": "Problema atualizado com sucesso!"}
 
 # ==================== FECHAR PROBLEMA ====================
@@ -314,4 +500,8 @@ def fechar_problema(
         (problema_id,)
     )
     
+    # Soluções ainda em análise são avaliadas em lote (após o commit)
+    cursor.apos_commit(lambda: avaliacao_worker.enfileirar_problema(problema_id))
+    cursor.apos_commit(lambda: indice_problemas.atualizar(problema_id))
+    
     return {"message": "Problema fechado com sucesso!"}
\ No newline at end of file
@@ -1,10 +1,13 @@
 #GET rankings
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from typing import List, Optional
 from pydantic import BaseModel
 from app.core.database import get_db
+from app.api.deps import DatabaseRoute, get_current_user, resposta_em_cache
+from app.services.ranking_service import janela_semanal, leaderboard_global, posicoes_do_usuario, ranking_areas
+from app.utils.helpers import codificar_cursor, decodificar_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== SCHEMAS ====================
 
@@ -35,18 +38,65 @@ class RankingMensal(BaseModel):
 
 @router.get("/global", response_model=List[dict])
 def get_ranking_global(
+    response: Response,
     limit: int = Query(100, le=500),
     offset: int = 0,
+    pagina_cursor: Optional[str] = Query(None, alias="cursor"),
     cursor = Depends(get_db)
 ):
     """
     Ranking global de todos os usuários
-    Ordenado por pontos totais
+    Ordenado por pontos totais (ranking em memória; o banco só
+    é consultado para os dados dos usuários da página)
+
+    Paginação por cursor: envie em `cursor` o valor do header
+    X-Next-Cursor da página anterior (o `offset` continua aceito)
     """
     
-    query = """
+    ultimo = None
+    if pagina_cursor:
+        try:
+            ultimo = decodificar_cursor(pagina_cursor, {"pontos": int, "id": int, "posicao": int})
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if not leaderboard_global.pronto:
+        ranking = _ranking_global_sql(limit, offset, ultimo, cursor)
+        pagina = [(row["posicao"], row["id"], row["pontos_totais"]) for row in ranking]
+    else:
+        pagina = _pagina_global_memoria(limit, offset, ultimo)
+        ranking = _detalhes_da_pagina(pagina, cursor)
+    
+    # Pela página do ranking (não pelo que sobrou após os detalhes): um usuário
+    # que sumiu do banco não pode encerrar a paginação
+    if len(pagina) == limit:
+        posicao, user_id, pontos = pagina[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor({
+            "pontos": pontos,
+            "id": user_id,
+            "posicao": posicao
+        })
+    
+    return ranking
+
+def _pagina_global_memoria(limit: int, offset: int, ultimo: Optional[dict]):
+    """Página do ranking em memória: lista de (posicao, user_id, pontos)"""
+    
+    if ultimo:
+        return leaderboard_global.pagina_apos(ultimo["pontos"], ultimo["id"], limit)
+    return leaderboard_global.pagina(offset, limit)
+
+def _detalhes_da_pagina(pagina, cursor):
+    """Detalhes dos usuários da página do ranking em memória, vindos do banco"""
+    
+    if not pagina:
+        return []
+    
+    ids = [user_id for _, user_id, _ in pagina]
+    placeholders = ", ".join(["%s"] * len(ids))
+    
+    query = f"""
     SELECT 
-        ROW_NUMBER() OVER (ORDER BY u.pontos_totais DESC) as posicao,
         u.id,
         u.nome_completo,
         u.foto_perfil,
@@ -57,14 +107,55 @@ def get_ranking_global(
         AVG(s.pontuacao_final) as media_pontuacao
     FROM users u
     LEFT JOIN solucoes s ON u.id = s.user_id AND s.status = 'aprovada'
-    WHERE u.ativo = TRUE
+    WHERE u.id IN ({placeholders})
     GROUP BY u.id
-    ORDER BY u.pontos_totais DESC
-    LIMIT %s OFFSET %s
     """
     
-    cursor.execute(query, (limit, offset))
-    return cursor.fetchall()
+    cursor.execute(query, ids)
+    detalhes = {row['id']: row for row in cursor.fetchall()}
+    
+    # Pontos da memória: são eles que definem a ordem (e o próximo cursor)
+    return [
+        {"posicao": posicao, **detalhes[user_id], "pontos_totais": pontos}
+        for posicao, user_id, pontos in pagina
+        if user_id in detalhes
+    ]
+
+def _ranking_global_sql(limit: int, offset: int, ultimo: Optional[dict], cursor):
+    """Ranking global calculado no banco (enquanto o ranking em memória não está pronto)"""
+    
+    # Só os usuários da página são agregados; a busca usa idx_ativo_pontos
+    query = """
+    SELECT 
+        u.id,
+        u.nome_completo,
+        u.foto_perfil,
+        u.pontos_totais,
+        u.nivel_atual,
+        u.patente,
+        (SELECT COUNT(*) FROM solucoes s
+         WHERE s.user_id = u.id AND s.status = 'aprovada') as total_solucoes,
+        (SELECT AVG(s.pontuacao_final) FROM solucoes s
+         WHERE s.user_id = u.id AND s.status = 'aprovada') as media_pontuacao
+    FROM users u
+    WHERE u.ativo = TRUE
+    """
+    params = []
+    base = offset
+    
+    if ultimo:
+        query += " AND (u.pontos_totais < %s OR (u.pontos_totais = %s AND u.id > %s))"
+        params.extend([ultimo["pontos"], ultimo["pontos"], ultimo["id"]])
+        base, offset = ultimo["posicao"], 0
+    
+    query += " ORDER BY u.pontos_totais DESC, u.id ASC LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+    
+    cursor.execute(query, params)
+    return [
+        {"posicao": base + i + 1, **row}
+        for i, row in enumerate(cursor.fetchall())
+    ]
 
 # ==================== RANKING POR ÁREA ====================
 
@@ -76,9 +167,43 @@ def get_ranking_por_area(
 ):
     """
     Ranking de usuários por área específica
-    Baseado em soluções aprovadas em problemas dessa área
+    Baseado em soluções aprovadas em problemas dessa área (ranking em
+    memória; o banco só é consultado para os dados dos usuários do top)
     """
     
+    if not ranking_areas.pronto:
+        return _ranking_por_area_sql(area, limit, cursor)
+    
+    # Folga para usuários desativados que ainda estão no ranking da área
+    top = ranking_areas.top(area, limit + 20)
+    if not top:
+        return []
+    
+    ids = [user_id for user_id, _, _, _ in top]
+    placeholders = ", ".join(["%s"] * len(ids))
+    
+    cursor.execute(f"""
+        SELECT id, nome_completo, foto_perfil, pontos_totais, nivel_atual, patente
+        FROM users
+        WHERE id IN ({placeholders}) AND ativo = TRUE
+    """, ids)
+    detalhes = {row['id']: row for row in cursor.fetchall()}
+    
+    ranking = [
+        {
+            **detalhes[user_id],
+            "pontos_area": pontos,
+            "solucoes_area": solucoes,
+            "media_pontuacao_area": media
+        }
+        for user_id, pontos, solucoes, media in top
+        if user_id in detalhes
+    ][:limit]
+    return [{"posicao": posicao, **linha} for posicao, linha in enumerate(ranking, start=1)]
+
+def _ranking_por_area_sql(area: str, limit: int, cursor):
+    """Ranking por área agregado no banco (enquanto o ranking em memória não está pronto)"""
+    
     query = """
     SELECT 
         ROW_NUMBER() OVER (ORDER BY SUM(s.pontos_ganhos) DESC) as posicao,
@@ -117,6 +242,9 @@ def get_ranking_mensal(
     """
     Ranking mensal baseado em pontos ganhos no mês
     Se não especificar mês/ano, usa o mês atual
+    
+    Lê as posições materializadas em ranking_mensal (índice idx_posicao),
+    recalculadas por app/services/ranking_mensal_service.py
     """
     
     from datetime import datetime
@@ -128,7 +256,7 @@ def get_ranking_mensal(
     
     query = """
     SELECT 
-        ROW_NUMBER() OVER (ORDER BY rm.pontos_mes DESC) as posicao,
+        rm.posicao_ranking as posicao,
         u.id,
         u.nome_completo,
         u.foto_perfil,
@@ -138,12 +266,14 @@ def get_ranking_mensal(
         rm.ano
     FROM ranking_mensal rm
     INNER JOIN users u ON rm.user_id = u.id
-    WHERE rm.mes = %s AND rm.ano = %s AND u.ativo = TRUE
-    ORDER BY rm.pontos_mes DESC
+    WHERE rm.ano = %s AND rm.mes = %s
+        AND rm.posicao_ranking IS NOT NULL
+        AND u.ativo = TRUE
+    ORDER BY rm.posicao_ranking
     LIMIT %s
     """
     
-    cursor.execute(query, (mes, ano, limit))
+    cursor.execute(query, (ano, mes, limit))
     return cursor.fetchall()
 
 # ==================== RANKING SEMANAL ====================
@@ -155,9 +285,43 @@ def get_ranking_semanal(
 ):
     """
     Ranking dos últimos 7 dias
-    Baseado em soluções aprovadas na última semana
+    Baseado em soluções aprovadas na última semana (janela em memória;
+    o banco só é consultado para os dados dos usuários do top)
     """
     
+    if not janela_semanal.pronto:
+        return _ranking_semanal_sql(limit, cursor)
+    
+    # Folga para usuários desativados que ainda estão na janela
+    top = janela_semanal.top(limit + 20)
+    if not top:
+        return []
+    
+    ids = [user_id for user_id, _, _, _ in top]
+    placeholders = ", ".join(["%s"] * len(ids))
+    
+    cursor.execute(f"""
+        SELECT id, nome_completo, foto_perfil, pontos_totais, patente
+        FROM users
+        WHERE id IN ({placeholders}) AND ativo = TRUE
+    """, ids)
+    detalhes = {row['id']: row for row in cursor.fetchall()}
+    
+    ranking = [
+        {
+            **detalhes[user_id],
+            "pontos_semana": pontos,
+            "solucoes_semana": solucoes,
+            "media_pontuacao": media
+        }
+        for user_id, pontos, solucoes, media in top
+        if user_id in detalhes
+    ][:limit]
+    return [{"posicao": posicao, **linha} for posicao, linha in enumerate(ranking, start=1)]
+
+def _ranking_semanal_sql(limit: int, cursor):
+    """Ranking semanal agregado no banco (enquanto a janela em memória não está pronta)"""
+    
     query = """
     SELECT 
         ROW_NUMBER() OVER (ORDER BY SUM(s.pontos_ganhos) DESC) as posicao,
@@ -228,25 +392,16 @@ def get_ranking_por_patente(
 # ==================== MINHA POSIÇÃO NO RANKING ====================
 
 @router.get("/minha-posicao", response_model=dict)
-def get_minha_posicao(cursor = Depends(get_db)):
+def get_minha_posicao(
+    current_user = Depends(get_current_user),
+    cursor = Depends(get_db)
+):
     """
     Obter posição do usuário logado em diversos rankings
     """
-    from app.api.deps import get_current_user
-    from fastapi import Depends as FastAPIDepends
     
-    current_user = FastAPIDepends(get_current_user)
-    
-    # Posição global
-    cursor.execute("""
-        SELECT COUNT(*) + 1 as posicao_global
-        FROM users
-        WHERE pontos_totais > (
-            SELECT pontos_totais FROM users WHERE id = %s
-        ) AND ativo = TRUE
-    """, (current_user['id'],))
-    
-    global_rank = cursor.fetchone()
+    # Posição global, na patente e na área de interesse
+    posicoes = posicoes_do_usuario(current_user['id'], cursor)
     
     # Posição mensal
     from datetime import datetime
@@ -270,7 +425,9 @@ def get_minha_posicao(cursor = Depends(get_db)):
     user_data = cursor.fetchone()
     
     return {
-        "posicao_global": global_rank['posicao_global'],
+        "posicao_global": posicoes['posicao_global'],
+        "posicao_patente": posicoes['posicao_patente'],
+        "posicao_area": posicoes['posicao_area'],
         "posicao_mensal": mensal_rank['posicao_ranking'] if mensal_rank else None,
         "pontos_totais": user_data['pontos_totais'],
         "pontos_mes": mensal_rank['pontos_mes'] if mensal_rank else 0,
@@ -281,6 +438,7 @@ def get_minha_posicao(cursor = Depends(get_db)):
 # ==================== TOP PERFORMERS ====================
 
 @router.get("/top-performers", response_model=dict)
+@resposta_em_cache(ttl=120)
 def get_top_performers(cursor = Depends(get_db)):
     """
     Estatísticas dos top performers da plataforma
@@ -298,15 +456,15 @@ def get_top_performers(cursor = Depends(get_db)):
     """)
     top_3_global = cursor.fetchall()
     
-    # Maior streak (mais dias consecutivos com atividade)
+    # Maior streak (mais dias com atividade nos últimos 30 dias; rollup diário)
     cursor.execute("""
         SELECT 
             u.id, u.nome_completo, u.foto_perfil,
-            COUNT(DISTINCT DATE(l.created_at)) as dias_ativos
-        FROM users u
-        INNER JOIN logs_atividade l ON u.id = l.user_id
+            COUNT(*) as dias_ativos
+        FROM atividade_diaria a
+        INNER JOIN users u ON u.id = a.user_id
         WHERE u.ativo = TRUE 
-            AND l.created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+            AND a.data >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
         GROUP BY u.id
         ORDER BY dias_ativos DESC
         LIMIT 3
@@ -339,6 +497,7 @@ def get_top_performers(cursor = Depends(get_db)):
 # ==================== ESTATÍSTICAS GERAIS ====================
 
 @router.get("/estatisticas", response_model=dict)
+@resposta_em_cache(ttl=60)
 def get_estatisticas_ranking(cursor = Depends(get_db)):
     """
     Estatísticas gerais dos rankings
@@ -1,12 +1,21 @@
 # CRUD e soluções + avaliações AI
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.core.database import get_db
-from app.api.deps import get_current_user, get_current_empresa
+from app.core.async_database import AsyncDatabase, get_async_db
+from app.api.deps import get_current_user, get_current_empresa, DatabaseRoute
+from app.services.ai_service import (
+    provider_configurado,
+    analisar_solucao_stream,
+    finalizar_analise_stream,
+    ParserAnaliseParcial
+)
+from app.services.avaliacao_worker import avaliacao_worker, aplicar_analise
 import json
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== SCHEMAS ====================
 
@@ -35,20 +44,15 @@ class AvaliacaoManual(BaseModel):
 
 # ==================== SUBMETER SOLUÇÃO ====================
 
-@router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def submeter_solucao(
-    solucao: SolucaoCreate,
-    current_user = Depends(get_current_user),
-    cursor = Depends(get_db)
-):
-    """Submeter solução para um problema"""
+async def _registrar_solucao(solucao: SolucaoCreate, current_user: dict, cursor):
+    """Valida e insere a solução ('em_analise'). Retorna (problema, solucao_id)"""
     
     # Verificar se problema existe e está ativo
-    cursor.execute(
+    await cursor.execute(
         "SELECT * FROM problemas WHERE id = %s AND status = 'ativo'",
         (solucao.problema_id,)
     )
-    problema = cursor.fetchone()
+    problema = await cursor.fetchone()
     
     if not problema:
         raise HTTPException(
@@ -57,12 +61,12 @@ async def submeter_solucao(
         )
     
     # Verificar se usuário já submeteu solução para este problema
-    cursor.execute(
+    await cursor.execute(
         "SELECT id FROM solucoes WHERE user_id = %s AND problema_id = %s",
         (current_user['id'], solucao.problema_id)
     )
     
-    if cursor.fetchone():
+    if await cursor.fetchone():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Você já submeteu uma solução para este problema"
@@ -76,7 +80,7 @@ async def submeter_solucao(
     ) VALUES (%s, %s, %s, %s, %s, 'em_analise')
     """
     
-    cursor.execute(query, (
+    await cursor.execute(query, (
         solucao.problema_id,
         current_user['id'],
         solucao.descricao_solucao,
@@ -84,61 +88,106 @@ async def submeter_solucao(
         solucao.link_demo
     ))
     
-    solucao_id = cursor.lastrowid
+    return problema, cursor.lastrowid
+
+@router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def submeter_solucao(
+    solucao: SolucaoCreate,
+    current_user = Depends(get_current_user),
+    cursor = Depends(get_async_db)
+):
+    """Submeter solução para um problema"""
     
-    # ========== ANÁLISE POR AI (Assíncrono) ==========
-    try:
-        from app.services.ai_service import analisar_solucao
-        
-        # Analisar com AI
-        analise = await analisar_solucao(
-            problema=problema,
-            solucao_texto=solucao.descricao_solucao
-        )
-        
-        # Atualizar solução com análise da AI
-        update_query = """
-        UPDATE solucoes SET
-            analise_ai = %s,
-            pontuacao_ai = %s,
-            feedback_ai = %s,
-            pontos_ganhos = %s,
-            pontuacao_final = %s,
-            status = %s,
-            data_avaliacao = NOW()
-        WHERE id = %s
-        """
-        
-        status_final = 'aprovada' if analise['pontuacao'] >= 60 else 'reprovada'
-        pontos = problema['pontos_recompensa'] if status_final == 'aprovada' else 0
-        
-        cursor.execute(update_query, (
-            json.dumps(analise),
-            analise['pontuacao'],
-            analise['feedback'],
-            pontos,
-            analise['pontuacao'],
-            status_final,
-            solucao_id
-        ))
-        
-        return {
-            "message": "Solução submetida e avaliada com sucesso!",
-            "solucao_id": solucao_id,
-            "status": status_final,
-            "pontuacao": analise['pontuacao'],
-            "pontos_ganhos": pontos,
-            "feedback": analise['feedback']
-        }
-        
-    except Exception as e:
-        # Se AI falhar, apenas marca como pendente de análise
-        print(f"Erro na análise AI: {e}")
-        return {
-            "message": "Solução submetida! Aguardando análise.",
-            "solucao_id": solucao_id,
-            "status": "em_analise"
-        }
+    _, solucao_id = await _registrar_solucao(solucao, current_user, cursor)
+    
+    # ========== ANÁLISE POR AI (em background) ==========
+    # Confirma antes de enfileirar para o worker já encontrar a solução no banco
+    await cursor.connection.commit()
+    avaliacao_worker.enfileirar(solucao_id)
+    
+    return {
+        "message": "Solução submetida! Aguardando análise.",
+        "solucao_id": solucao_id,
+        "status": "em_analise"
+    }
+
+# ==================== SUBMETER COM ANÁLISE EM TEMPO REAL (SSE) ====================
+
+def _sse(evento: str, dados: dict) -> str:
+    """Formata um evento Server-Sent Events"""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n"
+
+@router.post("/stream", status_code=status.HTTP_201_CREATED)
+async def submeter_solucao_stream(
+    solucao: SolucaoCreate,
+    current_user = Depends(get_current_user)
+):
+    """
+    Submeter solução e acompanhar a análise AI em tempo real (Server-Sent Events)
+    
+    Eventos: inicio, feedback (texto parcial), criterio (pontuação de cada
+    critério), resultado (análise final gravada) ou erro (a solução continua
+    'em_analise' e é avaliada pela fila em background).
+    """
+    
+    # Conexão só durante o insert: não fica presa enquanto o stream dura
+    async with AsyncDatabase.get_cursor() as cursor:
+        problema, solucao_id = await _registrar_solucao(solucao, current_user, cursor)
+    
+    stream_disponivel = provider_configurado() and avaliacao_worker.reservar(solucao_id)
+    
+    async def eventos():
+        persistido = False
+        try:
+            yield _sse("inicio", {"solucao_id": solucao_id, "status": "em_analise"})
+            
+            if not stream_disponivel:
+                yield _sse("erro", {
+                    "detail": "Análise em tempo real indisponível. Aguardando análise.",
+                    "status": "em_analise"
+                })
+                return
+            
+            parser = ParserAnaliseParcial()
+            async for pedaco in analisar_solucao_stream(problema, solucao.descricao_solucao):
+                feedback, criterios = parser.alimentar(pedaco)
+                if feedback:
+                    yield _sse("feedback", {"delta": feedback})
+                for nome, pontos in criterios:
+                    yield _sse("criterio", {"nome": nome, "pontos": pontos})
+            
+            analise = await finalizar_analise_stream(problema, solucao.descricao_solucao, parser.texto)
+            status_final = await aplicar_analise(solucao_id, problema, analise)
+            persistido = True
+            
+            yield _sse("resultado", {
+                "solucao_id": solucao_id,
+                "status": status_final,
+                "pontuacao": analise['pontuacao'],
+                "pontos_ganhos": problema['pontos_recompensa'] if status_final == 'aprovada' else 0,
+                "feedback": analise['feedback'],
+                "criterios": analise['detalhes'].get('criterios', {})
+            })
+            
+        except Exception as e:
+            print(f"Erro na análise AI (stream) da solução {solucao_id}: {e}")
+            yield _sse("erro", {
+                "detail": "Não foi possível concluir a análise agora. Aguardando análise.",
+                "status": "em_analise"
+            })
+        finally:
+            # Desconexão do cliente ou falha: a fila em background assume
+            if stream_disponivel:
+                avaliacao_worker.liberar(solucao_id)
+            if not persistido:
+                avaliacao_worker.enfileirar(solucao_id)
+    
+    return StreamingResponse(
+        eventos(),
+        status_code=status.HTTP_201_CREATED,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # ==================== MINHAS SOLUÇÕES ====================
 
@@ -305,4 +354,57 @@ def avaliar_solucao(
         solucao_id
     ))
     
-    return {"message": "Avaliação registrada com sucesso!"}
\ No newline at end of file
+    return {"message": "Avaliação registrada com sucesso!"}
+
+# ==================== REAVALIAR COM AI (EMPRESA) ====================
+
+@router.post("/{solucao_id}/reavaliar", response_model=dict)
+async def reavaliar_solucao(
+    solucao_id: int,
+    ignorar_cache: bool = Query(False, description="Forçar nova análise em vez de reaproveitar a do cache"),
+    current_empresa = Depends(get_current_empresa),
+    cursor = Depends(get_async_db)
+):
+    """Empresa pede nova análise AI de uma solução ainda não aprovada"""
+    
+    await cursor.execute("""
+        SELECT s.status, p.empresa_id
+        FROM solucoes s
+        INNER JOIN problemas p ON s.problema_id = p.id
+        WHERE s.id = %s
+    """, (solucao_id,))
+    solucao = await cursor.fetchone()
+    
+    if not solucao or solucao['empresa_id'] != current_empresa['id']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Sem permissão"
+        )
+    
+    # Soluções aprovadas já renderam pontos (trigger after_solucao_aprovada)
+    if solucao['status'] == 'aprovada':
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Solução já aprovada não pode ser reavaliada"
+        )
+    
+    # Limpa o resultado anterior: enquanto 'em_analise' nada da avaliação antiga aparece
+    await cursor.execute("""
+        UPDATE solucoes SET
+            status = 'em_analise',
+            analise_ai = NULL,
+            pontuacao_ai = NULL,
+            feedback_ai = NULL,
+            pontuacao_final = NULL,
+            data_avaliacao = NULL
+        WHERE id = %s
+    """, (solucao_id,))
+    
+    await cursor.connection.commit()
+    avaliacao_worker.enfileirar(solucao_id, ignorar_cache=ignorar_cache)
+    
+    return {
+        "message": "Solução enviada para nova análise",
+        "solucao_id": solucao_id,
+        "status": "em_analise"
+    }
@@ -4,9 +4,11 @@ from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
 from datetime import date
 from app.core.database import get_db
-from app.api.deps import get_current_user, get_current_active_user
+from app.api.deps import get_current_user, get_current_active_user, DatabaseRoute, invalidar_principal
+from app.services.ranking_service import leaderboard_global, posicoes_do_usuario
+from app.services.ranking_mensal_service import ranking_mensal
 
-router = APIRouter()
+router = APIRouter(route_class=DatabaseRoute)
 
 # ==================== SCHEMAS ====================
 
@@ -161,6 +163,12 @@ def update_my_profile(
     
     query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = %s"
     cursor.execute(query, values)
+    invalidar_principal('user', current_user['id'], cursor)
+    
+    if user_update.area_interesse:
+        cursor.apos_commit(lambda: leaderboard_global.atualizar(
+            current_user['id'], area=user_update.area_interesse
+        ))
     
     return {"message": "Perfil atualizado com sucesso!"}
 
@@ -197,13 +205,7 @@ def get_my_stats(
     user_data = cursor.fetchone()
     
     # Posição no ranking
-    cursor.execute("""
-        SELECT COUNT(*) + 1 as posicao
-        FROM users
-        WHERE pontos_totais > %s AND ativo = TRUE
-    """, (user_data['pontos_totais'],))
-    
-    ranking = cursor.fetchone()
+    posicoes = posicoes_do_usuario(current_user['id'], cursor)
     
     # Certificados obtidos
     cursor.execute("""
@@ -223,7 +225,9 @@ def get_my_stats(
         "nivel_atual": user_data['nivel_atual'],
         "patente": user_data['patente'],
         "media_pontuacao": float(stats_solucoes['media_pontuacao']) if stats_solucoes['media_pontuacao'] else None,
-        "ranking_posicao": ranking['posicao'],
+        "ranking_posicao": posicoes['posicao_global'],
+        "ranking_posicao_patente": posicoes['posicao_patente'],
+        "ranking_posicao_area": posicoes['posicao_area'],
         "certificados_obtidos": certificados['total_certificados']
     }
 
@@ -369,6 +373,16 @@ def deactivate_account(
         "UPDATE users SET ativo = FALSE WHERE id = %s",
         (current_user['id'],)
     )
+    invalidar_principal('user', current_user['id'], cursor)
+    cursor.apos_commit(lambda: leaderboard_global.remover(current_user['id']))
+    
+    # Meses em que o usuário tem posição no ranking mensal: recalcular sem ele
+    cursor.execute(
+        "SELECT ano, mes FROM ranking_mensal WHERE user_id = %s AND posicao_ranking IS NOT NULL",
+        (current_user['id'],)
+    )
+    for row in cursor.fetchall():
+        cursor.apos_commit(lambda ano=row['ano'], mes=row['mes']: ranking_mensal.marcar(ano, mes))
     
     return {"message": "Conta desativada com sucesso. Entre em contato com o suporte para reativar."}
 
@@ -0,0 +1,107 @@
+import asyncio
+import aiomysql
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+from app.core.config import settings
+from app.core.database import PoolTimeoutError
+
+class AsyncDatabase:
+    """
+    Camada de acesso assíncrona ao MySQL (aiomysql)
+    Usada pelos endpoints `async def` para não bloquear o event loop.
+    Os endpoints `def` continuam usando `Database`/`get_db`.
+    """
+
+    pool = None
+
+    @staticmethod
+    async def open():
+        """Cria o pool assíncrono (chamado no startup)"""
+        if AsyncDatabase.pool is not None:
+            return
+        AsyncDatabase.pool = await aiomysql.create_pool(
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            db=settings.DB_NAME,
+            charset='utf8mb4',
+            minsize=settings.DB_POOL_MIN_SIZE,
+            maxsize=settings.DB_POOL_MAX_SIZE,
+            pool_recycle=settings.DB_POOL_MAX_LIFETIME or -1,
+            autocommit=False
+        )
+
+    @staticmethod
+    async def close():
+        """Fecha o pool assíncrono (chamado no shutdown)"""
+        if AsyncDatabase.pool is None:
+            return
+        AsyncDatabase.pool.close()
+        await AsyncDatabase.pool.wait_closed()
+        AsyncDatabase.pool = None
+
+    @staticmethod
+    def stats() -> dict:
+        """Métricas atuais do pool assíncrono"""
+        pool = AsyncDatabase.pool
+        if pool is None:
+            return {"aberto": False}
+        return {
+            "aberto": True,
+            "in_use": pool.size - pool.freesize,
+            "idle": pool.freesize,
+            "min_size": pool.minsize,
+            "max_size": pool.maxsize
+        }
+
+    @staticmethod
+    @asynccontextmanager
+    async def get_cursor():
+        """
+        Context manager assíncrono para obter cursor (dicionário)
+        Usage:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute("SELECT * FROM users")
+                results = await cursor.fetchall()
+        """
+        if AsyncDatabase.pool is None:
+            await AsyncDatabase.open()
+
+        try:
+            connection = await asyncio.wait_for(
+                AsyncDatabase.pool.acquire(),
+                timeout=settings.DB_POOL_ACQUIRE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(
+                f"Nenhuma conexão assíncrona livre após {settings.DB_POOL_ACQUIRE_TIMEOUT}s"
+            )
+
+        try:
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                yield cursor
+            await connection.commit()
+        except BaseException as e:
+            try:
+                await connection.rollback()
+            except Exception:
+                connection.close()
+            if isinstance(e, aiomysql.Error):
+                print(f"Erro no banco de dados: {e}")
+            raise
+        finally:
+            AsyncDatabase.pool.release(connection)
+
+# Dependency para FastAPI (endpoints async)
+async def get_async_db() -> AsyncGenerator:
+    """
+    Dependency do FastAPI para injeção de cursor assíncrono
+    Usage nos endpoints:
+        @router.get("/users")
+        async def get_users(cursor = Depends(get_async_db)):
+            await cursor.execute("SELECT * FROM users")
+            return await cursor.fetchall()
+    """
+    async with AsyncDatabase.get_cursor() as cursor:
+        yield cursor
@@ -0,0 +1,144 @@
+#Cache em memória (TTL + LRU)
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_AUSENTE = object()
+
+class TTLCache:
+    """
+    Cache em memória do processo, thread-safe
+    - Cada entrada expira após `ttl` segundos (ou um TTL próprio em `set`)
+    - Quando cheio, remove a entrada usada há mais tempo (LRU)
+    - Contabiliza hits/misses para as métricas
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor em cache (ou `default` se ausente/expirado)"""
+        with self._lock:
+            item = self._dados.get(key, _AUSENTE)
+            if item is not _AUSENTE:
+                valor, expira_em = item
+                if expira_em > time.monotonic():
+                    self._dados.move_to_end(key)
+                    self.hits += 1
+                    return valor
+                del self._dados[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Guarda um valor; `ttl` sobrescreve o TTL padrão"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._dados[key] = (value, time.monotonic() + ttl)
+            self._dados.move_to_end(key)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Remove uma entrada (invalidação explícita)"""
+        with self._lock:
+            self._dados.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def stats(self) -> dict:
+        """Métricas do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._dados),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0
+            }
+
+
+class CacheRespostas:
+    """
+    Cache de respostas HTTP prontas (corpo já serializado + ETag)
+
+    - Entradas expiram pelo TTL de cada rota (ver `resposta_em_cache` em app.api.deps)
+    - Single-flight: com a entrada ausente/expirada, só uma requisição calcula;
+      as demais que chegam no meio aguardam o mesmo resultado
+    - Métricas de hits/misses/aguardando/304 por rota
+    """
+
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0)
+        self._em_andamento = {}
+        self._metricas = {}
+
+    def _contar(self, rota: str, campo: str):
+        metricas = self._metricas.setdefault(
+            rota, {"hits": 0, "misses": 0, "aguardaram": 0, "nao_modificado": 0}
+        )
+        metricas[campo] += 1
+
+    def contar_304(self, rota: str):
+        self._contar(rota, "nao_modificado")
+
+    async def obter(self, rota: str, chave: Hashable, ttl: float, calcular):
+        """
+        Retorna a entrada em cache ou calcula uma só vez com `await calcular()`
+        `calcular` devolve a entrada a guardar, ou None se a resposta não é cacheável
+        (nesse caso quem estava aguardando calcula por conta própria).
+        Retorna (entrada, origem) com origem 'hit', 'aguardou' ou 'miss'.
+        """
+        entrada = self._cache.get(chave)
+        if entrada is not None:
+            self._contar(rota, "hits")
+            return entrada, "hit"
+
+        futuro = self._em_andamento.get(chave)
+        if futuro is not None:
+            self._contar(rota, "aguardaram")
+            entrada = await asyncio.shield(futuro)
+            if entrada is not None:
+                return entrada, "aguardou"
+            return None, "miss"
+
+        self._contar(rota, "misses")
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_andamento[chave] = futuro
+        entrada = None
+        try:
+            entrada = await calcular()
+            if entrada is not None:
+                self._cache.set(chave, entrada, ttl=ttl)
+        finally:
+            del self._em_andamento[chave]
+            futuro.set_result(entrada)
+        return entrada, "miss"
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Métricas do cache de respostas"""
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "em_andamento": len(self._em_andamento),
+            "rotas": {rota: dict(m) for rota, m in self._metricas.items()}
+        }
@@ -16,15 +16,93 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
     
+    # Pool de conexões
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_ACQUIRE_TIMEOUT: float = 5.0  # segundos
+    DB_POOL_MAX_LIFETIME: int = 1800  # segundos (0 = sem limite)
+    DB_POOL_HEALTH_CHECK: bool = True
+    
     # Segurança JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 dias
+    JWT_BACKEND: str = "jose"  # jose ou pyjwt (mais rápido)
+    JWT_CACHE_TTL: int = 300  # segundos (nunca além do exp do token)
+    JWT_CACHE_SIZE: int = 10000
+    
+    # Hash de senhas (argon2)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2  # processos dedicados (0 = no próprio processo)
+    PASSWORD_HASH_QUEUE_SIZE: int = 8  # pedidos em espera antes de responder 503
+    
+    # Threads para os endpoints síncronos (threadpool do anyio; padrão dele: 40)
+    # Cada hash em andamento ou na fila ocupa uma dessas threads esperando o
+    # resultado: WORKERS + QUEUE_SIZE é limitado a 1/4 do threadpool
+    THREADPOOL_SIZE: int = 40
+    
+    # Cache de usuários autenticados (get_current_user)
+    PRINCIPAL_CACHE_TTL: int = 60  # segundos
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    
+    # Cache de respostas dos endpoints públicos de estatísticas (TTL definido por rota)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SIZE: int = 256  # respostas (rota + query string)
+    
+    # Cache parcial do dashboard do usuário (recomendados e progresso semanal)
+    DASHBOARD_CACHE_TTL: int = 30  # segundos
+    DASHBOARD_CACHE_SIZE: int = 10000
+    
+    # Ranking em memória
+    RANKING_RECONCILE_INTERVAL: int = 600  # segundos entre reconciliações com o banco (0 = nunca)
+    
+    # Contador de visualizações em memória
+    VIEW_COUNTER_FLUSH_INTERVAL: float = 10.0  # segundos entre gravações no banco
+    
+    # Log de atividades (gravado em lote, fora da requisição)
+    ACTIVITY_LOG_QUEUE_SIZE: int = 10000  # registros na fila; acima disso os novos são descartados
+    ACTIVITY_LOG_BATCH_SIZE: int = 200  # registros por INSERT
+    ACTIVITY_LOG_FLUSH_INTERVAL: float = 2.0  # segundos entre gravações (ou antes, se encher um lote)
+    ACTIVITY_LOG_HOT_DAYS: int = 90  # dias em logs_atividade antes de ir para o arquivo
+    ACTIVITY_LOG_RETENTION_DAYS: int = 365  # dias no arquivo (partições mensais mais antigas são removidas)
+    ACTIVITY_ROLLUP_RETENTION_DAYS: int = 730  # dias mantidos em atividade_diaria
+    ACTIVITY_LOG_MAINTENANCE_INTERVAL: int = 86400  # segundos entre rodadas da retenção (0 = só manual)
+    
+    # Ranking mensal materializado
+    RANKING_MONTHLY_REFRESH_INTERVAL: int = 60  # segundos entre recálculos de posicao_ranking (0 = só manual)
+    
+    # Índice de busca de problemas em memória
+    SEARCH_INDEX_REBUILD_INTERVAL: int = 3600  # segundos entre reconstruções a partir do banco (0 = nunca)
     
     # AI
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
-    AI_PROVIDER: str = "openai"  # openai ou anthropic
+    AI_PROVIDER: str = "openai"  # openai, anthropic ou fake (local, para testes)
+    AI_FAKE_LATENCY: float = 0.0  # segundos simulados por avaliação (provider fake)
+    
+    # Conexões HTTP com os providers AI (pool keep-alive compartilhado)
+    AI_HTTP_MAX_CONNECTIONS: int = 20
+    AI_HTTP_MAX_KEEPALIVE: int = 10
+    AI_HTTP_KEEPALIVE_EXPIRY: float = 60.0  # segundos
+    AI_HTTP_TIMEOUT: float = 60.0  # segundos por requisição
+    AI_HTTP_CONNECT_TIMEOUT: float = 5.0  # segundos
+    AI_HTTP_MAX_RETRIES: int = 2  # retries do próprio SDK
+    
+    # Cache persistente das análises AI
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_AGE_DAYS: int = 30
+    AI_CACHE_MAX_ENTRIES: int = 50000
+    AI_CACHE_MEMORY_SIZE: int = 1000  # entradas mantidas também em memória
+    
+    # Fila de avaliação AI (worker em background)
+    AI_WORKER_ENABLED: bool = True
+    AI_WORKER_CONCURRENCY: int = 4  # avaliações simultâneas no provider
+    AI_WORKER_POLL_INTERVAL: float = 30.0  # segundos entre buscas de soluções pendentes
+    AI_WORKER_MAX_ATTEMPTS: int = 3  # depois disso a solução vai para 'revisao'
+    AI_WORKER_BACKOFF_BASE: float = 2.0  # segundos (dobra a cada nova tentativa)
+    AI_BATCH_SIZE: int = 5  # soluções por prompt na avaliação em lote (fechar problema)
     
     # Email
     SMTP_HOST: str = "smtp.gmail.com"
@@ -43,6 +121,10 @@ class Settings(BaseSettings):
     # Logs
     LOG_LEVEL: str = "INFO"
     
+    # Métricas internas (/metrics): só com o header X-Metrics-Token igual a este valor;
+    # sem token configurado o endpoint fica desativado (404)
+    METRICS_TOKEN: Optional[str] = None
+    
     @property
     def DATABASE_URL(self) -> str:
         """Retorna URL de conexão com o MySQL"""
@@ -1,15 +1,231 @@
 import mysql.connector
 from mysql.connector import Error
 from contextlib import contextmanager
+from collections import deque
 from typing import Generator
+from fastapi import Request
+import threading
+import time
 from app.core.config import settings
 
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera do pool"""
+
+
+class _PooledConnection:
+    """Conexão MySQL mantida pelo pool, com a data de criação para reciclagem"""
+
+    __slots__ = ("connection", "created_at", "checked_out_at")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.checked_out_at = None
+
+    def expirada(self, max_lifetime: int) -> bool:
+        return max_lifetime > 0 and time.monotonic() - self.created_at >= max_lifetime
+
+    def fechar(self):
+        try:
+            self.connection.close()
+        except Error:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões MySQL
+
+    - Mantém entre `min_size` e `max_size` conexões abertas
+    - Espera até `acquire_timeout` segundos por uma conexão livre
+    - Verifica a conexão (ping) antes de entregá-la
+    - Recicla conexões com mais de `max_lifetime` segundos
+    """
+
+    def __init__(
+        self,
+        min_size: int,
+        max_size: int,
+        acquire_timeout: float,
+        max_lifetime: int,
+        health_check: bool = True
+    ):
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+
+        self._idle = deque()
+        self._in_use = 0
+        self._lock = threading.Condition()
+
+        # Métricas
+        self._total_acquires = 0
+        self._total_timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_created = 0
+        self._total_recycled = 0
+        self._total_releases = 0
+        self._total_hold = 0.0
+        self._max_hold = 0.0
+
+    # ---------- ciclo de vida ----------
+
+    def open(self):
+        """Abre as conexões mínimas do pool (chamado no startup)"""
+        while True:
+            with self._lock:
+                if len(self._idle) + self._in_use >= self.min_size:
+                    return
+                self._in_use += 1
+            try:
+                pooled = self._create()
+            except Error:
+                with self._lock:
+                    self._in_use -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self._in_use -= 1
+                self._idle.append(pooled)
+                self._lock.notify()
+
+    def close(self):
+        """Fecha todas as conexões ociosas (chamado no shutdown)"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            pooled.fechar()
+
+    # ---------- checkout / checkin ----------
+
+    def acquire(self) -> _PooledConnection:
+        """Obtém uma conexão do pool, criando uma nova se houver espaço"""
+        inicio = time.monotonic()
+        deadline = inicio + self.acquire_timeout
+
+        with self._lock:
+            while not self._idle and self._in_use >= self.max_size:
+                restante = deadline - time.monotonic()
+                if restante <= 0:
+                    self._total_timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão livre após {self.acquire_timeout}s "
+                        f"({self._in_use}/{self.max_size} em uso)"
+                    )
+                self._lock.wait(restante)
+
+            pooled = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            if pooled is not None and not self._saudavel(pooled):
+                pooled.fechar()
+                with self._lock:
+                    self._total_recycled += 1
+                pooled = None
+            if pooled is None:
+                pooled = self._create()
+        except Error:
+            self._devolver_vaga()
+            raise
+
+        pooled.checked_out_at = time.monotonic()
+        espera = pooled.checked_out_at - inicio
+        with self._lock:
+            self._total_acquires += 1
+            self._total_wait += espera
+            self._max_wait = max(self._max_wait, espera)
+        return pooled
+
+    def release(self, pooled: _PooledConnection, descartar: bool = False):
+        """Devolve a conexão ao pool (ou fecha, se estiver inválida/expirada)"""
+        if pooled.checked_out_at is not None:
+            retencao = time.monotonic() - pooled.checked_out_at
+            pooled.checked_out_at = None
+            with self._lock:
+                self._total_releases += 1
+                self._total_hold += retencao
+                self._max_hold = max(self._max_hold, retencao)
+
+        if not descartar and pooled.expirada(self.max_lifetime):
+            descartar = True
+            with self._lock:
+                self._total_recycled += 1
+
+        if descartar:
+            pooled.fechar()
+            self._devolver_vaga()
+            return
+
+        with self._lock:
+            self._in_use -= 1
+            self._idle.append(pooled)
+            self._lock.notify()
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas atuais do pool"""
+        with self._lock:
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "total_acquires": self._total_acquires,
+                "total_timeouts": self._total_timeouts,
+                "total_created": self._total_created,
+                "total_recycled": self._total_recycled,
+                "avg_wait_ms": round(self._total_wait / self._total_acquires * 1000, 3) if self._total_acquires else 0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "avg_hold_ms": round(self._total_hold / self._total_releases * 1000, 3) if self._total_releases else 0,
+                "max_hold_ms": round(self._max_hold * 1000, 3)
+            }
+
+    # ---------- internos ----------
+
+    def _create(self) -> _PooledConnection:
+        connection = Database.get_connection()
+        with self._lock:
+            self._total_created += 1
+        return _PooledConnection(connection)
+
+    def _saudavel(self, pooled: _PooledConnection) -> bool:
+        if pooled.expirada(self.max_lifetime):
+            return False
+        if not self.health_check:
+            return True
+        try:
+            pooled.connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _devolver_vaga(self):
+        with self._lock:
+            self._in_use -= 1
+            self._lock.notify()
+
+
 class Database:
     """Classe para gerenciar a conexão com o banco de dados MySQL."""
 
+    pool = ConnectionPool(
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        acquire_timeout=settings.DB_POOL_ACQUIRE_TIMEOUT,
+        max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+        health_check=settings.DB_POOL_HEALTH_CHECK
+    )
+
     @staticmethod
     def get_connection():
-        """Cria uma nova conexão com o banco de dados"""
+        """Cria uma nova conexão com o banco de dados (usado pelo pool)"""
         try:
             connection = mysql.connector.connect(
                 host=settings.DB_HOST,
@@ -20,10 +236,10 @@ class Database:
                 charset='utf8mb4',
                 collation='utf8mb4_unicode_ci'
             )
-            
+
             if connection.is_connected():
                 return connection
-            
+
         except Error as e:
             print(f"Erro ao conectar ao MySQL: {e}")
             raise
@@ -31,39 +247,152 @@ class Database:
     @contextmanager
     def get_cursor(dictionary=True):
         """
-        Context manager para obter cursor
+        Context manager para obter cursor (conexão emprestada do pool)
         Usage:
             with Database.get_cursor() as cursor:
                 cursor.execute("SELECT * FROM users")
                 results = cursor.fetchall()
         """
-        connection = None
+        pooled = None
         cursor = None
+        descartar = False
         try:
-            connection = Database.get_connection()
-            cursor = connection.cursor(dictionary=dictionary)
+            pooled = Database.pool.acquire()
+            cursor = pooled.connection.cursor(dictionary=dictionary)
             yield cursor
-            connection.commit()
+            pooled.connection.commit()
         except Error as e:
-            if connection:
-                connection.rollback()
+            if pooled:
+                try:
+                    pooled.connection.rollback()
+                except Error:
+                    descartar = True
             print(f"Erro no banco de dados: {e}")
             raise
+        except BaseException:
+            if pooled:
+                try:
+                    pooled.connection.rollback()
+                except Error:
+                    descartar = True
+            raise
         finally:
             if cursor:
+                try:
+                    cursor.close()
+                except Error:
+                    descartar = True
+            if pooled:
+                Database.pool.release(pooled, descartar=descartar)
+
+class LazyCursor:
+    """
+    Cursor "preguiçoso": só pega uma conexão do pool no primeiro execute()
+    e a devolve em release(). Requisições que falham antes de consultar
+    o banco (validação, autenticação, cache) nunca ocupam uma conexão.
+    """
+
+    def __init__(self, dictionary=True):
+        self.dictionary = dictionary
+        self.hold_time = 0.0  # segundos com a conexão emprestada
+        self._pooled = None
+        self._cursor = None
+        self._lastrowid = None
+        self._rowcount = -1
+        self._apos_commit = []
+
+    @property
+    def conectado(self) -> bool:
+        return self._pooled is not None
+
+    def _garantir_cursor(self):
+        if self._cursor is None:
+            self._pooled = Database.pool.acquire()
+            self._cursor = self._pooled.connection.cursor(dictionary=self.dictionary)
+        return self._cursor
+
+    def execute(self, query, params=None):
+        return self._garantir_cursor().execute(query, params)
+
+    def executemany(self, query, seq_params):
+        return self._garantir_cursor().executemany(query, seq_params)
+
+    def fetchone(self):
+        return self._garantir_cursor().fetchone()
+
+    def fetchall(self):
+        return self._garantir_cursor().fetchall()
+
+    def fetchmany(self, size=1):
+        return self._garantir_cursor().fetchmany(size)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid if self._cursor is not None else self._lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount if self._cursor is not None else self._rowcount
+
+    def apos_commit(self, callback):
+        """Agenda `callback()` para depois do commit desta transação"""
+        self._apos_commit.append(callback)
+
+    def release(self, commit=True):
+        """Confirma (ou desfaz) a transação e devolve a conexão ao pool"""
+        callbacks, self._apos_commit = self._apos_commit, []
+        if self._pooled is None:
+            if commit:
+                for callback in callbacks:
+                    callback()
+            return
+
+        pooled, cursor = self._pooled, self._cursor
+        self._pooled = self._cursor = None
+        self._lastrowid, self._rowcount = cursor.lastrowid, cursor.rowcount
+        descartar = False
+        try:
+            if commit:
+                pooled.connection.commit()
+            else:
+                pooled.connection.rollback()
+        except Error as e:
+            try:
+                pooled.connection.rollback()
+            except Error:
+                descartar = True
+            print(f"Erro no banco de dados: {e}")
+            raise
+        finally:
+            try:
                 cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
+            except Error:
+                descartar = True
+            self.hold_time += time.monotonic() - pooled.checked_out_at
+            Database.pool.release(pooled, descartar=descartar)
+
+        if commit:
+            for callback in callbacks:
+                callback()
 
 # Dependency para FastAPI
-def get_db() -> Generator:
+def get_db(request: Request) -> Generator:
     """
     Dependency do FastAPI para injeção de cursor
+    A conexão só é obtida no primeiro execute() e é devolvida ao pool
+    assim que o endpoint termina (ver DatabaseRoute em app.api.deps).
     Usage nos endpoints:
         @router.get("/users")
         def get_users(cursor = Depends(get_db)):
             cursor.execute("SELECT * FROM users")
             return cursor.fetchall()
     """
-    with Database.get_cursor() as cursor:
-        yield cursor
\ No newline at end of file
+    cursor = LazyCursor()
+    request.state.db_cursor = cursor
+    try:
+        yield cursor
+    except BaseException:
+        cursor.release(commit=False)
+        raise
+    else:
+        cursor.release(commit=True)
@@ -2,22 +2,90 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional, Union
+import hashlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from app.core.config import settings
+from app.core.cache import TTLCache
 
 # 🔥 MUDANÇA IMPORTANTE: Usando argon2 em vez de bcrypt
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM
+)
+
+# ==================== POOL DE HASHING DE SENHAS ====================
+# argon2 gasta dezenas de ms de CPU por chamada. Em vez de rodar no
+# threadpool dos endpoints, roda num pool de processos dedicado, com
+# fila limitada: quando lotado, a requisição recebe 503 na hora.
+# Quem espera o hash ainda segura uma thread do threadpool (handlers
+# síncronos), então a fila é limitada a 1/4 de THREADPOOL_SIZE: uma
+# rajada de logins nunca toma as threads dos outros endpoints.
+
+class HashingPoolSaturado(Exception):
+    """Fila do pool de hashing cheia (admission control)"""
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+HASH_VAGAS = max(1, min(
+    max(settings.PASSWORD_HASH_WORKERS, 1) + settings.PASSWORD_HASH_QUEUE_SIZE,
+    settings.THREADPOOL_SIZE // 4
+))
+_hash_vagas = threading.BoundedSemaphore(HASH_VAGAS)
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _hash_pool
+
+def encerrar_pool_senhas():
+    """Encerra o pool de processos (chamado no shutdown)"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=True, cancel_futures=True)
+            _hash_pool = None
+
+def _hash_worker(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_worker(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _executar_no_pool(funcao, *args):
+    """Executa `funcao` no pool de processos, respeitando o limite da fila"""
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return funcao(*args)
+    
+    if not _hash_vagas.acquire(blocking=False):
+        raise HashingPoolSaturado("Pool de hashing de senhas lotado")
+    try:
+        return _get_hash_pool().submit(funcao, *args).result()
+    finally:
+        _hash_vagas.release()
 
 def hash_password(password: str) -> str:
     """
     Hash de senha com argon2 (NÃO TEM LIMITE DE TAMANHO)
     """
-    return pwd_context.hash(password)
+    return _executar_no_pool(_hash_worker, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica se a senha plain corresponde ao hash
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _executar_no_pool(_verify_worker, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -55,6 +123,59 @@ def create_verification_token(email: str = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# ==================== DECODIFICAÇÃO (BACKENDS + CACHE) ====================
+
+def _decode_jose(token: str) -> dict:
+    """Backend padrão: python-jose"""
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+def _decode_pyjwt(token: str) -> dict:
+    """Backend opcional e mais rápido: PyJWT (pip install PyJWT)"""
+    import jwt as pyjwt
+    
+    try:
+        return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except pyjwt.PyJWTError as e:
+        raise JWTError(str(e))
+
+JWT_BACKENDS = {
+    "jose": _decode_jose,
+    "pyjwt": _decode_pyjwt,
+}
+
+if settings.JWT_BACKEND not in JWT_BACKENDS:
+    raise ValueError(f"JWT_BACKEND inválido: {settings.JWT_BACKEND}")
+
+_decode_backend = JWT_BACKENDS[settings.JWT_BACKEND]
+
+# Cache: sha256(token) -> payload já verificado (expira junto com o token)
+token_cache = TTLCache(
+    maxsize=settings.JWT_CACHE_SIZE,
+    ttl=settings.JWT_CACHE_TTL
+)
+
+def _decode_com_cache(token: str) -> dict:
+    """Decodifica o token, reaproveitando a verificação de tokens já vistos"""
+    chave = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(chave)
+    
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is None or exp > time.time():
+            return dict(payload)
+        token_cache.delete(chave)
+    
+    payload = _decode_backend(token)
+    
+    # Nunca guardar além do `exp` do próprio token
+    ttl = settings.JWT_CACHE_TTL
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    token_cache.set(chave, dict(payload), ttl=ttl)
+    
+    return payload
+
 def verify_token(token: str):
     """
     Verifica e decodifica um JWT token
@@ -64,7 +185,7 @@ def verify_token(token: str):
         # print(f"🔍 DEBUG - SECRET_KEY (primeiros 20 chars): {settings.SECRET_KEY[:20]}...")
         # print(f"🔍 DEBUG - ALGORITHM: {settings.ALGORITHM}")
         
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_com_cache(token)
         
         # print(f"🔍 DEBUG - Token decodificado com sucesso: {payload}")
         
@@ -1,8 +1,23 @@
 #Arquivo Principal da API
-from fastapi import FastAPI
+import anyio.to_thread
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.database import Database, PoolTimeoutError
+from app.core.async_database import AsyncDatabase
 from app.api.v1.router import api_router
+from app.api.deps import principal_cache, respostas_cache, verificar_token_metricas
+from app.core.security import token_cache, HashingPoolSaturado, encerrar_pool_senhas
+from app.services.ai_service import provider_configurado, abrir_clientes, fechar_clientes
+from app.services.avaliacao_worker import avaliacao_worker
+from app.services.analise_cache import analise_cache
+from app.services.ranking_service import janela_semanal, leaderboard_global, ranking_areas
+from app.services.visualizacoes_service import contador_visualizacoes
+from app.services.atividade_service import registro_atividades
+from app.services.retencao_service import retencao_atividades
+from app.services.ranking_mensal_service import ranking_mensal
+from app.services.busca_service import indice_problemas
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -20,8 +35,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Pool de conexões esgotado -> 503 em vez de 500
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    print(f"⚠️ Pool de conexões esgotado: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servidor ocupado, tente novamente em instantes"}
+    )
+
+# Pool de hashing de senhas lotado -> 503
+@app.exception_handler(HashingPoolSaturado)
+async def hashing_saturado_handler(request: Request, exc: HashingPoolSaturado):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servidor ocupado, tente novamente em instantes"},
+        headers={"Retry-After": "1"}
+    )
+
 # Incluir rotas da API v1
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -43,14 +77,100 @@ def health_check():
         "environment": settings.ENVIRONMENT
     }
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verificar_token_metricas)])
+def metrics():
+    """Métricas internas (pool de conexões, etc.); exige o header X-Metrics-Token"""
+    return {
+        "database_pool": Database.pool.stats(),
+        "database_pool_async": AsyncDatabase.stats(),
+        "principal_cache": principal_cache.stats(),
+        "cache_respostas": respostas_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "avaliacao_ai": avaliacao_worker.stats(),
+        "cache_analises_ai": analise_cache.stats(),
+        "ranking_global": leaderboard_global.stats(),
+        "ranking_semanal": janela_semanal.stats(),
+        "ranking_areas": ranking_areas.stats(),
+        "visualizacoes": contador_visualizacoes.stats(),
+        "log_atividades": registro_atividades.stats(),
+        "retencao_atividades": retencao_atividades.stats(),
+        "ranking_mensal": ranking_mensal.stats(),
+        "indice_busca": indice_problemas.stats()
+    }
+
 # Event handlers
 @app.on_event("startup")
 async def startup_event():
     """Executado quando a API inicia"""
     print(f"🚀 API iniciada no ambiente: {settings.ENVIRONMENT}")
     print(f"📚 Documentação disponível em: /docs")
+    
+    # Threadpool dos endpoints síncronos (o pool de hashing usa no máximo 1/4 dele)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    
+    try:
+        Database.pool.open()
+        print(f"🗄️ Pool MySQL pronto ({Database.pool.min_size}-{Database.pool.max_size} conexões)")
+    except Exception as e:
+        print(f"⚠️ Não foi possível pré-abrir o pool MySQL: {e}")
+    
+    try:
+        await AsyncDatabase.open()
+    except Exception as e:
+        print(f"⚠️ Não foi possível abrir o pool MySQL assíncrono: {e}")
+    
+    try:
+        await leaderboard_global.start()
+        print(f"🏆 Ranking global em memória pronto ({len(leaderboard_global)} usuários)")
+    except Exception as e:
+        print(f"⚠️ Não foi possível carregar o ranking em memória (usando o banco): {e}")
+    
+    try:
+        await janela_semanal.start()
+        print(f"📅 Ranking semanal em memória pronto ({len(janela_semanal)} usuários)")
+    except Exception as e:
+        print(f"⚠️ Não foi possível carregar o ranking semanal (usando o banco): {e}")
+    
+    try:
+        await ranking_areas.start()
+        print(f"🗺️ Ranking por área em memória pronto ({ranking_areas.stats()['areas']} áreas)")
+    except Exception as e:
+        print(f"⚠️ Não foi possível carregar o ranking por área (usando o banco): {e}")
+    
+    try:
+        await indice_problemas.start()
+        print(f"🔎 Índice de busca em memória pronto ({len(indice_problemas)} problemas)")
+    except Exception as e:
+        print(f"⚠️ Não foi possível construir o índice de busca (usando o banco): {e}")
+    
+    await contador_visualizacoes.start()
+    await registro_atividades.start()
+    await retencao_atividades.start()
+    await ranking_mensal.start()
+    
+    if not settings.AI_WORKER_ENABLED:
+        print("🤖 Fila de avaliação AI desativada (AI_WORKER_ENABLED=false)")
+    elif not provider_configurado():
+        print(f"⚠️ Provider AI '{settings.AI_PROVIDER}' sem configuração; soluções ficam 'em_analise'")
+    else:
+        abrir_clientes()
+        await avaliacao_worker.start()
+        print(f"🤖 Fila de avaliação AI iniciada ({settings.AI_PROVIDER}, {avaliacao_worker.concorrencia} simultâneas)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado quando a API desliga"""
+    await avaliacao_worker.stop()
+    await leaderboard_global.stop()
+    await janela_semanal.stop()
+    await ranking_areas.stop()
+    await indice_problemas.stop()
+    await contador_visualizacoes.stop()
+    await registro_atividades.stop()
+    await retencao_atividades.stop()
+    await ranking_mensal.stop()
+    await fechar_clientes()
+    await AsyncDatabase.close()
+    Database.pool.close()
+    encerrar_pool_senhas()
     print("🛑 API desligada")
\ No newline at end of file
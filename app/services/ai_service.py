@@ -1,235 +1,699 @@
-# #Integração com openAI/Claude
-# import json
-# from typing import Dict
-# from app.core.config import settings
-
-# async def analisar_solucao(problema: dict, solucao_texto: str) -> Dict:
-#     """
-#     Analisa a solução usando AI (OpenAI ou Claude)
-    
-#     Args:
-#         problema: Dicionário com dados do problema
-#         solucao_texto: Texto da solução submetida
-    
-#     Returns:
-#         Dict com pontuação, feedback e critérios atendidos
-#     """
-    
-#     if settings.AI_PROVIDER == "openai":
-#         return await analisar_com_openai(problema, solucao_texto)
-#     elif settings.AI_PROVIDER == "anthropic":
-#         return await analisar_com_claude(problema, solucao_texto)
-#     else:
-#         raise ValueError(f"AI Provider inválido: {settings.AI_PROVIDER}")
-
-# # ==================== OPENAI ====================
-
-# async def analisar_com_openai(problema: dict, solucao_texto: str) -> Dict:
-#     """Análise usando OpenAI GPT-4"""
-    
-#     from openai import AsyncOpenAI
-    
-#     client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    
-#     # Montar prompt
-#     prompt = f"""
-# Você é um avaliador especializado em analisar soluções de problemas práticos de empresas.
-
-# **PROBLEMA:**
-# Título: {problema['titulo']}
-# Descrição: {problema['descricao']}
-# Área: {problema['area']}
-# Nível: {problema['nivel_dificuldade']}
-# Objetivos: {problema.get('objetivos', 'Não especificado')}
-# Requisitos: {problema.get('requisitos', 'Não especificado')}
-
-# **SOLUÇÃO SUBMETIDA:**
-# {solucao_texto}
-
-# **TAREFA:**
-# Avalie esta solução em uma escala de 0 a 100, considerando:
-# 1. Compreensão do problema (0-25 pontos)
-# 2. Qualidade da solução proposta (0-25 pontos)
-# 3. Criatividade e inovação (0-20 pontos)
-# 4. Viabilidade de implementação (0-15 pontos)
-# 5. Clareza na explicação (0-15 pontos)
-
-# **FORMATO DE RESPOSTA (JSON):**
-# {{
-#     "pontuacao": 85,
-#     "feedback": "Análise detalhada da solução...",
-#     "pontos_fortes": ["ponto1", "ponto2"],
-#     "pontos_fracos": ["ponto1", "ponto2"],
-#     "sugestoes_melhoria": ["sugestao1", "sugestao2"],
-#     "criterios": {{
-#         "compreensao_problema": 22,
-#         "qualidade_solucao": 20,
-#         "criatividade": 18,
-#         "viabilidade": 13,
-#         "clareza": 12
-#     }}
-# }}
-
-# Retorne APENAS o JSON, sem texto adicional.
-# """
-    
-#     try:
-#         response = await client.chat.completions.create(
-#             model="gpt-4-turbo-preview",
-#             messages=[
-#                 {"role": "system", "content": "Você é um avaliador especializado e justo."},
-#                 {"role": "user", "content": prompt}
-#             ],
-#             temperature=0.3,
-#             response_format={"type": "json_object"}
-#         )
+#Integração com openAI/Claude
+import asyncio
+import hashlib
+import json
+import httpx
+import re
+from typing import AsyncIterator, Dict, List, Tuple
+from app.core.config import settings
+from app.services.analise_cache import analise_cache
+
+# Versão dos templates de prompt: altere sempre que um prompt mudar,
+# para que análises em cache feitas com o prompt antigo não sejam reaproveitadas
+PROMPT_VERSION = "2"
+
+# Modelo usado por cada provider
+MODELOS = {
+    "openai": "gpt-4-turbo-preview",
+    "anthropic": "claude-3-5-sonnet-20241022",
+    "fake": "fake"
+}
+
+# Limite de tokens de saída por resposta (só onde a API exige max_tokens)
+MAX_TOKENS_SAIDA = {
+    "anthropic": 8192
+}
+
+# Tokens de saída reservados para cada avaliação
+TOKENS_POR_AVALIACAO = 2000
+
+# Campos do problema que entram no prompt
+CAMPOS_PROMPT = ("titulo", "descricao", "area", "nivel_dificuldade", "objetivos", "requisitos")
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Remove espaços/quebras de linha redundantes
+    Usado só na chave do cache: o prompt recebe o texto original
+    """
+    return " ".join(texto.split())
+
+def chave_analise(problema: dict, solucao_texto: str) -> str:
+    """Chave do cache: hash de provider, modelo, versão do prompt, problema e solução"""
+    partes = [
+        settings.AI_PROVIDER,
+        MODELOS.get(settings.AI_PROVIDER),
+        PROMPT_VERSION,
+        [problema.get(campo) for campo in CAMPOS_PROMPT],
+        normalizar_texto(solucao_texto)
+    ]
+    conteudo = json.dumps(partes, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+async def analisar_solucao(problema: dict, solucao_texto: str, usar_cache: bool = True) -> Dict:
+    """
+    Analisa a solução usando AI (OpenAI ou Claude)
+    
+    Args:
+        problema: Dicionário com dados do problema
+        solucao_texto: Texto da solução submetida
+        usar_cache: False força uma nova chamada ao provider (o resultado
+            novo substitui o que estava em cache)
+    
+    Returns:
+        Dict com pontuação, feedback e critérios atendidos
+    """
+    
+    chave = chave_analise(problema, solucao_texto)
+    
+    if usar_cache:
+        analise = await analise_cache.get(chave)
+        if analise is not None:
+            return analise
+    
+    analise = await _analisar_no_provider(problema, solucao_texto)
+    await analise_cache.set(chave, analise, MODELOS.get(settings.AI_PROVIDER))
+    return analise
+
+async def _analisar_no_provider(problema: dict, solucao_texto: str) -> Dict:
+    if settings.AI_PROVIDER == "openai":
+        return await analisar_com_openai(problema, solucao_texto)
+    elif settings.AI_PROVIDER == "anthropic":
+        return await analisar_com_claude(problema, solucao_texto)
+    elif settings.AI_PROVIDER == "fake":
+        return await analisar_com_fake(problema, solucao_texto)
+    else:
+        raise ValueError(f"AI Provider inválido: {settings.AI_PROVIDER}")
+
+# ==================== CLIENTES (UM POR PROCESSO) ====================
+
+# Pool HTTP keep-alive compartilhado pelos clientes dos providers
+_http_client = None
+_clientes = {}
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                settings.AI_HTTP_TIMEOUT,
+                connect=settings.AI_HTTP_CONNECT_TIMEOUT
+            )
+        )
+    return _http_client
+
+def get_cliente(provider: str):
+    """Cliente do provider, criado uma única vez e reaproveitado"""
+    cliente = _clientes.get(provider)
+    if cliente is not None:
+        return cliente
+    
+    if provider == "openai":
+        from openai import AsyncOpenAI
+        cliente = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=_get_http_client(),
+            timeout=settings.AI_HTTP_TIMEOUT,
+            max_retries=settings.AI_HTTP_MAX_RETRIES
+        )
+    elif provider == "anthropic":
+        from anthropic import AsyncAnthropic
+        cliente = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            http_client=_get_http_client(),
+            timeout=settings.AI_HTTP_TIMEOUT,
+            max_retries=settings.AI_HTTP_MAX_RETRIES
+        )
+    else:
+        raise ValueError(f"AI Provider inválido: {provider}")
+    
+    _clientes[provider] = cliente
+    return cliente
+
+def abrir_clientes():
+    """Cria o cliente do provider configurado (chamado no startup)"""
+    if settings.AI_PROVIDER in ("openai", "anthropic") and provider_configurado():
+        get_cliente(settings.AI_PROVIDER)
+
+async def fechar_clientes():
+    """Fecha o pool HTTP compartilhado (chamado no shutdown)"""
+    global _http_client
+    _clientes.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def provider_configurado() -> bool:
+    """Indica se o provider escolhido tem o necessário para ser chamado"""
+    if settings.AI_PROVIDER == "openai":
+        return bool(settings.OPENAI_API_KEY)
+    if settings.AI_PROVIDER == "anthropic":
+        return bool(settings.ANTHROPIC_API_KEY)
+    return settings.AI_PROVIDER == "fake"
+
+# ==================== OPENAI ====================
+
+def montar_prompt(problema: dict, solucao_texto: str) -> str:
+    """Prompt de avaliação de uma solução (resposta em JSON)"""
+    return f"""
+Você é um avaliador especializado em analisar soluções de problemas práticos de empresas.
+
+**PROBLEMA:**
+Título: {problema['titulo']}
+Descrição: {problema['descricao']}
+Área: {problema['area']}
+Nível: {problema['nivel_dificuldade']}
+Objetivos: {problema.get('objetivos', 'Não especificado')}
+Requisitos: {problema.get('requisitos', 'Não especificado')}
+
+**SOLUÇÃO SUBMETIDA:**
+{solucao_texto}
+
+**TAREFA:**
+Avalie esta solução em uma escala de 0 a 100, considerando:
+1. Compreensão do problema (0-25 pontos)
+2. Qualidade da solução proposta (0-25 pontos)
+3. Criatividade e inovação (0-20 pontos)
+4. Viabilidade de implementação (0-15 pontos)
+5. Clareza na explicação (0-15 pontos)
+
+**FORMATO DE RESPOSTA (JSON):**
+{{
+    "pontuacao": 85,
+    "feedback": "Análise detalhada da solução...",
+    "pontos_fortes": ["ponto1", "ponto2"],
+    "pontos_fracos": ["ponto1", "ponto2"],
+    "sugestoes_melhoria": ["sugestao1", "sugestao2"],
+    "criterios": {{
+        "compreensao_problema": 22,
+        "qualidade_solucao": 20,
+        "criatividade": 18,
+        "viabilidade": 13,
+        "clareza": 12
+    }}
+}}
+
+Retorne APENAS o JSON, sem texto adicional.
+"""
+
+async def analisar_com_openai(problema: dict, solucao_texto: str) -> Dict:
+    """Análise usando OpenAI GPT-4"""
+    
+    client = get_cliente("openai")
+    
+    # Montar prompt
+    prompt = montar_prompt(problema, solucao_texto)
+    
+    try:
+        response = await client.chat.completions.create(
+            model=MODELOS["openai"],
+            messages=[
+                {"role": "system", "content": "Você é um avaliador especializado e justo."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
         
-#         resultado = json.loads(response.choices[0].message.content)
+        resultado = json.loads(response.choices[0].message.content)
         
-#         return {
-#             "pontuacao": resultado.get("pontuacao", 0),
-#             "feedback": resultado.get("feedback", ""),
-#             "detalhes": resultado
-#         }
+        return {
+            "pontuacao": resultado.get("pontuacao", 0),
+            "feedback": resultado.get("feedback", ""),
+            "detalhes": resultado
+        }
         
-#    except Exception as e:
-#         print(f"Erro ao analisar com OpenAI: {e}")
-#         raise
-
-# # ==================== ANTHROPIC CLAUDE ====================
-
-# async def analisar_com_claude(problema: dict, solucao_texto: str) -> Dict:
-#     """Análise usando Anthropic Claude"""
-    
-#     from anthropic import AsyncAnthropic
-    
-#     client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-    
-#     # Montar prompt
-#     prompt = f"""
-# Você é um avaliador especializado em analisar soluções de problemas práticos de empresas.
-
-# **PROBLEMA:**
-# Título: {problema['titulo']}
-# Descrição: {problema['descricao']}
-# Área: {problema['area']}
-# Nível: {problema['nivel_dificuldade']}
-# Objetivos: {problema.get('objetivos', 'Não especificado')}
-# Requisitos: {problema.get('requisitos', 'Não especificado')}
-
-# **SOLUÇÃO SUBMETIDA:**
-# {solucao_texto}
-
-# **TAREFA:**
-# Avalie esta solução em uma escala de 0 a 100, considerando:
-# 1. Compreensão do problema (0-25 pontos)
-# 2. Qualidade da solução proposta (0-25 pontos)
-# 3. Criatividade e inovação (0-20 pontos)
-# 4. Viabilidade de implementação (0-15 pontos)
-# 5. Clareza na explicação (0-15 pontos)
-
-# Retorne um JSON com a seguinte estrutura:
-# {{
-#     "pontuacao": 85,
-#     "feedback": "Análise detalhada da solução...",
-#     "pontos_fortes": ["ponto1", "ponto2"],
-#     "pontos_fracos": ["ponto1", "ponto2"],
-#     "sugestoes_melhoria": ["sugestao1", "sugestao2"],
-#     "criterios": {{
-#         "compreensao_problema": 22,
-#         "qualidade_solucao": 20,
-#         "criatividade": 18,
-#         "viabilidade": 13,
-#         "clareza": 12
-#     }}
-# }}
-# """
-    
-#     try:
-#         response = await client.messages.create(
-#             model="claude-3-5-sonnet-20241022",
-#             max_tokens=2000,
-#             temperature=0.3,
-#             messages=[
-#                 {"role": "user", "content": prompt}
-#             ]
-#         )
+    except Exception as e:
+        print(f"Erro ao analisar com OpenAI: {e}")
+        raise
+
+# ==================== ANTHROPIC CLAUDE ====================
+
+async def analisar_com_claude(problema: dict, solucao_texto: str) -> Dict:
+    """Análise usando Anthropic Claude"""
+    
+    client = get_cliente("anthropic")
+    
+    # Montar prompt (o mesmo do stream: os dois gravam na mesma chave de cache)
+    prompt = montar_prompt(problema, solucao_texto)
+    
+    try:
+        response = await client.messages.create(
+            model=MODELOS["anthropic"],
+            max_tokens=2000,
+            temperature=0.3,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
         
-#         # Extrair JSON do texto da resposta
-#         content = response.content[0].text
+        # Extrair JSON do texto da resposta
+        content = response.content[0].text
         
-#         # Tentar encontrar JSON no conteúdo
-#         import re
-#         json_match = re.search(r'\{.*\}', content, re.DOTALL)
+        # Tentar encontrar JSON no conteúdo
+        import re
+        json_match = re.search(r'\{.*\}', content, re.DOTALL)
         
-#         if json_match:
-#             resultado = json.loads(json_match.group())
-#         else:
-#             # Fallback se não encontrar JSON válido
-#             resultado = {
-#                 "pontuacao": 70,
-#                 "feedback": content,
-#                 "pontos_fortes": ["Solução apresentada"],
-#                 "pontos_fracos": ["Necessita mais detalhes"],
-#                 "sugestoes_melhoria": ["Expandir explicação"],
-#                 "criterios": {
-#                     "compreensao_problema": 18,
-#                     "qualidade_solucao": 17,
-#                     "criatividade": 14,
-#                     "viabilidade": 11,
-#                     "clareza": 10
-#                 }
-#             }
+        if json_match:
+            resultado = json.loads(json_match.group())
+        else:
+            # Fallback se não encontrar JSON válido
+            resultado = {
+                "pontuacao": 70,
+                "feedback": content,
+                "pontos_fortes": ["Solução apresentada"],
+                "pontos_fracos": ["Necessita mais detalhes"],
+                "sugestoes_melhoria": ["Expandir explicação"],
+                "criterios": {
+                    "compreensao_problema": 18,
+                    "qualidade_solucao": 17,
+                    "criatividade": 14,
+                    "viabilidade": 11,
+                    "clareza": 10
+                }
+            }
         
-#         return {
-#             "pontuacao": resultado.get("pontuacao", 0),
-#             "feedback": resultado.get("feedback", ""),
-#             "detalhes": resultado
-#         }
+        return {
+            "pontuacao": resultado.get("pontuacao", 0),
+            "feedback": resultado.get("feedback", ""),
+            "detalhes": resultado
+        }
         
-#     except Exception as e:
-#         print(f"Erro ao analisar com Claude: {e}")
-#         raise
-
-# # ==================== FUNÇÃO AUXILIAR ====================
-
-# def gerar_feedback_resumido(analise: dict) -> str:
-#     """
-#     Gera um feedback resumido e amigável baseado na análise
-#     """
-#     pontuacao = analise.get('pontuacao', 0)
-    
-#     if pontuacao >= 90:
-#         nivel = "Excepcional! 🌟"
-#     elif pontuacao >= 80:
-#         nivel = "Excelente! 🎯"
-#     elif pontuacao >= 70:
-#         nivel = "Muito Bom! 👍"
-#     elif pontuacao >= 60:
-#         nivel = "Bom! ✓"
-#     else:
-#         nivel = "Precisa Melhorar 📚"
-    
-#     feedback = f"**Avaliação: {nivel}**\n\n"
-#     feedback += f"**Pontuação: {pontuacao}/100**\n\n"
-    
-#     detalhes = analise.get('detalhes', {})
-    
-#     if detalhes.get('pontos_fortes'):
-#         feedback += "**Pontos Fortes:**\n"
-#         for ponto in detalhes['pontos_fortes'][:3]:
-#             feedback += f"✓ {ponto}\n"
-#         feedback += "\n"
-    
-#     if detalhes.get('pontos_fracos'):
-#         feedback += "**Pontos a Melhorar:**\n"
-#         for ponto in detalhes['pontos_fracos'][:3]:
-#             feedback += f"• {ponto}\n"
-#         feedback += "\n"
-    
-#     if detalhes.get('sugestoes_melhoria'):
-#         feedback += "**Sugestões:**\n"
-#         for sugestao in detalhes['sugestoes_melhoria'][:3]:
-#             feedback += f"→ {sugestao}\n"
-    
-#     return feedback
\ No newline at end of file
+    except Exception as e:
+        print(f"Erro ao analisar com Claude: {e}")
+        raise
+
+# ==================== FAKE (DESENVOLVIMENTO/TESTES) ====================
+
+async def analisar_com_fake(problema: dict, solucao_texto: str) -> Dict:
+    """
+    Provider local, sem chamadas externas
+    A pontuação é determinística (derivada do texto), para testes e benchmarks.
+    """
+    if settings.AI_FAKE_LATENCY > 0:
+        await asyncio.sleep(settings.AI_FAKE_LATENCY)
+    
+    return _analise_de_resultado(_resultado_fake(problema, solucao_texto))
+
+def _resultado_fake(problema: dict, solucao_texto: str) -> Dict:
+    digest = hashlib.sha256(solucao_texto.encode("utf-8")).digest()
+    pontuacao = 40 + digest[0] % 56  # 40 a 95
+    
+    return {
+        "pontuacao": pontuacao,
+        "feedback": f"Avaliação automática (fake) da solução para '{problema['titulo']}'.",
+        "pontos_fortes": ["Solução apresentada"],
+        "pontos_fracos": [],
+        "sugestoes_melhoria": [],
+        "criterios": {
+            "compreensao_problema": round(pontuacao * 0.25),
+            "qualidade_solucao": round(pontuacao * 0.25),
+            "criatividade": round(pontuacao * 0.20),
+            "viabilidade": round(pontuacao * 0.15),
+            "clareza": round(pontuacao * 0.15)
+        }
+    }
+
+def _analise_de_resultado(resultado: dict) -> Dict:
+    """Formato devolvido por analisar_solucao a partir do JSON do provider"""
+    return {
+        "pontuacao": resultado.get("pontuacao", 0),
+        "feedback": resultado.get("feedback", ""),
+        "detalhes": resultado
+    }
+
+# ==================== AVALIAÇÃO EM LOTE ====================
+
+async def analisar_lote(problema: dict, solucoes: Dict[int, str], usar_cache: bool = True) -> Dict:
+    """
+    Analisa várias soluções do mesmo problema com menos chamadas ao provider
+    
+    As soluções sem análise em cache são agrupadas (AI_BATCH_SIZE por prompt)
+    num único prompt que traz o contexto do problema uma só vez. Soluções
+    cujo resultado não puder ser extraído da resposta são analisadas
+    individualmente (analisar_solucao).
+    
+    Args:
+        problema: Dicionário com dados do problema
+        solucoes: {solucao_id: texto da solução}
+    
+    Returns:
+        Dict com "resultados" {id: análise}, "falhas" {id: erro} e contadores
+        ("chamadas", "cache_hits", "fallbacks")
+    """
+    
+    resultados = {}
+    falhas = {}
+    chamadas = cache_hits = fallbacks = 0
+    
+    textos = dict(solucoes)
+    chaves = {sid: chave_analise(problema, texto) for sid, texto in textos.items()}
+    
+    pendentes = []
+    for sid in textos:
+        analise = await analise_cache.get(chaves[sid]) if usar_cache else None
+        if analise is not None:
+            resultados[sid] = analise
+            cache_hits += 1
+        else:
+            pendentes.append(sid)
+    
+    tamanho = _tamanho_lote()
+    for inicio in range(0, len(pendentes), tamanho):
+        grupo = pendentes[inicio:inicio + tamanho]
+        
+        try:
+            chamadas += 1
+            extraidos = await _analisar_lote_no_provider(
+                problema, {sid: textos[sid] for sid in grupo}
+            )
+        except Exception as e:
+            print(f"Erro na análise em lote do problema {problema.get('id')}: {e}")
+            extraidos = {}
+        
+        for sid in grupo:
+            resultado = extraidos.get(sid)
+            if resultado is not None:
+                analise = _analise_de_resultado(resultado)
+                await analise_cache.set(chaves[sid], analise, MODELOS.get(settings.AI_PROVIDER))
+                resultados[sid] = analise
+                continue
+            
+            # Não veio (ou veio inválido) na resposta do lote: chamada individual
+            fallbacks += 1
+            chamadas += 1
+            try:
+                resultados[sid] = await analisar_solucao(problema, textos[sid], usar_cache=False)
+            except Exception as e:
+                falhas[sid] = str(e)
+    
+    return {
+        "resultados": resultados,
+        "falhas": falhas,
+        "chamadas": chamadas,
+        "cache_hits": cache_hits,
+        "fallbacks": fallbacks
+    }
+
+def _tamanho_lote() -> int:
+    """AI_BATCH_SIZE, limitado ao que cabe no máximo de tokens de saída do modelo"""
+    tamanho = max(settings.AI_BATCH_SIZE, 1)
+    limite = MAX_TOKENS_SAIDA.get(settings.AI_PROVIDER)
+    if limite:
+        tamanho = min(tamanho, max(limite // TOKENS_POR_AVALIACAO, 1))
+    return tamanho
+
+async def _analisar_lote_no_provider(problema: dict, solucoes: Dict[int, str]) -> Dict[int, dict]:
+    """Uma chamada ao provider para o grupo; devolve {id: resultado} só dos válidos"""
+    
+    if settings.AI_PROVIDER == "fake":
+        if settings.AI_FAKE_LATENCY > 0:
+            await asyncio.sleep(settings.AI_FAKE_LATENCY)
+        return {sid: _resultado_fake(problema, texto) for sid, texto in solucoes.items()}
+    
+    blocos = "\n\n".join(
+        f"### SOLUÇÃO {sid}\n{texto}" for sid, texto in solucoes.items()
+    )
+    
+    prompt = f"""
+Você é um avaliador especializado em analisar soluções de problemas práticos de empresas.
+
+**PROBLEMA:**
+Título: {problema['titulo']}
+Descrição: {problema['descricao']}
+Área: {problema['area']}
+Nível: {problema['nivel_dificuldade']}
+Objetivos: {problema.get('objetivos', 'Não especificado')}
+Requisitos: {problema.get('requisitos', 'Não especificado')}
+
+**SOLUÇÕES SUBMETIDAS ({len(solucoes)}):**
+{blocos}
+
+**TAREFA:**
+Avalie CADA solução de forma independente, em uma escala de 0 a 100, considerando:
+1. Compreensão do problema (0-25 pontos)
+2. Qualidade da solução proposta (0-25 pontos)
+3. Criatividade e inovação (0-20 pontos)
+4. Viabilidade de implementação (0-15 pontos)
+5. Clareza na explicação (0-15 pontos)
+
+**FORMATO DE RESPOSTA (JSON):**
+{{
+    "avaliacoes": [
+        {{
+            "solucao_id": 123,
+            "pontuacao": 85,
+            "feedback": "Análise detalhada da solução...",
+            "pontos_fortes": ["ponto1", "ponto2"],
+            "pontos_fracos": ["ponto1", "ponto2"],
+            "sugestoes_melhoria": ["sugestao1", "sugestao2"],
+            "criterios": {{
+                "compreensao_problema": 22,
+                "qualidade_solucao": 20,
+                "criatividade": 18,
+                "viabilidade": 13,
+                "clareza": 12
+            }}
+        }}
+    ]
+}}
+
+Inclua exatamente uma avaliação por solução, usando o número da solução em "solucao_id".
+Retorne APENAS o JSON, sem texto adicional.
+"""
+    
+    if settings.AI_PROVIDER == "openai":
+        response = await get_cliente("openai").chat.completions.create(
+            model=MODELOS["openai"],
+            messages=[
+                {"role": "system", "content": "Você é um avaliador especializado e justo."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content
+    elif settings.AI_PROVIDER == "anthropic":
+        response = await get_cliente("anthropic").messages.create(
+            model=MODELOS["anthropic"],
+            max_tokens=min(MAX_TOKENS_SAIDA["anthropic"], TOKENS_POR_AVALIACAO * len(solucoes)),
+            temperature=0.3,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        content = response.content[0].text
+    else:
+        raise ValueError(f"AI Provider inválido: {settings.AI_PROVIDER}")
+    
+    return _extrair_avaliacoes(content, set(solucoes))
+
+def _extrair_avaliacoes(content: str, ids: set) -> Dict[int, dict]:
+    """Extrai as avaliações por solução da resposta do lote, descartando as inválidas"""
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if not json_match:
+        return {}
+    
+    try:
+        dados = json.loads(json_match.group())
+    except ValueError:
+        return {}
+    
+    avaliacoes = dados.get("avaliacoes") if isinstance(dados, dict) else None
+    if not isinstance(avaliacoes, list):
+        return {}
+    
+    extraidos = {}
+    for item in avaliacoes:
+        if not isinstance(item, dict):
+            continue
+        try:
+            sid = int(item.get("solucao_id"))
+            pontuacao = float(item.get("pontuacao"))
+        except (TypeError, ValueError):
+            continue
+        if sid in ids and 0 <= pontuacao <= 100:
+            item["pontuacao"] = int(pontuacao) if pontuacao.is_integer() else pontuacao
+            extraidos[sid] = item
+    return extraidos
+
+# ==================== STREAMING ====================
+
+async def analisar_solucao_stream(problema: dict, solucao_texto: str) -> AsyncIterator[str]:
+    """
+    Analisa a solução devolvendo o texto (JSON) da resposta aos pedaços,
+    à medida que o provider gera. Em cache, a análise vem de uma só vez.
+    Use `ParserAnaliseParcial` para extrair feedback/critérios parciais e
+    `finalizar_analise_stream` para obter (e guardar) a análise final.
+    """
+    analise = await analise_cache.get(chave_analise(problema, solucao_texto))
+    if analise is not None:
+        yield json.dumps(analise.get("detalhes", analise), ensure_ascii=False)
+        return
+    
+    if settings.AI_PROVIDER == "fake":
+        texto = json.dumps(_resultado_fake(problema, solucao_texto), ensure_ascii=False)
+        pedacos = [texto[i:i + 16] for i in range(0, len(texto), 16)]
+        for pedaco in pedacos:
+            if settings.AI_FAKE_LATENCY > 0:
+                await asyncio.sleep(settings.AI_FAKE_LATENCY / len(pedacos))
+            yield pedaco
+        return
+    
+    prompt = montar_prompt(problema, solucao_texto)
+    
+    if settings.AI_PROVIDER == "openai":
+        stream = await get_cliente("openai").chat.completions.create(
+            model=MODELOS["openai"],
+            messages=[
+                {"role": "system", "content": "Você é um avaliador especializado e justo."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    elif settings.AI_PROVIDER == "anthropic":
+        stream = await get_cliente("anthropic").messages.create(
+            model=MODELOS["anthropic"],
+            max_tokens=2000,
+            temperature=0.3,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        async for evento in stream:
+            if evento.type == "content_block_delta" and getattr(evento.delta, "text", None):
+                yield evento.delta.text
+    else:
+        raise ValueError(f"AI Provider inválido: {settings.AI_PROVIDER}")
+
+async def finalizar_analise_stream(problema: dict, solucao_texto: str, texto: str) -> Dict:
+    """Converte o texto completo do stream na análise final e guarda no cache"""
+    json_match = re.search(r'\{.*\}', texto, re.DOTALL)
+    if not json_match:
+        raise ValueError("Resposta do provider sem JSON")
+    
+    resultado = json.loads(json_match.group())
+    analise = _analise_de_resultado(resultado)
+    
+    await analise_cache.set(
+        chave_analise(problema, solucao_texto), analise, MODELOS.get(settings.AI_PROVIDER)
+    )
+    return analise
+
+class ParserAnaliseParcial:
+    """
+    Extrai, de um JSON ainda incompleto, o que já dá para mostrar:
+    o texto novo do "feedback" e os itens de "criterios" já fechados
+    """
+    
+    _INICIO_FEEDBACK = re.compile(r'"feedback"\s*:\s*"')
+    _INICIO_CRITERIOS = re.compile(r'"criterios"\s*:\s*\{')
+    _CRITERIO = re.compile(r'"(\w+)"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}]')
+    
+    def __init__(self):
+        self.texto = ""
+        self._feedback_enviado = ""
+        self._criterios_enviados = set()
+    
+    def alimentar(self, pedaco: str) -> Tuple[str, List[Tuple[str, float]]]:
+        """Recebe mais um pedaço; devolve (novo texto do feedback, novos critérios)"""
+        self.texto += pedaco
+        return self._novo_feedback(), self._novos_criterios()
+    
+    def _novo_feedback(self) -> str:
+        inicio = self._INICIO_FEEDBACK.search(self.texto)
+        if not inicio:
+            return ""
+        
+        # Percorre a string JSON até a aspa de fechamento (ou o fim do buffer)
+        bruto = self.texto[inicio.end():]
+        i = 0
+        while i < len(bruto):
+            if bruto[i] == "\\":
+                if i + 1 >= len(bruto) or (bruto[i + 1] == "u" and i + 6 > len(bruto)):
+                    break  # escape ainda incompleto
+                i += 6 if bruto[i + 1] == "u" else 2
+                continue
+            if bruto[i] == '"':
+                break
+            i += 1
+        
+        try:
+            feedback = json.loads('"' + bruto[:i] + '"')
+        except ValueError:
+            return ""
+        
+        novo = feedback[len(self._feedback_enviado):]
+        self._feedback_enviado = feedback
+        return novo
+    
+    def _novos_criterios(self) -> List[Tuple[str, float]]:
+        inicio = self._INICIO_CRITERIOS.search(self.texto)
+        if not inicio:
+            return []
+        
+        # "criterios" é um objeto plano: vai até o primeiro "}"
+        fim = self.texto.find("}", inicio.end())
+        trecho = self.texto[inicio.end():] if fim == -1 else self.texto[inicio.end():fim + 1]
+        
+        novos = []
+        for match in self._CRITERIO.finditer(trecho):
+            nome = match.group(1)
+            if nome not in self._criterios_enviados:
+                self._criterios_enviados.add(nome)
+                valor = float(match.group(2))
+                novos.append((nome, int(valor) if valor.is_integer() else valor))
+        return novos
+
+# ==================== FUNÇÃO AUXILIAR ====================
+
+def gerar_feedback_resumido(analise: dict) -> str:
+    """
+    Gera um feedback resumido e amigável baseado na análise
+    """
+    pontuacao = analise.get('pontuacao', 0)
+    
+    if pontuacao >= 90:
+        nivel = "Excepcional! 🌟"
+    elif pontuacao >= 80:
+        nivel = "Excelente! 🎯"
+    elif pontuacao >= 70:
+        nivel = "Muito Bom! 👍"
+    elif pontuacao >= 60:
+        nivel = "Bom! ✓"
+    else:
+        nivel = "Precisa Melhorar 📚"
+    
+    feedback = f"**Avaliação: {nivel}**\n\n"
+    feedback += f"**Pontuação: {pontuacao}/100**\n\n"
+    
+    detalhes = analise.get('detalhes', {})
+    
+    if detalhes.get('pontos_fortes'):
+        feedback += "**Pontos Fortes:**\n"
+        for ponto in detalhes['pontos_fortes'][:3]:
+            feedback += f"✓ {ponto}\n"
+        feedback += "\n"
+    
+    if detalhes.get('pontos_fracos'):
+        feedback += "**Pontos a Melhorar:**\n"
+        for ponto in detalhes['pontos_fracos'][:3]:
+            feedback += f"• {ponto}\n"
+        feedback += "\n"
+    
+    if detalhes.get('sugestoes_melhoria'):
+        feedback += "**Sugestões:**\n"
+        for sugestao in detalhes['sugestoes_melhoria'][:3]:
+            feedback += f"→ {sugestao}\n"
+    
+    return feedback
\ No newline at end of file
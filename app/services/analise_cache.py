@@ -0,0 +1,181 @@
+#Cache persistente das análises AI (endereçado pelo conteúdo)
+import json
+import time
+from collections import Counter
+from typing import Optional
+from app.core.config import settings
+from app.core.async_database import AsyncDatabase
+from app.core.cache import TTLCache
+
+class AnaliseCache:
+    """
+    Cache das análises AI, indexado pelo hash do que foi enviado ao provider
+    (ver `chave_analise` em ai_service)
+
+    - Memória (TTLCache) na frente da tabela `cache_analises_ai`
+    - Entradas com mais de `max_idade_dias` são ignoradas e removidas
+    - A tabela é podada para `max_entradas` (remove as usadas há mais tempo)
+    - Acertos na memória são acumulados e gravados em lote (`hits`/`ultimo_uso`),
+      para a poda não remover justamente as análises mais usadas
+    - Falhas do banco nunca impedem a análise: o cache é só um atalho
+    """
+
+    # Intervalo mínimo entre duas podas da tabela (segundos)
+    INTERVALO_PODA = 3600
+    # Intervalo mínimo entre duas gravações dos usos em memória (segundos)
+    INTERVALO_USOS = 60
+
+    def __init__(self, enabled: bool, max_idade_dias: int, max_entradas: int, memoria: int):
+        self.enabled = enabled
+        self.max_idade_dias = max_idade_dias
+        self.max_entradas = max_entradas
+        self._memoria = TTLCache(maxsize=memoria, ttl=3600)
+        self._ultima_poda = 0.0
+        self._usos = Counter()  # chave -> acertos na memória ainda não gravados
+        self._ultima_gravacao_usos = time.monotonic()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.erros = 0
+        self.removidas = 0
+
+    async def get(self, chave: str) -> Optional[dict]:
+        """Retorna a análise em cache (ou None)"""
+        if not self.enabled:
+            return None
+
+        analise = self._memoria.get(chave)
+        if analise is not None:
+            self.hits += 1
+            self._usos[chave] += 1
+            if time.monotonic() - self._ultima_gravacao_usos >= self.INTERVALO_USOS:
+                await self.gravar_usos()
+            return analise
+
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute("""
+                    SELECT analise FROM cache_analises_ai
+                    WHERE chave = %s AND created_at >= NOW() - INTERVAL %s DAY
+                """, (chave, self.max_idade_dias))
+                row = await cursor.fetchone()
+                if row:
+                    await cursor.execute("""
+                        UPDATE cache_analises_ai
+                        SET hits = hits + 1, ultimo_uso = NOW()
+                        WHERE chave = %s
+                    """, (chave,))
+        except Exception as e:
+            self.erros += 1
+            print(f"⚠️ Erro ao consultar cache de análises: {e}")
+            row = None
+
+        if not row:
+            self.misses += 1
+            return None
+
+        analise = json.loads(row['analise']) if isinstance(row['analise'], str) else row['analise']
+        self._memoria.set(chave, analise)
+        self.hits += 1
+        return analise
+
+    async def set(self, chave: str, analise: dict, modelo: Optional[str] = None):
+        """Guarda (ou substitui) uma análise"""
+        if not self.enabled:
+            return
+
+        self._memoria.set(chave, analise)
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute("""
+                    INSERT INTO cache_analises_ai (chave, provider, modelo, analise)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        analise = VALUES(analise),
+                        created_at = NOW(),
+                        ultimo_uso = NOW()
+                """, (
+                    chave,
+                    settings.AI_PROVIDER,
+                    modelo,
+                    json.dumps(analise)
+                ))
+        except Exception as e:
+            self.erros += 1
+            print(f"⚠️ Erro ao gravar cache de análises: {e}")
+            return
+
+        if time.monotonic() - self._ultima_poda >= self.INTERVALO_PODA:
+            await self.podar()
+
+    async def gravar_usos(self):
+        """Grava, num único UPDATE, os acertos na memória acumulados desde a última vez"""
+        self._ultima_gravacao_usos = time.monotonic()
+        usos, self._usos = self._usos, Counter()
+        if not usos:
+            return
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute(
+                    "UPDATE cache_analises_ai SET hits = hits + CASE chave "
+                    + " ".join(["WHEN %s THEN %s"] * len(usos))
+                    + " ELSE 0 END, ultimo_uso = NOW() WHERE chave IN ("
+                    + ", ".join(["%s"] * len(usos)) + ")",
+                    [valor for item in usos.items() for valor in item] + list(usos)
+                )
+        except Exception as e:
+            self.erros += 1
+            print(f"⚠️ Erro ao gravar usos do cache de análises: {e}")
+
+    async def podar(self):
+        """Remove entradas antigas e o excedente acima de `max_entradas`"""
+        self._ultima_poda = time.monotonic()
+        # A ordem por `ultimo_uso` precisa contar os acertos na memória
+        await self.gravar_usos()
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute(
+                    "DELETE FROM cache_analises_ai WHERE created_at < NOW() - INTERVAL %s DAY",
+                    (self.max_idade_dias,)
+                )
+                removidas = cursor.rowcount
+
+                await cursor.execute("""
+                    SELECT ultimo_uso FROM cache_analises_ai
+                    ORDER BY ultimo_uso DESC
+                    LIMIT 1 OFFSET %s
+                """, (self.max_entradas,))
+                corte = await cursor.fetchone()
+                if corte:
+                    await cursor.execute(
+                        "DELETE FROM cache_analises_ai WHERE ultimo_uso <= %s",
+                        (corte['ultimo_uso'],)
+                    )
+                    removidas += cursor.rowcount
+            self.removidas += removidas
+        except Exception as e:
+            self.erros += 1
+            print(f"⚠️ Erro ao podar cache de análises: {e}")
+
+    def stats(self) -> dict:
+        """Métricas do cache de análises"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0,
+            "erros": self.erros,
+            "removidas": self.removidas,
+            "usos_pendentes": len(self._usos),
+            "memoria": self._memoria.stats()
+        }
+
+# Instância global
+analise_cache = AnaliseCache(
+    enabled=settings.AI_CACHE_ENABLED,
+    max_idade_dias=settings.AI_CACHE_MAX_AGE_DAYS,
+    max_entradas=settings.AI_CACHE_MAX_ENTRIES,
+    memoria=settings.AI_CACHE_MEMORY_SIZE
+)
@@ -0,0 +1,248 @@
+#Log de atividades gravado em lote (fora da transação da requisição)
+import asyncio
+import json
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Optional, Tuple
+import aiomysql
+from app.core.config import settings
+from app.core.async_database import AsyncDatabase
+
+COLUNAS = "(user_id, empresa_id, tipo_usuario, acao, detalhes, ip_address, user_agent, created_at)"
+PLACEHOLDERS = "(%s, %s, %s, %s, %s, %s, %s, %s)"
+
+class RegistroAtividades:
+    """
+    Fila limitada de registros para `logs_atividade`
+
+    - `registrar()` só coloca o registro na fila (nenhum acesso ao banco)
+    - Uma tarefa em background grava a fila com INSERTs de várias linhas,
+      a cada `intervalo` segundos ou assim que um lote enche
+    - Com a fila cheia, os registros novos são descartados (e contados):
+      o log nunca atrasa nem derruba uma requisição
+    - Se o banco falhar, o lote volta para a fila; uma linha inválida
+      (ex.: FK) é descartada sozinha, sem levar o lote junto
+    - No shutdown a fila é gravada por completo
+    - Na mesma transação, soma os dias de atividade de cada usuário em
+      `atividade_diaria` (rollup lido pelos rankings e dashboards)
+    """
+
+    def __init__(self, capacidade: int, tamanho_lote: int, intervalo: float):
+        self.capacidade = max(capacidade, 1)
+        self.tamanho_lote = max(tamanho_lote, 1)
+        self.intervalo = intervalo
+        self._fila = deque()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._acordar = None
+        self._sinalizado = False
+        self._tarefa = None
+
+        # Métricas
+        self._total_enfileirados = 0
+        self._total_gravados = 0
+        self._total_descartados_fila_cheia = 0
+        self._total_descartados_invalidos = 0
+        self._total_descartados_erro = 0
+        self._total_lotes = 0
+        self._total_erros = 0
+        self._maior_fila = 0
+        self._ultimo_flush = None
+
+    def registrar(
+        self,
+        acao: str,
+        user_id: Optional[int] = None,
+        empresa_id: Optional[int] = None,
+        tipo_usuario: Optional[str] = None,
+        detalhes: Optional[dict] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> bool:
+        """
+        Enfileira um registro de atividade (seguro para qualquer thread)
+        Retorna False se a fila estava cheia e o registro foi descartado
+        """
+        registro = (
+            user_id,
+            empresa_id,
+            tipo_usuario,
+            acao,
+            json.dumps(detalhes) if detalhes is not None else None,
+            ip_address,
+            user_agent,
+            datetime.now()
+        )
+
+        with self._lock:
+            if len(self._fila) >= self.capacidade:
+                self._total_descartados_fila_cheia += 1
+                return False
+            self._fila.append(registro)
+            self._total_enfileirados += 1
+            self._maior_fila = max(self._maior_fila, len(self._fila))
+            acordar = len(self._fila) >= self.tamanho_lote and not self._sinalizado
+            if acordar:
+                self._sinalizado = True
+
+        if acordar and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._acordar.set)
+        return True
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Inicia a tarefa de gravação (chamado no startup)"""
+        if self._tarefa is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._acordar = asyncio.Event()
+        self._tarefa = asyncio.create_task(self._loop_gravacao())
+
+    async def stop(self):
+        """Para a tarefa e grava tudo o que ainda está na fila (shutdown)"""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+        self._loop = None
+
+        if not await self.flush():
+            with self._lock:
+                perdidos = len(self._fila)
+                self._fila.clear()
+                self._total_descartados_erro += perdidos
+            print(f"⚠️ {perdidos} registro(s) de atividade perdidos no shutdown")
+
+    async def _loop_gravacao(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._acordar.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._acordar.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # A tarefa não pode morrer: sem ela a fila só enche
+                print(f"⚠️ Erro inesperado ao gravar log de atividades: {e}")
+
+    # ---------- gravação ----------
+
+    async def flush(self) -> bool:
+        """Grava a fila em lotes. Retorna False se parou por erro do banco."""
+        while True:
+            with self._lock:
+                self._sinalizado = False
+                quantidade = min(self.tamanho_lote, len(self._fila))
+                lote = [self._fila.popleft() for _ in range(quantidade)]
+            if not lote:
+                return True
+            if not await self._gravar(lote):
+                return False
+
+    async def _gravar(self, lote: list) -> bool:
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute(
+                    f"INSERT INTO logs_atividade {COLUNAS} VALUES "
+                    + ", ".join([PLACEHOLDERS] * len(lote)),
+                    [valor for registro in lote for valor in registro]
+                )
+                await self._somar_rollup(cursor, lote)
+            gravados, ok = len(lote), True
+        except (aiomysql.IntegrityError, aiomysql.DataError):
+            # Alguma linha é inválida: grava uma a uma e descarta só as ruins
+            gravados, ok = await self._gravar_individualmente(lote)
+        except Exception as e:
+            self._devolver(lote)
+            print(f"⚠️ Erro ao gravar log de atividades: {e}")
+            return False
+
+        with self._lock:
+            self._total_gravados += gravados
+            self._total_lotes += 1
+            self._ultimo_flush = time.time()
+        return ok
+
+    async def _gravar_individualmente(self, lote: list) -> Tuple[int, bool]:
+        """
+        Grava linha a linha, descartando só as inválidas
+        Em outro erro do banco, devolve o que faltou para a fila e para
+        (retorna quantas foram gravadas e se terminou o lote)
+        """
+        gravados = 0
+        for indice, registro in enumerate(lote):
+            try:
+                async with AsyncDatabase.get_cursor() as cursor:
+                    await cursor.execute(
+                        f"INSERT INTO logs_atividade {COLUNAS} VALUES {PLACEHOLDERS}",
+                        registro
+                    )
+                    await self._somar_rollup(cursor, [registro])
+                gravados += 1
+            except (aiomysql.IntegrityError, aiomysql.DataError) as e:
+                with self._lock:
+                    self._total_descartados_invalidos += 1
+                print(f"⚠️ Registro de atividade inválido descartado ({registro[3]}): {e}")
+            except Exception as e:
+                self._devolver(lote[indice:])
+                print(f"⚠️ Erro ao gravar log de atividades: {e}")
+                return gravados, False
+        return gravados, True
+
+    @staticmethod
+    async def _somar_rollup(cursor, lote: list):
+        """Soma as atividades do lote em `atividade_diaria` (por usuário e dia)"""
+        por_dia = Counter(
+            (user_id, created_at.date())
+            for user_id, _, tipo_usuario, _, _, _, _, created_at in lote
+            if tipo_usuario == 'user' and user_id is not None
+        )
+        if not por_dia:
+            return
+        await cursor.execute(
+            "INSERT INTO atividade_diaria (user_id, data, atividades) VALUES "
+            + ", ".join(["(%s, %s, %s)"] * len(por_dia))
+            + " ON DUPLICATE KEY UPDATE atividades = atividades + VALUES(atividades)",
+            [valor for (user_id, data), total in por_dia.items() for valor in (user_id, data, total)]
+        )
+
+    def _devolver(self, lote: list):
+        """Devolve um lote que falhou para o início da fila (sem passar da capacidade)"""
+        with self._lock:
+            self._total_erros += 1
+            espaco = self.capacidade - len(self._fila)
+            cabem = lote[:max(espaco, 0)]
+            self._fila.extendleft(reversed(cabem))
+            self._total_descartados_erro += len(lote) - len(cabem)
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do log de atividades"""
+        with self._lock:
+            return {
+                "fila": len(self._fila),
+                "capacidade": self.capacidade,
+                "maior_fila": self._maior_fila,
+                "total_enfileirados": self._total_enfileirados,
+                "total_gravados": self._total_gravados,
+                "total_lotes": self._total_lotes,
+                "total_erros": self._total_erros,
+                "descartados": {
+                    "fila_cheia": self._total_descartados_fila_cheia,
+                    "invalidos": self._total_descartados_invalidos,
+                    "erro_banco": self._total_descartados_erro
+                },
+                "ultimo_flush": self._ultimo_flush
+            }
+
+# Instância global
+registro_atividades = RegistroAtividades(
+    capacidade=settings.ACTIVITY_LOG_QUEUE_SIZE,
+    tamanho_lote=settings.ACTIVITY_LOG_BATCH_SIZE,
+    intervalo=settings.ACTIVITY_LOG_FLUSH_INTERVAL
+)
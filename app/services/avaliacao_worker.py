@@ -0,0 +1,417 @@
+#Fila de avaliação AI das soluções (worker em background)
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from typing import Optional
+from app.core.config import settings
+from app.core.async_database import AsyncDatabase
+from app.services.ai_service import analisar_solucao, analisar_lote
+from app.services.ranking_service import janela_semanal, leaderboard_global, ranking_areas
+from app.services.ranking_mensal_service import ranking_mensal, somar_aprovacao
+
+NOTA_APROVACAO = 60
+
+async def aplicar_analise(solucao_id: int, problema: dict, analise: dict) -> Optional[str]:
+    """
+    Grava o resultado da AI na solução (analise_ai, pontuação, status)
+    Só altera soluções que ainda estão 'em_analise'. Retorna o status final,
+    ou None se a solução já tinha sido avaliada por outro caminho.
+    """
+    status_final = 'aprovada' if analise['pontuacao'] >= NOTA_APROVACAO else 'reprovada'
+    pontos = problema['pontos_recompensa'] if status_final == 'aprovada' else 0
+
+    async with AsyncDatabase.get_cursor() as cursor:
+        await cursor.execute("""
+            UPDATE solucoes SET
+                analise_ai = %s,
+                pontuacao_ai = %s,
+                feedback_ai = %s,
+                pontos_ganhos = %s,
+                pontuacao_final = %s,
+                status = %s,
+                data_avaliacao = NOW()
+            WHERE id = %s AND status = 'em_analise'
+        """, (
+            json.dumps(analise),
+            analise['pontuacao'],
+            analise['feedback'],
+            pontos,
+            analise['pontuacao'],
+            status_final,
+            solucao_id
+        ))
+        if cursor.rowcount == 0:
+            return None
+
+        # Pontos já somados pelo trigger after_solucao_aprovada
+        usuario = None
+        mes_ranking = None
+        if status_final == 'aprovada':
+            mes_ranking = await somar_aprovacao(cursor, solucao_id)
+            await cursor.execute("""
+                SELECT u.id, u.pontos_totais, u.patente, u.ativo,
+                    DATE(s.data_avaliacao) as dia_avaliacao, p.area
+                FROM solucoes s
+                INNER JOIN users u ON s.user_id = u.id
+                INNER JOIN problemas p ON s.problema_id = p.id
+                WHERE s.id = %s
+            """, (solucao_id,))
+            usuario = await cursor.fetchone()
+
+    # Após o commit: rankings em memória e posições do ranking mensal
+    if mes_ranking:
+        ranking_mensal.marcar(*mes_ranking)
+    if usuario:
+        janela_semanal.registrar(
+            solucao_id, usuario['id'], pontos, analise['pontuacao'], dia=usuario['dia_avaliacao']
+        )
+        ranking_areas.registrar(usuario['area'], usuario['id'], pontos, analise['pontuacao'])
+    if usuario and usuario['ativo']:
+        leaderboard_global.atualizar(
+            usuario['id'], usuario['pontos_totais'], patente=usuario['patente']
+        )
+
+    return status_final
+
+class AvaliacaoWorker:
+    """
+    Avalia soluções 'em_analise' fora do ciclo da requisição
+
+    - `enfileirar()` coloca uma solução recém-submetida na fila
+    - Um poller busca periodicamente soluções pendentes no banco
+      (submissões perdidas num restart, falhas anteriores, etc.)
+    - `concorrencia` tarefas consomem a fila, limitando as chamadas ao provider
+    - Falhas são repetidas com backoff exponencial; esgotadas as tentativas,
+      a solução vai para 'revisao' (avaliação manual)
+    - `enfileirar_problema()` avalia em lote as soluções pendentes de um
+      problema (menos chamadas ao provider, contexto do problema compartilhado)
+    """
+
+    def __init__(
+        self,
+        concorrencia: int,
+        poll_interval: float,
+        max_tentativas: int,
+        backoff_base: float
+    ):
+        self.concorrencia = max(concorrencia, 1)
+        self.poll_interval = poll_interval
+        self.max_tentativas = max(max_tentativas, 1)
+        self.backoff_base = backoff_base
+
+        self._fila = None
+        self._loop = None
+        self._tarefas = []
+        self._pendentes = set()  # ids na fila, em avaliação ou aguardando retry
+        self._tentativas = {}
+        self._sem_cache = set()  # ids reavaliados sem usar o cache de análises
+        self._avaliando = set()  # ids com chamada ao provider em andamento
+        self._em_stream = set()  # ids sendo avaliados por um stream SSE
+        self._tomados_pelo_lote = set()  # ids na fila que o lote avaliou (a entrada da fila é ignorada)
+        self._em_andamento = 0
+
+        # Métricas
+        self._total_avaliadas = 0
+        self._total_falhas = 0
+        self._total_retries = 0
+        self._total_revisao = 0
+        self._total_latencia = 0.0
+        self._total_medidas = 0  # avaliações com latência medida (base da média)
+        self._max_latencia = 0.0
+        self._total_lotes = 0
+        self._total_em_lote = 0
+        self._total_chamadas_lote = 0
+        self._ultimos_lotes = deque(maxlen=20)
+
+    @property
+    def rodando(self) -> bool:
+        return bool(self._tarefas)
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Inicia o poller e os consumidores (chamado no startup)"""
+        if self.rodando:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._fila = asyncio.Queue()
+        self._tarefas = [asyncio.create_task(self._poller())]
+        self._tarefas += [
+            asyncio.create_task(self._consumidor())
+            for _ in range(self.concorrencia)
+        ]
+
+    async def stop(self):
+        """Cancela as tarefas (chamado no shutdown); o que ficou pendente
+        continua 'em_analise' no banco e é retomado no próximo startup"""
+        tarefas, self._tarefas = self._tarefas, []
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        self._pendentes.clear()
+        self._tentativas.clear()
+        self._sem_cache.clear()
+        self._tomados_pelo_lote.clear()
+
+    # ---------- entrada ----------
+
+    def enfileirar(self, solucao_id: int, ignorar_cache: bool = False):
+        """
+        Coloca uma solução na fila (ignora se já estiver pendente)
+        `ignorar_cache` força uma nova chamada ao provider (reavaliação)
+        """
+        if not self.rodando or solucao_id in self._em_stream:
+            return
+        if ignorar_cache:
+            self._sem_cache.add(solucao_id)
+        if solucao_id in self._pendentes:
+            return
+        self._pendentes.add(solucao_id)
+        self._fila.put_nowait(solucao_id)
+
+    def reservar(self, solucao_id: int) -> bool:
+        """
+        Reserva a solução para ser avaliada fora do worker (stream SSE)
+        Retorna False se o worker já estiver avaliando essa solução.
+        """
+        if solucao_id in self._avaliando or solucao_id in self._em_stream:
+            return False
+        self._em_stream.add(solucao_id)
+        return True
+
+    def liberar(self, solucao_id: int):
+        """Desfaz `reservar` (a solução volta a poder ser avaliada pelo worker)"""
+        self._em_stream.discard(solucao_id)
+
+    def enfileirar_problema(self, problema_id: int):
+        """
+        Agenda a avaliação em lote das soluções pendentes de um problema
+        Pode ser chamado de endpoints síncronos (threadpool): a fila só é
+        manipulada na thread do event loop.
+        """
+        if not self.rodando:
+            return
+        try:
+            no_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            no_loop = False
+        if no_loop:
+            self._fila.put_nowait(("problema", problema_id))
+        else:
+            self._loop.call_soon_threadsafe(self._fila.put_nowait, ("problema", problema_id))
+
+    # ---------- tarefas ----------
+
+    async def _poller(self):
+        while True:
+            try:
+                async with AsyncDatabase.get_cursor() as cursor:
+                    await cursor.execute("""
+                        SELECT id FROM solucoes
+                        WHERE status = 'em_analise' AND analise_ai IS NULL
+                        ORDER BY id
+                        LIMIT 500
+                    """)
+                    for row in await cursor.fetchall():
+                        self.enfileirar(row['id'])
+            except Exception as e:
+                print(f"⚠️ Erro ao buscar soluções pendentes: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _consumidor(self):
+        while True:
+            item = await self._fila.get()
+            self._em_andamento += 1
+            try:
+                if isinstance(item, tuple):
+                    await self._avaliar_lote(item[1])
+                else:
+                    await self._avaliar(item)
+            finally:
+                self._em_andamento -= 1
+                self._fila.task_done()
+
+    async def _avaliar(self, solucao_id: int):
+        if solucao_id in self._tomados_pelo_lote:
+            # Entrada antiga da fila: o lote já cuidou dessa solução
+            self._tomados_pelo_lote.discard(solucao_id)
+            return
+        if solucao_id in self._em_stream:
+            self._concluir(solucao_id)
+            return
+
+        self._avaliando.add(solucao_id)
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute("""
+                    SELECT p.*, s.descricao_solucao, s.status AS solucao_status
+                    FROM solucoes s
+                    INNER JOIN problemas p ON s.problema_id = p.id
+                    WHERE s.id = %s
+                """, (solucao_id,))
+                dados = await cursor.fetchone()
+
+            if not dados or dados['solucao_status'] != 'em_analise':
+                self._concluir(solucao_id)
+                return
+
+            inicio = time.monotonic()
+            analise = await analisar_solucao(
+                problema=dados,
+                solucao_texto=dados['descricao_solucao'],
+                usar_cache=solucao_id not in self._sem_cache
+            )
+            latencia = time.monotonic() - inicio
+
+            await aplicar_analise(solucao_id, dados, analise)
+
+            self._total_avaliadas += 1
+            self._total_medidas += 1
+            self._total_latencia += latencia
+            self._max_latencia = max(self._max_latencia, latencia)
+            self._concluir(solucao_id)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._total_falhas += 1
+            print(f"Erro na análise AI da solução {solucao_id}: {e}")
+            await self._falhou(solucao_id)
+        finally:
+            self._avaliando.discard(solucao_id)
+
+    async def _avaliar_lote(self, problema_id: int):
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute("SELECT * FROM problemas WHERE id = %s", (problema_id,))
+                problema = await cursor.fetchone()
+                await cursor.execute("""
+                    SELECT id, descricao_solucao FROM solucoes
+                    WHERE problema_id = %s AND status = 'em_analise'
+                    ORDER BY id
+                """, (problema_id,))
+                rows = await cursor.fetchall()
+        except Exception as e:
+            print(f"⚠️ Erro ao buscar soluções do problema {problema_id}: {e}")
+            return
+
+        # O lote toma as soluções que ainda estão só na fila; as que já estão
+        # no provider, num stream ou em reavaliação sem cache seguem o caminho normal
+        solucoes = {
+            row['id']: row['descricao_solucao']
+            for row in rows
+            if row['id'] not in self._avaliando
+            and row['id'] not in self._em_stream
+            and row['id'] not in self._sem_cache
+        }
+        if not problema or not solucoes:
+            return
+        self._tomados_pelo_lote.update(sid for sid in solucoes if sid in self._pendentes)
+        self._pendentes.update(solucoes)
+        self._avaliando.update(solucoes)
+
+        inicio = time.monotonic()
+        try:
+            lote = await analisar_lote(problema, solucoes)
+        except Exception as e:
+            print(f"Erro na análise em lote do problema {problema_id}: {e}")
+            lote = {"resultados": {}, "falhas": {sid: str(e) for sid in solucoes},
+                    "chamadas": 0, "cache_hits": 0, "fallbacks": 0}
+        duracao = time.monotonic() - inicio
+        self._avaliando.difference_update(solucoes)
+
+        for sid, analise in lote["resultados"].items():
+            try:
+                await aplicar_analise(sid, problema, analise)
+                self._total_avaliadas += 1
+                self._concluir(sid)
+            except Exception as e:
+                lote["falhas"][sid] = str(e)
+
+        # O que falhou volta para o fluxo individual (retry/backoff/revisão)
+        for sid in lote["falhas"]:
+            self._total_falhas += 1
+            await self._falhou(sid)
+
+        self._total_lotes += 1
+        self._total_em_lote += len(solucoes)
+        self._total_chamadas_lote += lote["chamadas"]
+        self._ultimos_lotes.append({
+            "problema_id": problema_id,
+            "solucoes": len(solucoes),
+            "avaliadas": len(lote["resultados"]),
+            "falhas": len(lote["falhas"]),
+            "chamadas": lote["chamadas"],
+            "cache_hits": lote["cache_hits"],
+            "fallbacks": lote["fallbacks"],
+            "duracao_ms": round(duracao * 1000, 3),
+            "solucoes_por_segundo": round(len(solucoes) / duracao, 2) if duracao else None
+        })
+        print(f"🤖 Lote do problema {problema_id}: {len(lote['resultados'])}/{len(solucoes)} avaliadas em {lote['chamadas']} chamadas ({duracao:.2f}s)")
+
+    async def _falhou(self, solucao_id: int):
+        tentativas = self._tentativas.get(solucao_id, 0) + 1
+        self._tentativas[solucao_id] = tentativas
+
+        if tentativas >= self.max_tentativas:
+            await self._enviar_para_revisao(solucao_id)
+            return
+
+        # Backoff exponencial com jitter; a solução continua "pendente"
+        atraso = self.backoff_base * (2 ** (tentativas - 1)) * random.uniform(0.8, 1.2)
+        self._total_retries += 1
+        self._loop.call_later(atraso, self._fila.put_nowait, solucao_id)
+
+    async def _enviar_para_revisao(self, solucao_id: int):
+        try:
+            async with AsyncDatabase.get_cursor() as cursor:
+                await cursor.execute("""
+                    UPDATE solucoes SET status = 'revisao'
+                    WHERE id = %s AND status = 'em_analise'
+                """, (solucao_id,))
+            self._total_revisao += 1
+            print(f"⚠️ Solução {solucao_id} enviada para revisão manual após {self.max_tentativas} tentativas")
+        except Exception as e:
+            print(f"⚠️ Erro ao enviar solução {solucao_id} para revisão: {e}")
+        self._concluir(solucao_id)
+
+    def _concluir(self, solucao_id: int):
+        self._pendentes.discard(solucao_id)
+        self._tentativas.pop(solucao_id, None)
+        self._sem_cache.discard(solucao_id)
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas atuais da fila de avaliação"""
+        return {
+            "rodando": self.rodando,
+            "provider": settings.AI_PROVIDER,
+            "fila": self._fila.qsize() if self._fila else 0,
+            "pendentes": len(self._pendentes),
+            "em_andamento": self._em_andamento,
+            "concorrencia": self.concorrencia,
+            "total_avaliadas": self._total_avaliadas,
+            "total_falhas": self._total_falhas,
+            "total_retries": self._total_retries,
+            "total_revisao": self._total_revisao,
+            "avg_latencia_ms": round(self._total_latencia / self._total_medidas * 1000, 3) if self._total_medidas else 0,
+            "max_latencia_ms": round(self._max_latencia * 1000, 3),
+            "lotes": {
+                "total_lotes": self._total_lotes,
+                "total_solucoes": self._total_em_lote,
+                "total_chamadas": self._total_chamadas_lote,
+                "chamadas_economizadas": self._total_em_lote - self._total_chamadas_lote,
+                "ultimos": list(self._ultimos_lotes)
+            }
+        }
+
+# Instância global
+avaliacao_worker = AvaliacaoWorker(
+    concorrencia=settings.AI_WORKER_CONCURRENCY,
+    poll_interval=settings.AI_WORKER_POLL_INTERVAL,
+    max_tentativas=settings.AI_WORKER_MAX_ATTEMPTS,
+    backoff_base=settings.AI_WORKER_BACKOFF_BASE
+)
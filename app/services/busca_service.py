@@ -0,0 +1,369 @@
+#Índice invertido de problemas em memória (busca e autocomplete)
+import asyncio
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import Database
+from app.utils.helpers import sem_acentos
+
+# ==================== TOKENIZAÇÃO ====================
+
+# Já sem acentos (a comparação é feita depois de `sem_acentos`)
+STOPWORDS = frozenset("""
+    a o as os um uma uns umas de do da dos das em no na nos nas num numa
+    por pelo pela pelos pelas para pra com sem sob sobre entre ate apos
+    e ou mas nem que se ao aos como mais menos muito muita muitos muitas
+    seu sua seus suas meu minha nosso nossa ele ela eles elas nos voce voces
+    este esta estes estas esse essa esses essas isso isto aquele aquela
+    ser ter estar foi sao era tem ja nao sim tambem so quando onde qual
+""".split())
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    """Palavras sem acentos e em minúsculas, com 2 ou mais caracteres e sem stopwords"""
+    if not texto:
+        return []
+    return [
+        termo for termo in re.findall(r"[a-z0-9]+", sem_acentos(texto))
+        if len(termo) >= 2 and termo not in STOPWORDS
+    ]
+
+def _comparavel(valor: Optional[str]) -> str:
+    """Valor de filtro comparado como na collation do banco (utf8mb4_unicode_ci)"""
+    return sem_acentos(valor or "").rstrip()
+
+# ==================== TRIE DE PREFIXOS ====================
+
+class _NoTrie:
+    __slots__ = ("filhos", "termo")
+
+    def __init__(self):
+        self.filhos: Dict[str, "_NoTrie"] = {}
+        self.termo = False
+
+class TriePrefixos:
+    """Trie dos termos do índice: termos que começam com um prefixo em O(tamanho do prefixo + resultado)"""
+
+    def __init__(self):
+        self._raiz = _NoTrie()
+        self._tamanho = 0
+
+    def __len__(self):
+        return self._tamanho
+
+    def inserir(self, termo: str):
+        no = self._raiz
+        for letra in termo:
+            no = no.filhos.setdefault(letra, _NoTrie())
+        if not no.termo:
+            no.termo = True
+            self._tamanho += 1
+
+    def remover(self, termo: str):
+        caminho = [self._raiz]
+        for letra in termo:
+            no = caminho[-1].filhos.get(letra)
+            if no is None:
+                return
+            caminho.append(no)
+        if not caminho[-1].termo:
+            return
+        caminho[-1].termo = False
+        self._tamanho -= 1
+        # Poda os nós que ficaram sem termo e sem filhos
+        for indice in range(len(termo), 0, -1):
+            no = caminho[indice]
+            if no.termo or no.filhos:
+                break
+            del caminho[indice - 1].filhos[termo[indice - 1]]
+
+    def com_prefixo(self, prefixo: str) -> List[str]:
+        no = self._raiz
+        for letra in prefixo:
+            no = no.filhos.get(letra)
+            if no is None:
+                return []
+        termos, pilha = [], [(no, prefixo)]
+        while pilha:
+            no, termo = pilha.pop()
+            if no.termo:
+                termos.append(termo)
+            pilha.extend((filho, termo + letra) for letra, filho in no.filhos.items())
+        return termos
+
+# ==================== ÍNDICE INVERTIDO ====================
+
+# Peso de cada campo na frequência do termo (BM25F simplificado)
+PESOS_CAMPOS = (("titulo", 3), ("area", 2), ("descricao", 1))
+
+CAMPOS_PROBLEMA = """
+    p.id, p.empresa_id, p.titulo, p.descricao, p.area, p.nivel_dificuldade,
+    p.tipo, p.pontos_recompensa, p.oferece_certificado, p.status,
+    p.data_inicio, p.data_fim, e.nome_empresa, e.logo_url as empresa_logo
+"""
+
+class IndiceProblemas:
+    """
+    Índice invertido dos problemas ativos (título, área e descrição)
+
+    - Construído a partir do banco no startup e reconstruído a cada `intervalo`
+    - Criar / editar / fechar um problema recarrega só ele (`atualizar`)
+    - Ranking BM25 (k1=1.2, b=0.75) com o título pesando mais que a descrição
+    - Cada termo da busca também casa como prefixo (trie), o que serve o
+      autocomplete enquanto o usuário digita
+    - Guarda os campos exibidos na busca: as consultas não vão ao MySQL
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Termos considerados por prefixo (os mais frequentes)
+    MAX_EXPANSOES = 30
+
+    def __init__(self, intervalo: int):
+        self.intervalo = intervalo
+        self.pronto = False
+
+        self._documentos: Dict[int, dict] = {}
+        self._tamanhos: Dict[int, int] = {}
+        self._termos_doc: Dict[int, Counter] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}  # termo -> {problema_id: frequência ponderada}
+        self._trie = TriePrefixos()
+        self._soma_tamanhos = 0
+        self._lock = threading.Lock()
+        self._tarefa = None
+
+        # Problemas alterados enquanto a reconstrução lia o banco
+        self._tocados = None
+
+        # Métricas
+        self._total_buscas = 0
+        self._total_atualizacoes = 0
+        self._total_reconstrucoes = 0
+        self._ultima_reconstrucao = None
+
+    # ---------- documentos ----------
+
+    def _adicionar(self, documento: dict):
+        problema_id = documento['id']
+        termos = Counter()
+        for campo, peso in PESOS_CAMPOS:
+            for termo in tokenizar(documento.get(campo)):
+                termos[termo] += peso
+
+        self._documentos[problema_id] = documento
+        self._termos_doc[problema_id] = termos
+        self._tamanhos[problema_id] = sum(termos.values())
+        self._soma_tamanhos += self._tamanhos[problema_id]
+        for termo, frequencia in termos.items():
+            postings = self._postings.get(termo)
+            if postings is None:
+                postings = self._postings[termo] = {}
+                self._trie.inserir(termo)
+            postings[problema_id] = frequencia
+
+    def _retirar(self, problema_id: int):
+        if problema_id not in self._documentos:
+            return
+        del self._documentos[problema_id]
+        self._soma_tamanhos -= self._tamanhos.pop(problema_id)
+        for termo in self._termos_doc.pop(problema_id):
+            postings = self._postings[termo]
+            del postings[problema_id]
+            if not postings:
+                del self._postings[termo]
+                self._trie.remover(termo)
+
+    def _ler_banco(self, problema_id: Optional[int] = None) -> List[dict]:
+        with Database.get_cursor() as cursor:
+            if problema_id is None:
+                cursor.execute(f"""
+                    SELECT {CAMPOS_PROBLEMA}
+                    FROM problemas p
+                    INNER JOIN empresas e ON p.empresa_id = e.id
+                    WHERE p.status = 'ativo'
+                """)
+            else:
+                cursor.execute(f"""
+                    SELECT {CAMPOS_PROBLEMA}
+                    FROM problemas p
+                    INNER JOIN empresas e ON p.empresa_id = e.id
+                    WHERE p.id = %s AND p.status = 'ativo'
+                """, (problema_id,))
+            return cursor.fetchall()
+
+    # ---------- carga / atualização ----------
+
+    def construir(self):
+        """(Re)constrói o índice a partir do banco"""
+        with self._lock:
+            self._tocados = set()
+        try:
+            documentos = self._ler_banco()
+        except Exception:
+            with self._lock:
+                self._tocados = None
+            raise
+
+        novo = IndiceProblemas(0)
+        for documento in documentos:
+            novo._adicionar(documento)
+
+        with self._lock:
+            tocados, self._tocados = self._tocados, None
+            self._documentos, self._tamanhos = novo._documentos, novo._tamanhos
+            self._termos_doc, self._postings = novo._termos_doc, novo._postings
+            self._trie, self._soma_tamanhos = novo._trie, novo._soma_tamanhos
+            self.pronto = True
+            self._total_reconstrucoes += 1
+            self._ultima_reconstrucao = time.time()
+
+        # O snapshot pode ter lido a versão anterior destes problemas
+        for problema_id in tocados:
+            self.atualizar(problema_id)
+
+    def atualizar(self, problema_id: int):
+        """
+        Recarrega um problema do banco (criado, editado ou fechado)
+        Se falhar, a próxima reconstrução corrige.
+        """
+        with self._lock:
+            if self._tocados is not None:
+                self._tocados.add(problema_id)
+        try:
+            documentos = self._ler_banco(problema_id)
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar o problema {problema_id} no índice de busca: {e}")
+            return
+
+        with self._lock:
+            self._retirar(problema_id)
+            for documento in documentos:
+                self._adicionar(documento)
+            self._total_atualizacoes += 1
+
+    # ---------- consultas ----------
+
+    def _expandir(self, termo: str) -> List[str]:
+        """O termo e os termos do índice que começam com ele (os mais frequentes)"""
+        expansoes = self._trie.com_prefixo(termo)
+        if len(expansoes) > self.MAX_EXPANSOES:
+            expansoes = heapq.nlargest(
+                self.MAX_EXPANSOES, expansoes, key=lambda t: len(self._postings[t])
+            )
+        if termo in self._postings and termo not in expansoes:
+            expansoes.append(termo)
+        return expansoes
+
+    def _pontuar(self, termos: List[str]) -> Dict[int, float]:
+        """Soma BM25 por documento; cada termo da busca vale pela sua melhor expansão"""
+        total_docs = len(self._documentos)
+        media = self._soma_tamanhos / total_docs if total_docs else 0
+        pontuacoes: Dict[int, float] = {}
+
+        for termo in termos:
+            melhor: Dict[int, float] = {}
+            for expansao in self._expandir(termo):
+                postings = self._postings[expansao]
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for problema_id, frequencia in postings.items():
+                    normalizacao = 1 - self.B + self.B * self._tamanhos[problema_id] / media
+                    valor = idf * frequencia * (self.K1 + 1) / (frequencia + self.K1 * normalizacao)
+                    if valor > melhor.get(problema_id, 0):
+                        melhor[problema_id] = valor
+            for problema_id, valor in melhor.items():
+                pontuacoes[problema_id] = pontuacoes.get(problema_id, 0) + valor
+        return pontuacoes
+
+    def buscar(
+        self,
+        texto: str,
+        limit: int,
+        area: Optional[str] = None,
+        nivel: Optional[str] = None,
+        tipo: Optional[str] = None,
+        apos: Optional[Tuple[float, int]] = None
+    ) -> List[Tuple[float, dict]]:
+        """
+        Até `limit` problemas como (relevancia, documento), da maior relevância
+        para a menor (empate: maior id primeiro). `apos` = (relevancia, id)
+        do último item da página anterior.
+        """
+        termos = tokenizar(texto)
+        # Enquanto digita, a última palavra pode ser o começo de outra ("da" -> "dados")
+        digitando = re.findall(r"[a-z0-9]+$", sem_acentos(texto))
+        if digitando and digitando[0] in STOPWORDS and len(digitando[0]) >= 2:
+            termos.append(digitando[0])
+        if not termos:
+            return []
+
+        # Mesma comparação do MySQL (utf8mb4_unicode_ci): sem maiúsculas, acentos e espaços finais
+        filtros = [
+            (campo, _comparavel(valor))
+            for campo, valor in (("area", area), ("nivel_dificuldade", nivel), ("tipo", tipo))
+            if valor
+        ]
+
+        with self._lock:
+            self._total_buscas += 1
+            candidatos = []
+            for problema_id, valor in self._pontuar(termos).items():
+                documento = self._documentos[problema_id]
+                if any(_comparavel(documento[campo]) != filtro for campo, filtro in filtros):
+                    continue
+                chave = (-round(valor, 6), -problema_id)
+                if apos is not None and chave <= (-apos[0], -apos[1]):
+                    continue
+                candidatos.append((chave, documento))
+
+        return [
+            (-chave[0], dict(documento))
+            for chave, documento in heapq.nsmallest(limit, candidatos, key=lambda item: item[0])
+        ]
+
+    def __len__(self):
+        return len(self._documentos)
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Constrói o índice e agenda as reconstruções (chamado no startup)"""
+        if self.intervalo > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_reconstrucao())
+        await run_in_threadpool(self.construir)
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    async def _loop_reconstrucao(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await run_in_threadpool(self.construir)
+            except Exception as e:
+                print(f"⚠️ Erro ao reconstruir o índice de busca: {e}")
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do índice de busca"""
+        with self._lock:
+            return {
+                "pronto": self.pronto,
+                "problemas": len(self._documentos),
+                "termos": len(self._postings),
+                "total_buscas": self._total_buscas,
+                "total_atualizacoes": self._total_atualizacoes,
+                "total_reconstrucoes": self._total_reconstrucoes,
+                "ultima_reconstrucao": self._ultima_reconstrucao
+            }
+
+# Instância global
+indice_problemas = IndiceProblemas(intervalo=settings.SEARCH_INDEX_REBUILD_INTERVAL)
@@ -0,0 +1,63 @@
+#Contadores de soluções por problema (colunas desnormalizadas em `problemas`)
+import argparse
+from typing import Optional
+from app.core.database import Database
+
+# Os triggers de `solucoes` (migrations/003_contadores_solucoes.sql) mantêm os
+# contadores na mesma transação. Remoções em cascata (ex.: usuário excluído)
+# não disparam triggers no MySQL: nesses casos, recalcule com este módulo.
+
+RECALCULAR_CONTADORES = """
+UPDATE problemas p
+LEFT JOIN (
+    SELECT
+        problema_id,
+        COUNT(*) AS total,
+        SUM(status = 'em_analise') AS pendentes,
+        SUM(status = 'aprovada') AS aprovadas,
+        COUNT(pontuacao_final) AS avaliadas,
+        SUM(pontuacao_final) AS soma
+    FROM solucoes
+    {filtro_solucoes}
+    GROUP BY problema_id
+) c ON c.problema_id = p.id
+SET p.total_solucoes = IFNULL(c.total, 0),
+    p.solucoes_pendentes = IFNULL(c.pendentes, 0),
+    p.solucoes_aprovadas = IFNULL(c.aprovadas, 0),
+    p.solucoes_avaliadas = IFNULL(c.avaliadas, 0),
+    p.soma_pontuacao = IFNULL(c.soma, 0),
+    p.updated_at = p.updated_at
+{filtro_problemas}
+"""
+
+def recalcular_contadores(problema_id: Optional[int] = None) -> int:
+    """
+    Recalcula do zero os contadores de um problema (ou de todos)
+    Retorna quantos problemas tiveram os contadores alterados
+    """
+    if problema_id is None:
+        query = RECALCULAR_CONTADORES.format(filtro_solucoes="", filtro_problemas="")
+        params = ()
+    else:
+        query = RECALCULAR_CONTADORES.format(
+            filtro_solucoes="WHERE problema_id = %s",
+            filtro_problemas="WHERE p.id = %s"
+        )
+        params = (problema_id, problema_id)
+
+    with Database.get_cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recalcula os contadores de soluções da tabela problemas"
+    )
+    parser.add_argument("--problema", type=int, help="Recalcular apenas este problema")
+    args = parser.parse_args()
+
+    alterados = recalcular_contadores(args.problema)
+    print(f"✅ Contadores recalculados ({alterados} problema(s) corrigido(s))")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#Ranking mensal materializado (tabela ranking_mensal)
+import argparse
+import asyncio
+import threading
+import time
+from datetime import date
+from typing import Optional, Set, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import Database
+
+# Pontos do mês = pontos_ganhos das soluções aprovadas no mês (data_avaliacao)
+
+async def somar_aprovacao(cursor, solucao_id: int) -> Optional[Tuple[int, int]]:
+    """
+    Soma uma solução recém-aprovada no ranking_mensal do mês da aprovação
+    Usar com o cursor da transação que aprovou a solução. Retorna (ano, mes).
+    """
+    await cursor.execute("""
+        INSERT INTO ranking_mensal (user_id, mes, ano, pontos_mes, problemas_resolvidos)
+        SELECT user_id, MONTH(data_avaliacao), YEAR(data_avaliacao), pontos_ganhos, 1
+        FROM solucoes
+        WHERE id = %s AND status = 'aprovada' AND data_avaliacao IS NOT NULL
+        ON DUPLICATE KEY UPDATE
+            pontos_mes = pontos_mes + VALUES(pontos_mes),
+            problemas_resolvidos = problemas_resolvidos + 1
+    """, (solucao_id,))
+    await cursor.execute(
+        "SELECT YEAR(data_avaliacao) AS ano, MONTH(data_avaliacao) AS mes FROM solucoes WHERE id = %s",
+        (solucao_id,)
+    )
+    row = await cursor.fetchone()
+    if not row or row['ano'] is None:
+        return None
+    return row['ano'], row['mes']
+
+class RankingMensal:
+    """
+    Manutenção do ranking mensal
+
+    - Cada aprovação soma pontos/problemas na linha do mês (`somar_aprovacao`)
+      e marca o mês como alterado
+    - A cada `intervalo` segundos, os meses alterados têm `posicao_ranking`
+      recalculada com um único UPDATE (ROW_NUMBER) por mês
+    - `reconstruir()` refaz um mês inteiro a partir de `solucoes`
+    """
+
+    def __init__(self, intervalo: int):
+        self.intervalo = intervalo
+        self._alterados: Set[Tuple[int, int]] = set()
+        self._lock = threading.Lock()
+        self._tarefa = None
+
+        # Métricas
+        self._total_recalculos = 0
+        self._total_reconstrucoes = 0
+        self._ultimo_recalculo = None
+
+    def marcar(self, ano: int, mes: int):
+        """Marca o mês para ter as posições recalculadas"""
+        with self._lock:
+            self._alterados.add((ano, mes))
+
+    def recalcular_posicoes(self, ano: int, mes: int) -> int:
+        """Recalcula posicao_ranking do mês (só usuários ativos recebem posição)"""
+        with Database.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE ranking_mensal rm
+                LEFT JOIN (
+                    SELECT
+                        r.id,
+                        ROW_NUMBER() OVER (
+                            ORDER BY r.pontos_mes DESC, r.problemas_resolvidos DESC, r.user_id
+                        ) AS posicao
+                    FROM ranking_mensal r
+                    INNER JOIN users u ON u.id = r.user_id
+                    WHERE r.ano = %s AND r.mes = %s AND u.ativo = TRUE
+                ) p ON p.id = rm.id
+                SET rm.posicao_ranking = p.posicao
+                WHERE rm.ano = %s AND rm.mes = %s
+            """, (ano, mes, ano, mes))
+            alteradas = cursor.rowcount
+
+        self._total_recalculos += 1
+        self._ultimo_recalculo = time.time()
+        return alteradas
+
+    def recalcular_alterados(self) -> int:
+        """Recalcula as posições dos meses marcados. Retorna quantos meses."""
+        with self._lock:
+            meses, self._alterados = self._alterados, set()
+
+        for indice, (ano, mes) in enumerate(sorted(meses)):
+            try:
+                self.recalcular_posicoes(ano, mes)
+            except Exception:
+                # Os meses que faltaram voltam para a próxima rodada
+                with self._lock:
+                    self._alterados.update(sorted(meses)[indice:])
+                raise
+        return len(meses)
+
+    def reconstruir(self, ano: int, mes: int) -> int:
+        """Refaz o mês a partir das soluções aprovadas. Retorna quantos usuários entraram."""
+        inicio = date(ano, mes, 1)
+        fim = date(ano + (mes == 12), mes % 12 + 1, 1)
+
+        with Database.get_cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM ranking_mensal WHERE ano = %s AND mes = %s",
+                (ano, mes)
+            )
+            cursor.execute("""
+                INSERT INTO ranking_mensal (user_id, mes, ano, pontos_mes, problemas_resolvidos)
+                SELECT user_id, %s, %s, SUM(pontos_ganhos), COUNT(*)
+                FROM solucoes
+                WHERE status = 'aprovada'
+                    AND data_avaliacao >= %s AND data_avaliacao < %s
+                GROUP BY user_id
+            """, (mes, ano, inicio, fim))
+            usuarios = cursor.rowcount
+
+        self.recalcular_posicoes(ano, mes)
+        self._total_reconstrucoes += 1
+        return usuarios
+
+    def meses_com_aprovacoes(self) -> list:
+        """(ano, mes) de todos os meses com soluções aprovadas"""
+        with Database.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT YEAR(data_avaliacao) AS ano, MONTH(data_avaliacao) AS mes
+                FROM solucoes
+                WHERE status = 'aprovada' AND data_avaliacao IS NOT NULL
+                ORDER BY ano, mes
+            """)
+            return [(row['ano'], row['mes']) for row in cursor.fetchall()]
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Agenda o recálculo periódico (chamado no startup)"""
+        hoje = date.today()
+        self.marcar(hoje.year, hoje.month)
+        if self.intervalo > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_recalculo())
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    async def _loop_recalculo(self):
+        while True:
+            try:
+                await run_in_threadpool(self.recalcular_alterados)
+            except Exception as e:
+                print(f"⚠️ Erro ao recalcular o ranking mensal: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do ranking mensal"""
+        with self._lock:
+            pendentes = sorted(self._alterados)
+        return {
+            "meses_pendentes": [f"{ano}-{mes:02d}" for ano, mes in pendentes],
+            "total_recalculos": self._total_recalculos,
+            "total_reconstrucoes": self._total_reconstrucoes,
+            "ultimo_recalculo": self._ultimo_recalculo
+        }
+
+# Instância global
+ranking_mensal = RankingMensal(intervalo=settings.RANKING_MONTHLY_REFRESH_INTERVAL)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reconstrói o ranking mensal a partir das soluções aprovadas"
+    )
+    parser.add_argument("--ano", type=int, help="Ano do mês a reconstruir")
+    parser.add_argument("--mes", type=int, choices=range(1, 13), metavar="1-12", help="Mês a reconstruir")
+    parser.add_argument("--todos", action="store_true", help="Reconstruir todos os meses com aprovações")
+    args = parser.parse_args()
+
+    if args.todos:
+        meses = ranking_mensal.meses_com_aprovacoes()
+    elif args.ano and args.mes:
+        meses = [(args.ano, args.mes)]
+    else:
+        parser.error("informe --ano e --mes, ou --todos")
+
+    for ano, mes in meses:
+        usuarios = ranking_mensal.reconstruir(ano, mes)
+        print(f"✅ Ranking de {mes:02d}/{ano} reconstruído ({usuarios} usuário(s))")
+
+if __name__ == "__main__":
+    main()
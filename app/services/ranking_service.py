@@ -0,0 +1,864 @@
+#Ranking em memória (leaderboard incremental)
+import asyncio
+import heapq
+import math
+import random
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import Database
+from app.core.async_database import AsyncDatabase
+
+# ==================== SKIP LIST INDEXÁVEL ====================
+
+class _Fim:
+    """Sentinela do fim da lista (maior que qualquer chave)"""
+
+class _No:
+    __slots__ = ("chave", "proximo", "largura")
+
+    def __init__(self, chave, niveis: int):
+        self.chave = chave
+        self.proximo = [None] * niveis
+        self.largura = [1] * niveis
+
+class SkipListIndexavel:
+    """
+    Skip list ordenada com "larguras" em cada ligação, o que permite:
+    - inserir/remover uma chave em O(log n)
+    - posição (índice) de uma chave em O(log n)
+    - chave no índice i em O(log n), e daí percorrer uma página
+    As chaves devem ser únicas e comparáveis entre si.
+    """
+
+    MAX_NIVEL = 32
+
+    def __init__(self):
+        self._fim = _No(_Fim, 0)
+        self._cabeca = _No(None, self.MAX_NIVEL)
+        self._cabeca.proximo = [self._fim] * self.MAX_NIVEL
+        self._tamanho = 0
+
+    def __len__(self):
+        return self._tamanho
+
+    def _antecessores(self, chave):
+        """Último nó com chave < `chave` em cada nível, e a posição de cada um"""
+        antecessores = [None] * self.MAX_NIVEL
+        posicoes = [0] * self.MAX_NIVEL
+        no, posicao = self._cabeca, 0
+        for nivel in reversed(range(self.MAX_NIVEL)):
+            while no.proximo[nivel] is not self._fim and no.proximo[nivel].chave < chave:
+                posicao += no.largura[nivel]
+                no = no.proximo[nivel]
+            antecessores[nivel] = no
+            posicoes[nivel] = posicao
+        return antecessores, posicoes
+
+    def inserir(self, chave):
+        antecessores, posicoes = self._antecessores(chave)
+        niveis = min(self.MAX_NIVEL, 1 - int(math.log(1.0 - random.random(), 2.0)))
+        novo = _No(chave, niveis)
+        posicao_novo = posicoes[0] + 1
+
+        for nivel in range(niveis):
+            anterior = antecessores[nivel]
+            novo.proximo[nivel] = anterior.proximo[nivel]
+            anterior.proximo[nivel] = novo
+            # Distância do anterior até o novo, e do novo até o antigo próximo
+            distancia = posicao_novo - posicoes[nivel]
+            novo.largura[nivel] = anterior.largura[nivel] - distancia + 1
+            anterior.largura[nivel] = distancia
+
+        for nivel in range(niveis, self.MAX_NIVEL):
+            antecessores[nivel].largura[nivel] += 1
+
+        self._tamanho += 1
+
+    def remover(self, chave) -> bool:
+        antecessores, _ = self._antecessores(chave)
+        alvo = antecessores[0].proximo[0]
+        if alvo is self._fim or alvo.chave != chave:
+            return False
+
+        for nivel in range(len(alvo.proximo)):
+            anterior = antecessores[nivel]
+            anterior.largura[nivel] += alvo.largura[nivel] - 1
+            anterior.proximo[nivel] = alvo.proximo[nivel]
+
+        for nivel in range(len(alvo.proximo), self.MAX_NIVEL):
+            antecessores[nivel].largura[nivel] -= 1
+
+        self._tamanho -= 1
+        return True
+
+    def indice(self, chave) -> Optional[int]:
+        """Índice (0-based) da chave, ou None se não existir"""
+        antecessores, posicoes = self._antecessores(chave)
+        alvo = antecessores[0].proximo[0]
+        if alvo is self._fim or alvo.chave != chave:
+            return None
+        return posicoes[0]
+
+    def contar_menores(self, chave) -> int:
+        """Quantidade de chaves menores que `chave` (ela não precisa existir)"""
+        _, posicoes = self._antecessores(chave)
+        return posicoes[0]
+
+    def fatia(self, inicio: int, quantidade: int) -> List:
+        """Até `quantidade` chaves a partir do índice `inicio`"""
+        if inicio < 0 or inicio >= self._tamanho or quantidade <= 0:
+            return []
+
+        no, restante = self._cabeca, inicio + 1
+        for nivel in reversed(range(self.MAX_NIVEL)):
+            while no.largura[nivel] <= restante and no.proximo[nivel] is not self._fim:
+                restante -= no.largura[nivel]
+                no = no.proximo[nivel]
+
+        chaves = []
+        while no is not self._fim and len(chaves) < quantidade:
+            chaves.append(no.chave)
+            no = no.proximo[0]
+        return chaves
+
+# ==================== LEADERBOARD ====================
+
+_MANTER = object()
+
+class Leaderboard:
+    """
+    Ranking global (usuários ativos por pontos_totais) mantido em memória
+
+    - Construído a partir do banco no startup
+    - Atualizado incrementalmente (aprovação de solução, registro, perfil, desativação)
+    - Top-N, página e posição de um usuário em O(log n)
+    - Posição também dentro da patente e da área de interesse do usuário
+    - Reconciliado periodicamente com o banco (corrige divergências)
+
+    Na listagem, empates em pontos são desempatados pelo id do usuário
+    (menor primeiro). Em `posicoes()`, usuários empatados dividem a posição.
+    """
+
+    def __init__(self, intervalo_reconciliacao: int):
+        self.intervalo_reconciliacao = intervalo_reconciliacao
+        self.pronto = False
+
+        self._lista = SkipListIndexavel()
+        self._grupos = {}  # ("patente" | "area", valor) -> SkipListIndexavel
+        self._usuarios = {}  # user_id -> (pontos, patente, area)
+        self._lock = threading.Lock()
+        self._tarefa = None
+
+        # Versão de cada alteração, para a reconciliação não sobrescrever
+        # atualizações feitas enquanto o snapshot do banco era lido
+        self._versao = 0
+        self._alterado_em = {}
+
+        # Métricas
+        self._total_atualizacoes = 0
+        self._total_reconciliacoes = 0
+        self._total_divergencias = 0
+        self._ultima_reconciliacao = None
+
+    @staticmethod
+    def _chave(user_id: int, pontos: int) -> Tuple[int, int]:
+        return (-pontos, user_id)
+
+    def _listas_do_perfil(self, perfil, criar: bool = False) -> List[SkipListIndexavel]:
+        _, patente, area = perfil
+        listas = [self._lista]
+        for grupo in (("patente", patente), ("area", area)):
+            if grupo[1] is None:
+                continue
+            lista = self._grupos.get(grupo)
+            if lista is None and criar:
+                lista = self._grupos[grupo] = SkipListIndexavel()
+            if lista is not None:
+                listas.append(lista)
+        return listas
+
+    # ---------- carga / reconciliação ----------
+
+    def carregar(self, usuarios: Iterable[Tuple[int, int, Optional[str], Optional[str]]]):
+        """Reconstrói o ranking a partir de (user_id, pontos, patente, area)"""
+        novo = Leaderboard(0)
+        for user_id, pontos, patente, area in usuarios:
+            novo._definir(user_id, pontos or 0, patente, area)
+
+        with self._lock:
+            self._lista, self._grupos, self._usuarios = novo._lista, novo._grupos, novo._usuarios
+            self._alterado_em.clear()
+            self.pronto = True
+
+    def _ler_banco(self) -> List[Tuple[int, int, Optional[str], Optional[str]]]:
+        with Database.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, pontos_totais, patente, area_interesse
+                FROM users
+                WHERE ativo = TRUE
+            """)
+            return [
+                (row['id'], row['pontos_totais'], row['patente'], row['area_interesse'])
+                for row in cursor.fetchall()
+            ]
+
+    def construir(self):
+        """Carrega o ranking do banco"""
+        self.carregar(self._ler_banco())
+
+    def reconciliar(self) -> dict:
+        """Compara com o banco e corrige divergências. Retorna o que foi corrigido"""
+        with self._lock:
+            versao_inicio = self._versao
+
+        banco = {user_id: (pontos or 0, patente, area) for user_id, pontos, patente, area in self._ler_banco()}
+        corrigidos = {"divergentes": 0, "ausentes": 0, "sobrando": 0}
+
+        with self._lock:
+            def mexido_depois(user_id):
+                return self._alterado_em.get(user_id, 0) > versao_inicio
+
+            for user_id, perfil in banco.items():
+                atual = self._usuarios.get(user_id)
+                if atual == perfil or mexido_depois(user_id):
+                    continue
+                corrigidos["ausentes" if atual is None else "divergentes"] += 1
+                self._definir(user_id, *perfil)
+
+            for user_id in [uid for uid in self._usuarios if uid not in banco]:
+                if not mexido_depois(user_id):
+                    corrigidos["sobrando"] += 1
+                    self._retirar(user_id)
+
+            # Alterações anteriores ao snapshot já estão refletidas no banco
+            self._alterado_em = {
+                uid: v for uid, v in self._alterado_em.items() if v > versao_inicio
+            }
+
+            self._total_reconciliacoes += 1
+            self._total_divergencias += sum(corrigidos.values())
+            self._ultima_reconciliacao = time.time()
+
+        if any(corrigidos.values()):
+            print(f"⚠️ Ranking reconciliado com o banco: {corrigidos}")
+        return corrigidos
+
+    # ---------- atualizações incrementais ----------
+
+    def atualizar(self, user_id: int, pontos: int = _MANTER, patente: Optional[str] = _MANTER, area: Optional[str] = _MANTER):
+        """Atualiza pontos/patente/área de um usuário ativo (o que não for passado é mantido)"""
+        with self._lock:
+            atual = self._usuarios.get(user_id, (0, None, None))
+            self._definir(
+                user_id,
+                atual[0] if pontos is _MANTER else (pontos or 0),
+                atual[1] if patente is _MANTER else patente,
+                atual[2] if area is _MANTER else area
+            )
+            self._marcar(user_id)
+
+    def remover(self, user_id: int):
+        """Retira um usuário do ranking (conta desativada)"""
+        with self._lock:
+            self._retirar(user_id)
+            self._marcar(user_id)
+
+    def _definir(self, user_id: int, pontos: int, patente: Optional[str], area: Optional[str]):
+        perfil = (pontos, patente, area)
+        if self._usuarios.get(user_id) == perfil:
+            return
+        self._retirar(user_id)
+        chave = self._chave(user_id, pontos)
+        for lista in self._listas_do_perfil(perfil, criar=True):
+            lista.inserir(chave)
+        self._usuarios[user_id] = perfil
+        self._total_atualizacoes += 1
+
+    def _retirar(self, user_id: int):
+        perfil = self._usuarios.pop(user_id, None)
+        if perfil is None:
+            return
+        chave = self._chave(user_id, perfil[0])
+        for lista in self._listas_do_perfil(perfil):
+            lista.remover(chave)
+
+    def _marcar(self, user_id: int):
+        self._versao += 1
+        self._alterado_em[user_id] = self._versao
+
+    # ---------- consultas ----------
+
+    def posicao(self, user_id: int) -> Optional[int]:
+        """Posição (1 = primeiro) do usuário na listagem global, ou None se não estiver no ranking"""
+        with self._lock:
+            perfil = self._usuarios.get(user_id)
+            if perfil is None:
+                return None
+            return self._lista.indice(self._chave(user_id, perfil[0])) + 1
+
+    def posicoes(self, user_id: int) -> Optional[dict]:
+        """
+        Posição global, na patente e na área de interesse do usuário
+        (1 + quantos têm mais pontos), com o total de cada ranking
+        """
+        with self._lock:
+            perfil = self._usuarios.get(user_id)
+            if perfil is None:
+                return None
+            pontos, patente, area = perfil
+            # Chave anterior a qualquer usuário com os mesmos pontos
+            limite = (-pontos, float("-inf"))
+
+            resultado = {
+                "posicao_global": self._lista.contar_menores(limite) + 1,
+                "total_global": len(self._lista),
+                "posicao_patente": None,
+                "total_patente": None,
+                "posicao_area": None,
+                "total_area": None
+            }
+            for dimensao, valor in (("patente", patente), ("area", area)):
+                lista = self._grupos.get((dimensao, valor))
+                if lista is not None:
+                    resultado[f"posicao_{dimensao}"] = lista.contar_menores(limite) + 1
+                    resultado[f"total_{dimensao}"] = len(lista)
+            return resultado
+
+    def pagina(self, offset: int, limit: int) -> List[Tuple[int, int, int]]:
+        """Lista de (posicao, user_id, pontos) a partir de `offset`"""
+        with self._lock:
+            chaves = self._lista.fatia(offset, limit)
+        return [
+            (offset + i + 1, user_id, -pontos_negativos)
+            for i, (pontos_negativos, user_id) in enumerate(chaves)
+        ]
+
+    def pagina_apos(self, pontos: int, user_id: int, limit: int) -> List[Tuple[int, int, int]]:
+        """
+        Lista de (posicao, user_id, pontos) logo depois da chave (pontos, user_id),
+        que não precisa mais existir (paginação por cursor)
+        """
+        with self._lock:
+            # IDs são inteiros: as chaves <= (-pontos, user_id) são as < (-pontos, user_id + 1)
+            inicio = self._lista.contar_menores(self._chave(user_id + 1, pontos))
+            chaves = self._lista.fatia(inicio, limit)
+        return [
+            (inicio + i + 1, uid, -pontos_negativos)
+            for i, (pontos_negativos, uid) in enumerate(chaves)
+        ]
+
+    def top(self, n: int) -> List[Tuple[int, int, int]]:
+        return self.pagina(0, n)
+
+    def __len__(self):
+        return len(self._lista)
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Constrói o ranking e agenda a reconciliação (chamado no startup)"""
+        # A reconciliação também tenta construir de novo se a carga inicial falhar
+        if self.intervalo_reconciliacao > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_reconciliacao())
+        await run_in_threadpool(self.construir)
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    async def _loop_reconciliacao(self):
+        while True:
+            await asyncio.sleep(self.intervalo_reconciliacao)
+            try:
+                await run_in_threadpool(self.reconciliar if self.pronto else self.construir)
+            except Exception as e:
+                print(f"⚠️ Erro ao reconciliar ranking: {e}")
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do ranking em memória"""
+        return {
+            "pronto": self.pronto,
+            "usuarios": len(self._lista),
+            "grupos": len(self._grupos),
+            "total_atualizacoes": self._total_atualizacoes,
+            "total_reconciliacoes": self._total_reconciliacoes,
+            "total_divergencias_corrigidas": self._total_divergencias,
+            "ultima_reconciliacao": self._ultima_reconciliacao
+        }
+
+# Instância global
+leaderboard_global = Leaderboard(
+    intervalo_reconciliacao=settings.RANKING_RECONCILE_INTERVAL
+)
+
+# ==================== RANKING POR ÁREA ====================
+
+class RankingAreas:
+    """
+    Ranking por área (pontos de soluções aprovadas em problemas da área)
+    mantido em memória: uma skip list por área
+
+    - Construído a partir do banco no startup
+    - Cada aprovação soma os pontos na área do problema (`registrar`)
+    - Top-N e posição de um usuário na área em O(log n)
+    - Reconciliado periodicamente com o banco; uma área também é
+      recarregada quando um problema muda de área
+
+    Guarda todos os usuários (inclusive desativados): quem lê filtra os ativos.
+    Empates em pontos são desempatados pelo id do usuário (menor primeiro).
+    """
+
+    def __init__(self, intervalo_reconciliacao: int):
+        self.intervalo_reconciliacao = intervalo_reconciliacao
+        self.pronto = False
+
+        self._areas: Dict[str, SkipListIndexavel] = {}
+        self._totais: Dict[Tuple[str, int], Tuple[int, int, float]] = {}  # (area, user_id) -> (pontos, solucoes, soma_notas)
+        self._lock = threading.Lock()
+        self._tarefa = None
+
+        # Versão de cada alteração (mesma ideia do Leaderboard.reconciliar)
+        self._versao = 0
+        self._alterado_em = {}
+
+        # Métricas
+        self._total_registradas = 0
+        self._total_reconciliacoes = 0
+        self._total_divergencias = 0
+        self._ultima_reconciliacao = None
+
+    def _definir(self, area: str, user_id: int, total: Optional[Tuple[int, int, float]]):
+        atual = self._totais.get((area, user_id))
+        if atual == total:
+            return
+        lista = self._areas.get(area)
+        if atual is not None:
+            lista.remover(Leaderboard._chave(user_id, atual[0]))
+            del self._totais[(area, user_id)]
+        if total is not None:
+            if lista is None:
+                lista = self._areas[area] = SkipListIndexavel()
+            lista.inserir(Leaderboard._chave(user_id, total[0]))
+            self._totais[(area, user_id)] = total
+        if lista is not None and not len(lista):
+            del self._areas[area]
+
+    def registrar(self, area: str, user_id: int, pontos: int, nota: float):
+        """Soma uma solução aprovada na área do problema"""
+        if not area:
+            return
+        with self._lock:
+            atual = self._totais.get((area, user_id), (0, 0, 0.0))
+            self._definir(area, user_id, (atual[0] + (pontos or 0), atual[1] + 1, atual[2] + float(nota or 0)))
+            self._versao += 1
+            self._alterado_em[(area, user_id)] = self._versao
+            self._total_registradas += 1
+
+    # ---------- carga / reconciliação ----------
+
+    def _ler_banco(self, areas: Optional[List[str]] = None) -> Dict[Tuple[str, int], Tuple[int, int, float]]:
+        filtro, params = "", []
+        if areas:
+            filtro = f"AND p.area IN ({', '.join(['%s'] * len(areas))})"
+            params = list(areas)
+        with Database.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT
+                    p.area,
+                    s.user_id,
+                    SUM(s.pontos_ganhos) as pontos,
+                    COUNT(*) as solucoes,
+                    SUM(s.pontuacao_final) as soma_notas
+                FROM solucoes s
+                INNER JOIN problemas p ON p.id = s.problema_id
+                WHERE s.status = 'aprovada' {filtro}
+                GROUP BY p.area, s.user_id
+            """, params)
+            return {
+                (row['area'], row['user_id']): (int(row['pontos'] or 0), row['solucoes'], float(row['soma_notas'] or 0))
+                for row in cursor.fetchall()
+            }
+
+    def construir(self):
+        """Carrega o ranking do banco"""
+        banco = self._ler_banco()
+        with self._lock:
+            self._areas, self._totais = {}, {}
+            for (area, user_id), total in banco.items():
+                self._definir(area, user_id, total)
+            self._alterado_em.clear()
+            self.pronto = True
+
+    def reconciliar(self, areas: Optional[List[str]] = None) -> int:
+        """Compara com o banco (todas as áreas ou só `areas`) e corrige divergências"""
+        with self._lock:
+            versao_inicio = self._versao
+
+        banco = self._ler_banco(areas)
+        corrigidos = 0
+
+        with self._lock:
+            def mexido_depois(chave):
+                return self._alterado_em.get(chave, 0) > versao_inicio
+
+            na_memoria = [
+                chave for chave in self._totais
+                if areas is None or chave[0] in areas
+            ]
+            for chave in set(na_memoria) | set(banco):
+                if mexido_depois(chave) or self._totais.get(chave) == banco.get(chave):
+                    continue
+                self._definir(*chave, banco.get(chave))
+                corrigidos += 1
+
+            if areas is None:
+                self._alterado_em = {
+                    chave: v for chave, v in self._alterado_em.items() if v > versao_inicio
+                }
+                self._total_reconciliacoes += 1
+                self._ultima_reconciliacao = time.time()
+            self._total_divergencias += corrigidos
+
+        if corrigidos:
+            print(f"⚠️ Ranking por área reconciliado com o banco: {corrigidos} divergência(s)")
+        return corrigidos
+
+    def recarregar_areas(self, areas: List[str]):
+        """Recarrega só as `areas` do banco (um problema mudou de área); se falhar, fica para a reconciliação"""
+        if not self.pronto:
+            return
+        try:
+            self.reconciliar([area for area in areas if area])
+        except Exception as e:
+            print(f"⚠️ Erro ao recarregar o ranking das áreas {areas}: {e}")
+
+    # ---------- consultas ----------
+
+    def top(self, area: str, n: int) -> List[Tuple[int, int, int, float]]:
+        """Lista de (user_id, pontos, solucoes, media_nota) dos `n` primeiros da área"""
+        with self._lock:
+            lista = self._areas.get(area)
+            chaves = lista.fatia(0, n) if lista is not None else []
+            resultado = []
+            for _, user_id in chaves:
+                pontos, solucoes, soma_notas = self._totais[(area, user_id)]
+                resultado.append((user_id, pontos, solucoes, soma_notas / solucoes if solucoes else None))
+            return resultado
+
+    def posicao(self, area: str, user_id: int) -> Optional[int]:
+        """Posição do usuário na área (1 + quantos têm mais pontos), ou None se não pontuou nela"""
+        with self._lock:
+            total = self._totais.get((area, user_id))
+            if total is None:
+                return None
+            return self._areas[area].contar_menores((-total[0], float("-inf"))) + 1
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Constrói o ranking e agenda a reconciliação (chamado no startup)"""
+        if self.intervalo_reconciliacao > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_reconciliacao())
+        await run_in_threadpool(self.construir)
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    async def _loop_reconciliacao(self):
+        while True:
+            await asyncio.sleep(self.intervalo_reconciliacao)
+            try:
+                await run_in_threadpool(self.reconciliar if self.pronto else self.construir)
+            except Exception as e:
+                print(f"⚠️ Erro ao reconciliar ranking por área: {e}")
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do ranking por área em memória"""
+        with self._lock:
+            return {
+                "pronto": self.pronto,
+                "areas": len(self._areas),
+                "entradas": len(self._totais),
+                "total_registradas": self._total_registradas,
+                "total_reconciliacoes": self._total_reconciliacoes,
+                "total_divergencias_corrigidas": self._total_divergencias,
+                "ultima_reconciliacao": self._ultima_reconciliacao
+            }
+
+# Instância global
+ranking_areas = RankingAreas(
+    intervalo_reconciliacao=settings.RANKING_RECONCILE_INTERVAL
+)
+
+# ==================== RANKING SEMANAL ====================
+
+class JanelaSemanal:
+    """
+    Ranking dos últimos dias (janela deslizante) mantido em memória
+
+    - Um balde por dia com as soluções aprovadas naquele dia; os totais
+      de cada usuário são a soma dos baldes ainda dentro da janela
+    - Cada aprovação entra no balde do dia (`registrar`, idempotente por solução)
+    - Baldes que saem da janela são descontados dos totais e descartados
+    - O top-N é calculado com um heap (heapq.nlargest) só quando algo mudou;
+      as leituras seguintes usam a lista pronta
+    - Reconstruído periodicamente a partir do banco (corrige divergências)
+
+    A janela inclui hoje e os `dias` anteriores (mesmo corte de
+    `data_avaliacao >= CURDATE() - INTERVAL 7 DAY`). Empates em pontos
+    são desempatados pelo id do usuário (menor primeiro).
+    """
+
+    # Tamanho do top pré-calculado (limite do endpoint + folga para inativos)
+    TAMANHO_TOP = 250
+
+    def __init__(self, dias: int, intervalo_reconciliacao: int):
+        self.dias = dias
+        self.intervalo_reconciliacao = intervalo_reconciliacao
+        self.pronto = False
+
+        self._solucoes: Dict[int, Tuple[date, int, int, float]] = {}  # solucao_id -> (dia, user_id, pontos, nota)
+        self._baldes: Dict[date, set] = {}  # dia -> solucao_ids
+        self._totais: Dict[int, list] = {}  # user_id -> [pontos, solucoes, soma_notas]
+        self._top = None  # lista pronta (None = recalcular)
+        self._inicio_janela = None
+        self._lock = threading.Lock()
+        self._tarefa = None
+
+        # Soluções registradas durante a leitura do banco na reconciliação
+        self._registrando = None
+
+        # Métricas
+        self._total_registradas = 0
+        self._total_expiradas = 0
+        self._total_recalculos_top = 0
+        self._total_reconciliacoes = 0
+        self._ultima_reconciliacao = None
+
+    def _corte(self) -> date:
+        return date.today() - timedelta(days=self.dias)
+
+    # ---------- baldes ----------
+
+    def _somar(self, solucao_id: int, dia: date, user_id: int, pontos: int, nota: float):
+        if solucao_id in self._solucoes or dia < self._inicio_janela:
+            return
+        self._solucoes[solucao_id] = (dia, user_id, pontos, nota)
+        self._baldes.setdefault(dia, set()).add(solucao_id)
+        total = self._totais.setdefault(user_id, [0, 0, 0.0])
+        total[0] += pontos
+        total[1] += 1
+        total[2] += nota
+        self._top = None
+
+    def _subtrair(self, solucao_id: int):
+        _, user_id, pontos, nota = self._solucoes.pop(solucao_id)
+        total = self._totais[user_id]
+        total[0] -= pontos
+        total[1] -= 1
+        total[2] -= nota
+        if total[1] <= 0:
+            del self._totais[user_id]
+
+    def _expirar(self):
+        """Desconta e descarta os baldes que saíram da janela"""
+        corte = self._corte()
+        if self._inicio_janela == corte:
+            return
+        self._inicio_janela = corte
+        for dia in [d for d in self._baldes if d < corte]:
+            for solucao_id in self._baldes.pop(dia):
+                self._subtrair(solucao_id)
+                self._total_expiradas += 1
+            self._top = None
+
+    def registrar(self, solucao_id: int, user_id: int, pontos: int, nota: float, dia: Optional[date] = None):
+        """Soma uma solução aprovada no balde do dia (hoje, se `dia` não for passado)"""
+        registro = (solucao_id, dia or date.today(), user_id, pontos or 0, float(nota or 0))
+        with self._lock:
+            self._expirar()
+            self._somar(*registro)
+            if self._registrando is not None:
+                self._registrando.append(registro)
+            self._total_registradas += 1
+
+    # ---------- carga / reconciliação ----------
+
+    def _ler_banco(self) -> List[tuple]:
+        with Database.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, DATE(data_avaliacao) as dia, user_id, pontos_ganhos, pontuacao_final
+                FROM solucoes
+                WHERE status = 'aprovada'
+                    AND data_avaliacao >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+            """, (self.dias,))
+            return [
+                (row['id'], row['dia'], row['user_id'], row['pontos_ganhos'] or 0, float(row['pontuacao_final'] or 0))
+                for row in cursor.fetchall()
+            ]
+
+    def construir(self):
+        """(Re)constrói a janela a partir do banco"""
+        with self._lock:
+            self._registrando = []
+        try:
+            solucoes = self._ler_banco()
+        except Exception:
+            with self._lock:
+                self._registrando = None
+            raise
+
+        novo = JanelaSemanal(self.dias, 0)
+        novo._inicio_janela = novo._corte()
+        for registro in solucoes:
+            novo._somar(*registro)
+
+        with self._lock:
+            # Aprovações registradas durante a leitura (as que já estavam no banco são ignoradas)
+            for registro in self._registrando:
+                novo._somar(*registro)
+            self._registrando = None
+
+            divergencias = len(set(self._solucoes) ^ set(novo._solucoes)) if self.pronto else 0
+            self._solucoes, self._baldes, self._totais = novo._solucoes, novo._baldes, novo._totais
+            self._inicio_janela = novo._inicio_janela
+            self._top = None
+            self.pronto = True
+            self._total_reconciliacoes += 1
+            self._ultima_reconciliacao = time.time()
+
+        if divergencias:
+            print(f"⚠️ Ranking semanal reconciliado com o banco: {divergencias} solução(ões) divergentes")
+
+    # ---------- consultas ----------
+
+    def top(self, n: int) -> List[Tuple[int, int, int, float]]:
+        """Lista de (user_id, pontos, solucoes, media_nota) dos `n` primeiros"""
+        with self._lock:
+            self._expirar()
+            if self._top is None:
+                maiores = heapq.nlargest(
+                    self.TAMANHO_TOP,
+                    self._totais.items(),
+                    key=lambda item: (item[1][0], -item[0])
+                )
+                self._top = [
+                    (user_id, pontos, solucoes, soma_notas / solucoes)
+                    for user_id, (pontos, solucoes, soma_notas) in maiores
+                ]
+                self._total_recalculos_top += 1
+            return self._top[:n]
+
+    def __len__(self):
+        return len(self._totais)
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Constrói a janela e agenda a reconciliação (chamado no startup)"""
+        if self.intervalo_reconciliacao > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_reconciliacao())
+        await run_in_threadpool(self.construir)
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    async def _loop_reconciliacao(self):
+        while True:
+            await asyncio.sleep(self.intervalo_reconciliacao)
+            try:
+                await run_in_threadpool(self.construir)
+            except Exception as e:
+                print(f"⚠️ Erro ao reconciliar ranking semanal: {e}")
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do ranking semanal em memória"""
+        with self._lock:
+            return {
+                "pronto": self.pronto,
+                "usuarios": len(self._totais),
+                "solucoes": len(self._solucoes),
+                "dias": len(self._baldes),
+                "total_registradas": self._total_registradas,
+                "total_expiradas": self._total_expiradas,
+                "total_recalculos_top": self._total_recalculos_top,
+                "total_reconciliacoes": self._total_reconciliacoes,
+                "ultima_reconciliacao": self._ultima_reconciliacao
+            }
+
+# Instância global
+janela_semanal = JanelaSemanal(
+    dias=7,
+    intervalo_reconciliacao=settings.RANKING_RECONCILE_INTERVAL
+)
+
+# ==================== POSIÇÃO DO USUÁRIO ====================
+
+_POSICOES_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM users o
+         WHERE o.ativo = TRUE AND o.pontos_totais > u.pontos_totais) + 1 as posicao_global,
+        (SELECT COUNT(*) FROM users o
+         WHERE o.ativo = TRUE AND o.patente = u.patente
+           AND o.pontos_totais > u.pontos_totais) + 1 as posicao_patente,
+        (SELECT COUNT(*) FROM users o
+         WHERE o.ativo = TRUE AND o.area_interesse = u.area_interesse
+           AND o.pontos_totais > u.pontos_totais) + 1 as posicao_area,
+        u.area_interesse
+    FROM users u
+    WHERE u.id = %s
+"""
+
+def _posicoes_da_linha(row: Optional[dict]) -> dict:
+    row = row or {}
+    return {
+        "posicao_global": row.get('posicao_global'),
+        "total_global": None,
+        "posicao_patente": row.get('posicao_patente'),
+        "total_patente": None,
+        "posicao_area": row.get('posicao_area') if row.get('area_interesse') else None,
+        "total_area": None
+    }
+
+def posicoes_do_usuario(user_id: int, cursor) -> dict:
+    """
+    Posição global / na patente / na área do usuário
+    Usa o ranking em memória; se ele ainda não estiver pronto (ou o usuário
+    não estiver nele), calcula no banco com o `cursor` do endpoint.
+    """
+    if leaderboard_global.pronto:
+        posicoes = leaderboard_global.posicoes(user_id)
+        if posicoes is not None:
+            return posicoes
+
+    cursor.execute(_POSICOES_SQL, (user_id,))
+    return _posicoes_da_linha(cursor.fetchone())
+
+async def posicoes_do_usuario_async(user_id: int) -> dict:
+    """Igual a `posicoes_do_usuario`, para endpoints async (conexão própria do AsyncDatabase)"""
+    if leaderboard_global.pronto:
+        posicoes = leaderboard_global.posicoes(user_id)
+        if posicoes is not None:
+            return posicoes
+
+    async with AsyncDatabase.get_cursor() as cursor:
+        await cursor.execute(_POSICOES_SQL, (user_id,))
+        return _posicoes_da_linha(await cursor.fetchone())
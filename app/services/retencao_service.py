@@ -0,0 +1,306 @@
+#Retenção do log de atividades (arquivo particionado por mês + rollup diário)
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import Database
+
+# Tabelas criadas em migrations/005_retencao_logs_atividade.sql
+ARQUIVO = "logs_atividade_arquivo"
+COLUNAS = "id, user_id, empresa_id, tipo_usuario, acao, detalhes, ip_address, user_agent, created_at"
+
+def _inicio_mes(dia: date) -> date:
+    return dia.replace(day=1)
+
+def _proximo_mes(dia: date) -> date:
+    return (dia.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+class RetencaoAtividades:
+    """
+    Rodada periódica de manutenção do log de atividades
+
+    1. Garante partições mensais em `logs_atividade_arquivo` até o mês seguinte
+    2. Move de `logs_atividade` para o arquivo as linhas com mais de `dias_quentes`
+       (em lotes, cada um em sua transação)
+    3. Remove as partições do arquivo mais antigas que `dias_retencao`
+       (DROP PARTITION: sem DELETE linha a linha)
+    4. Poda o rollup `atividade_diaria` além de `dias_rollup`
+
+    Só uma instância da API executa a rodada por vez (GET_LOCK no MySQL).
+    """
+
+    # Linhas movidas por transação
+    LOTE = 5000
+    NOME_TRAVA = "nerus_retencao_logs_atividade"
+
+    def __init__(self, dias_quentes: int, dias_retencao: int, dias_rollup: int, intervalo: int):
+        self.dias_quentes = dias_quentes
+        self.dias_retencao = dias_retencao
+        self.dias_rollup = dias_rollup
+        self.intervalo = intervalo
+        self._tarefa = None
+
+        # Métricas
+        self._total_execucoes = 0
+        self._total_arquivadas = 0
+        self._total_particoes_criadas = 0
+        self._total_particoes_removidas = 0
+        self._total_rollup_removidos = 0
+        self._total_erros = 0
+        self._ultima_execucao = None
+
+    # ---------- rodada completa ----------
+
+    def executar(self) -> Optional[dict]:
+        """Executa uma rodada. Retorna o resumo (ou None se outra instância já está executando)."""
+        with Database.get_cursor() as trava:
+            trava.execute("SELECT GET_LOCK(%s, 0) AS ok", (self.NOME_TRAVA,))
+            if not trava.fetchone()['ok']:
+                return None
+            try:
+                resumo = {
+                    "particoes_criadas": self.criar_particoes(),
+                    "arquivadas": self.arquivar(),
+                    "particoes_removidas": self.remover_particoes_antigas(),
+                    "rollup_removidos": self.podar_rollup()
+                }
+            finally:
+                trava.execute("SELECT RELEASE_LOCK(%s)", (self.NOME_TRAVA,))
+                trava.fetchall()
+
+        self._total_execucoes += 1
+        self._ultima_execucao = time.time()
+        return resumo
+
+    # ---------- partições ----------
+
+    def _particoes(self, cursor) -> List[dict]:
+        cursor.execute("""
+            SELECT
+                PARTITION_NAME AS nome,
+                IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL,
+                   FROM_UNIXTIME(PARTITION_DESCRIPTION)) AS limite
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = %s
+                AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (ARQUIVO,))
+        return cursor.fetchall()
+
+    def criar_particoes(self, meses_a_frente: int = 1) -> int:
+        """Cria as partições mensais que faltam até `meses_a_frente` depois do mês atual"""
+        with Database.get_cursor() as cursor:
+            limites = [p['limite'] for p in self._particoes(cursor) if p['limite'] is not None]
+            if not limites:
+                return 0
+
+            inicio = max(limites).date()
+            fim = date.today()
+            for _ in range(meses_a_frente + 1):
+                fim = _proximo_mes(fim)
+
+            novas = []
+            mes = _inicio_mes(inicio)
+            while _proximo_mes(mes) <= fim:
+                limite = _proximo_mes(mes)
+                if limite > inicio:
+                    novas.append(
+                        f"PARTITION p{mes:%Y%m} VALUES LESS THAN "
+                        f"(UNIX_TIMESTAMP('{limite:%Y-%m-%d} 00:00:00'))"
+                    )
+                mes = limite
+
+            if not novas:
+                return 0
+
+            # p_futuro fica vazia enquanto houver partição para o mês corrente: reorganizar é barato
+            cursor.execute(
+                f"ALTER TABLE {ARQUIVO} REORGANIZE PARTITION p_futuro INTO ("
+                + ", ".join(novas)
+                + ", PARTITION p_futuro VALUES LESS THAN MAXVALUE)"
+            )
+
+        self._total_particoes_criadas += len(novas)
+        return len(novas)
+
+    def remover_particoes_antigas(self) -> int:
+        """Remove as partições cujo mês inteiro já passou do prazo de retenção"""
+        if self.dias_retencao <= 0:
+            return 0
+
+        corte = datetime.now() - timedelta(days=self.dias_retencao)
+        with Database.get_cursor() as cursor:
+            particoes = self._particoes(cursor)
+            antigas = [
+                p['nome'] for p in particoes
+                if p['limite'] is not None and p['limite'] <= corte
+            ]
+            # Mantém ao menos uma partição com limite além da p_futuro
+            if antigas and len(antigas) >= len(particoes) - 1:
+                antigas = antigas[:-1]
+            if not antigas:
+                return 0
+            cursor.execute(f"ALTER TABLE {ARQUIVO} DROP PARTITION {', '.join(antigas)}")
+
+        self._total_particoes_removidas += len(antigas)
+        return len(antigas)
+
+    # ---------- arquivamento ----------
+
+    def arquivar(self) -> int:
+        """Move as linhas antigas de logs_atividade para o arquivo. Retorna quantas foram movidas."""
+        if self.dias_quentes <= 0:
+            return 0
+
+        corte = datetime.now() - timedelta(days=self.dias_quentes)
+        total = 0
+        while True:
+            with Database.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT MAX(id) AS fim FROM (
+                        SELECT id FROM logs_atividade
+                        WHERE created_at < %s
+                        ORDER BY id
+                        LIMIT %s
+                    ) t
+                """, (corte, self.LOTE))
+                fim = cursor.fetchone()['fim']
+                if fim is None:
+                    break
+
+                cursor.execute(f"""
+                    INSERT INTO {ARQUIVO} ({COLUNAS})
+                    SELECT {COLUNAS} FROM logs_atividade
+                    WHERE id <= %s AND created_at < %s
+                """, (fim, corte))
+                cursor.execute("""
+                    DELETE FROM logs_atividade
+                    WHERE id <= %s AND created_at < %s
+                """, (fim, corte))
+                movidas = cursor.rowcount
+
+            total += movidas
+            self._total_arquivadas += movidas
+            if movidas < self.LOTE:
+                break
+        return total
+
+    # ---------- rollup ----------
+
+    def podar_rollup(self) -> int:
+        """Remove de atividade_diaria os dias além do prazo do rollup"""
+        if self.dias_rollup <= 0:
+            return 0
+
+        total = 0
+        while True:
+            with Database.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM atividade_diaria
+                    WHERE data < CURDATE() - INTERVAL %s DAY
+                    LIMIT %s
+                """, (self.dias_rollup, self.LOTE))
+                removidos = cursor.rowcount
+            total += removidos
+            if removidos < self.LOTE:
+                break
+
+        self._total_rollup_removidos += total
+        return total
+
+    def reconstruir_rollup(self, dias: int) -> int:
+        """
+        Recalcula atividade_diaria dos últimos `dias` a partir das linhas brutas
+        (logs_atividade + arquivo). Retorna quantos dias de usuário foram gravados.
+        """
+        with Database.get_cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM atividade_diaria WHERE data >= CURDATE() - INTERVAL %s DAY",
+                (dias,)
+            )
+            cursor.execute(f"""
+                INSERT INTO atividade_diaria (user_id, data, atividades)
+                SELECT l.user_id, DATE(l.created_at), COUNT(*)
+                FROM (
+                    SELECT user_id, tipo_usuario, created_at FROM logs_atividade
+                    UNION ALL
+                    SELECT user_id, tipo_usuario, created_at FROM {ARQUIVO}
+                ) l
+                INNER JOIN users u ON u.id = l.user_id
+                WHERE l.tipo_usuario = 'user'
+                    AND l.created_at >= CURDATE() - INTERVAL %s DAY
+                GROUP BY l.user_id, DATE(l.created_at)
+            """, (dias,))
+            return cursor.rowcount
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Agenda as rodadas periódicas (chamado no startup)"""
+        if self.intervalo > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_manutencao())
+
+    async def stop(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    async def _loop_manutencao(self):
+        while True:
+            try:
+                resumo = await run_in_threadpool(self.executar)
+                if resumo and any(resumo.values()):
+                    print(f"🗂️ Retenção do log de atividades: {resumo}")
+            except Exception as e:
+                self._total_erros += 1
+                print(f"⚠️ Erro na retenção do log de atividades: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas da retenção do log de atividades"""
+        return {
+            "total_execucoes": self._total_execucoes,
+            "total_arquivadas": self._total_arquivadas,
+            "total_particoes_criadas": self._total_particoes_criadas,
+            "total_particoes_removidas": self._total_particoes_removidas,
+            "total_rollup_removidos": self._total_rollup_removidos,
+            "total_erros": self._total_erros,
+            "ultima_execucao": self._ultima_execucao
+        }
+
+# Instância global
+retencao_atividades = RetencaoAtividades(
+    dias_quentes=settings.ACTIVITY_LOG_HOT_DAYS,
+    dias_retencao=settings.ACTIVITY_LOG_RETENTION_DAYS,
+    dias_rollup=settings.ACTIVITY_ROLLUP_RETENTION_DAYS,
+    intervalo=settings.ACTIVITY_LOG_MAINTENANCE_INTERVAL
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do log de atividades")
+    parser.add_argument(
+        "--reconstruir-rollup", type=int, metavar="DIAS",
+        help="Recalcula atividade_diaria dos últimos DIAS a partir do log bruto"
+    )
+    args = parser.parse_args()
+
+    if args.reconstruir_rollup:
+        gravados = retencao_atividades.reconstruir_rollup(args.reconstruir_rollup)
+        print(f"✅ Rollup reconstruído ({gravados} dia(s) de usuário)")
+        return
+
+    resumo = retencao_atividades.executar()
+    if resumo is None:
+        print("⚠️ Outra instância já está executando a retenção")
+    else:
+        print(f"✅ Retenção concluída: {resumo}")
+
+if __name__ == "__main__":
+    main()
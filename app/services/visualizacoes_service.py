@@ -0,0 +1,132 @@
+#Contador de visualizações de problemas (acumulado em memória)
+import asyncio
+import threading
+import time
+from typing import Dict
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import Database
+
+class ContadorVisualizacoes:
+    """
+    Acumula as visualizações por problema em memória e grava tudo de uma vez
+
+    - `registrar()` só incrementa um dicionário (nenhum acesso ao banco)
+    - A cada `intervalo` segundos, um único UPDATE ... CASE soma os
+      incrementos de todos os problemas vistos no período
+    - No shutdown os incrementos pendentes são gravados
+    - Se a gravação falhar, os incrementos voltam para a próxima rodada
+    """
+
+    # Problemas por UPDATE (limita o tamanho do CASE)
+    LOTE = 500
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._pendentes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._tarefa = None
+
+        # Métricas
+        self._total_registradas = 0
+        self._total_gravadas = 0
+        self._total_flushes = 0
+        self._total_erros = 0
+        self._ultimo_flush = None
+
+    def registrar(self, problema_id: int):
+        """Conta uma visualização do problema"""
+        with self._lock:
+            self._pendentes[problema_id] = self._pendentes.get(problema_id, 0) + 1
+            self._total_registradas += 1
+
+    def pendentes(self, problema_id: int) -> int:
+        """Visualizações ainda não gravadas no banco (para somar ao valor lido)"""
+        with self._lock:
+            return self._pendentes.get(problema_id, 0)
+
+    def flush(self) -> int:
+        """Grava os incrementos acumulados. Retorna quantas visualizações foram gravadas."""
+        with self._flush_lock:
+            with self._lock:
+                incrementos, self._pendentes = self._pendentes, {}
+            if not incrementos:
+                return 0
+
+            itens = list(incrementos.items())
+            gravadas = 0
+            try:
+                with Database.get_cursor() as cursor:
+                    for inicio in range(0, len(itens), self.LOTE):
+                        lote = itens[inicio:inicio + self.LOTE]
+                        casos = " ".join(["WHEN %s THEN %s"] * len(lote))
+                        placeholders = ", ".join(["%s"] * len(lote))
+                        params = [valor for item in lote for valor in item]
+                        params.extend(problema_id for problema_id, _ in lote)
+                        cursor.execute(f"""
+                            UPDATE problemas
+                            SET visualizacoes = visualizacoes + CASE id {casos} ELSE 0 END,
+                                updated_at = updated_at
+                            WHERE id IN ({placeholders})
+                        """, params)
+                        gravadas += sum(quantidade for _, quantidade in lote)
+            except Exception:
+                # A transação inteira foi desfeita: devolve tudo para a próxima rodada
+                with self._lock:
+                    for problema_id, quantidade in incrementos.items():
+                        self._pendentes[problema_id] = self._pendentes.get(problema_id, 0) + quantidade
+                    self._total_erros += 1
+                raise
+
+            with self._lock:
+                self._total_gravadas += gravadas
+                self._total_flushes += 1
+                self._ultimo_flush = time.time()
+            return gravadas
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self):
+        """Agenda a gravação periódica (chamado no startup)"""
+        if self.intervalo > 0 and self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._loop_flush())
+
+    async def stop(self):
+        """Para a gravação periódica e grava o que ficou pendente (shutdown)"""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+        try:
+            await run_in_threadpool(self.flush)
+        except Exception as e:
+            print(f"⚠️ Visualizações pendentes perdidas no shutdown: {e}")
+
+    async def _loop_flush(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar visualizações: {e}")
+
+    # ---------- métricas ----------
+
+    def stats(self) -> dict:
+        """Métricas do contador de visualizações"""
+        with self._lock:
+            return {
+                "problemas_pendentes": len(self._pendentes),
+                "visualizacoes_pendentes": sum(self._pendentes.values()),
+                "total_registradas": self._total_registradas,
+                "total_gravadas": self._total_gravadas,
+                "total_flushes": self._total_flushes,
+                "total_erros": self._total_erros,
+                "ultimo_flush": self._ultimo_flush
+            }
+
+# Instância global
+contador_visualizacoes = ContadorVisualizacoes(
+    intervalo=settings.VIEW_COUNTER_FLUSH_INTERVAL
+)
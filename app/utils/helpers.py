@@ -1 +1,116 @@
-#funções auxiliares
\ No newline at end of file
+#funções auxiliares
+import base64
+import html
+import json
+import re
+import unicodedata
+from datetime import datetime
+from typing import List
+
+# ==================== CURSOR DE PAGINAÇÃO ====================
+
+def codificar_cursor(valores: dict) -> str:
+    """
+    Codifica a posição da última linha de uma página em um cursor opaco
+    (base64 url-safe de um JSON). Datas viram 'YYYY-MM-DD HH:MM:SS'.
+    """
+    dados = {
+        chave: valor.strftime("%Y-%m-%d %H:%M:%S") if isinstance(valor, datetime) else valor
+        for chave, valor in valores.items()
+    }
+    bruto = json.dumps(dados, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, campos: dict) -> dict:
+    """
+    Decodifica um cursor gerado por `codificar_cursor`.
+    `campos` mapeia cada campo obrigatório ao tipo esperado: int, float
+    (aceita int) ou datetime (texto 'YYYY-MM-DD HH:MM:SS', devolvido como texto).
+    Levanta ValueError se o cursor for inválido, faltar campo ou o tipo não bater.
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor de paginação inválido") from e
+
+    if not isinstance(dados, dict):
+        raise ValueError("Cursor de paginação inválido")
+
+    for campo, tipo in campos.items():
+        valor = dados.get(campo)
+        if tipo is datetime:
+            try:
+                datetime.strptime(valor, "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError) as e:
+                raise ValueError("Cursor de paginação inválido") from e
+            continue
+        aceitos = (int, float) if tipo is float else (tipo,)
+        if isinstance(valor, bool) or not isinstance(valor, aceitos):
+            raise ValueError("Cursor de paginação inválido")
+    return dados
+
+
+# ==================== BUSCA TEXTUAL ====================
+
+# Termos menores que innodb_ft_min_token_size (padrão 3) não entram no índice FULLTEXT
+TAMANHO_MINIMO_TERMO = 3
+MAXIMO_TERMOS = 10
+
+
+def termos_busca(texto: str) -> List[str]:
+    """Palavras da busca, sem operadores e sem repetição (na ordem em que aparecem)"""
+    termos = []
+    for termo in re.findall(r"\w+", texto.lower()):
+        if len(termo) >= TAMANHO_MINIMO_TERMO and termo not in termos:
+            termos.append(termo)
+    return termos[:MAXIMO_TERMOS]
+
+
+def expressao_fulltext(termos: List[str]) -> str:
+    """Expressão para MATCH ... AGAINST (... IN BOOLEAN MODE): cada termo também casa como prefixo"""
+    return " ".join(f"{termo}*" for termo in termos)
+
+
+def sem_acentos(texto: str) -> str:
+    """
+    Minúsculas sem acentos, com o mesmo tamanho do texto original
+    (um caractere por caractere: "İ".lower() sozinho vira 2 e desloca os índices)
+    """
+    return "".join(unicodedata.normalize("NFD", c)[0].lower()[:1] for c in texto)
+
+
+def destacar_trecho(texto: str, termos: List[str], tamanho: int = 200) -> str:
+    """
+    Trecho de `texto` em volta da primeira ocorrência de algum termo, com as
+    ocorrências (ignorando maiúsculas e acentos) entre <mark></mark>.
+    O resto do texto é escapado (seguro para exibir como HTML).
+    """
+    if not texto:
+        return ""
+
+    padrao = None
+    if termos:
+        padrao = re.compile(
+            r"\b(" + "|".join(re.escape(sem_acentos(termo)) for termo in termos) + r")\w*"
+        )
+    normalizado = sem_acentos(texto)
+    primeira = padrao.search(normalizado) if padrao else None
+
+    # Janela de `tamanho` caracteres começando um pouco antes do primeiro termo
+    inicio = 0
+    if primeira and len(texto) > tamanho:
+        inicio = max(0, min(primeira.start() - tamanho // 4, len(texto) - tamanho))
+        espaco = texto.rfind(" ", 0, inicio + 1)
+        inicio = espaco + 1 if espaco > 0 and inicio - espaco < 20 else inicio
+    fim = min(len(texto), inicio + tamanho)
+
+    partes, posicao = [], inicio
+    for ocorrencia in (padrao.finditer(normalizado, inicio, fim) if padrao else []):
+        partes.append(html.escape(texto[posicao:ocorrencia.start()]))
+        partes.append(f"<mark>{html.escape(texto[ocorrencia.start():ocorrencia.end()])}</mark>")
+        posicao = ocorrencia.end()
+    partes.append(html.escape(texto[posicao:fim]))
+
+    return ("…" if inicio > 0 else "") + "".join(partes) + ("…" if fim < len(texto) else "")
@@ -0,0 +1,15 @@
+-- Cache persistente das análises AI (app/services/analise_cache.py)
+-- Aplicar com: mysql -u root -p nerus < migrations/001_cache_analises_ai.sql
+
+CREATE TABLE IF NOT EXISTS `cache_analises_ai` (
+  `chave` char(64) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `provider` varchar(20) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `modelo` varchar(60) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `analise` json NOT NULL,
+  `hits` int DEFAULT '0',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `ultimo_uso` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`chave`),
+  KEY `idx_created_at` (`created_at`),
+  KEY `idx_ultimo_uso` (`ultimo_uso`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,10 @@
+-- Índices para a paginação por cursor (keyset)
+-- GET /problemas/ : WHERE status = ? ORDER BY created_at DESC, id DESC
+-- GET /ranking/global (fallback SQL): WHERE ativo = TRUE ORDER BY pontos_totais DESC, id ASC
+-- Aplicar com: mysql -u root -p nerus < migrations/002_indices_paginacao.sql
+
+ALTER TABLE `problemas`
+  ADD KEY `idx_status_created` (`status`, `created_at`, `id`);
+
+ALTER TABLE `users`
+  ADD KEY `idx_ativo_pontos` (`ativo`, `pontos_totais` DESC, `id`);
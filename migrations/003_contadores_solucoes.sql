@@ -0,0 +1,105 @@
+-- Contadores de soluções desnormalizados em `problemas`
+-- Mantidos pelos triggers de `solucoes` (na mesma transação do INSERT/UPDATE/DELETE)
+-- Recalcular do zero: python -m app.services.contadores_service [--problema ID]
+-- Aplicar com: mysql -u root -p nerus < migrations/003_contadores_solucoes.sql
+
+ALTER TABLE `problemas`
+  ADD COLUMN `total_solucoes` int NOT NULL DEFAULT '0',
+  ADD COLUMN `solucoes_pendentes` int NOT NULL DEFAULT '0',
+  ADD COLUMN `solucoes_aprovadas` int NOT NULL DEFAULT '0',
+  ADD COLUMN `solucoes_avaliadas` int NOT NULL DEFAULT '0',
+  ADD COLUMN `soma_pontuacao` decimal(12,2) NOT NULL DEFAULT '0.00',
+  ADD COLUMN `media_pontuacao` decimal(5,2) GENERATED ALWAYS AS
+    (IF(`solucoes_avaliadas` > 0, `soma_pontuacao` / `solucoes_avaliadas`, NULL)) VIRTUAL;
+
+-- `updated_at = updated_at`: mexer nos contadores não conta como edição do problema
+
+DROP TRIGGER IF EXISTS `after_solucao_inserida`;
+DROP TRIGGER IF EXISTS `after_solucao_contadores`;
+DROP TRIGGER IF EXISTS `after_solucao_removida`;
+
+DELIMITER ;;
+
+CREATE TRIGGER `after_solucao_inserida` AFTER INSERT ON `solucoes` FOR EACH ROW BEGIN
+    UPDATE problemas
+    SET total_solucoes = total_solucoes + 1,
+        solucoes_pendentes = solucoes_pendentes + (NEW.status = 'em_analise'),
+        solucoes_aprovadas = solucoes_aprovadas + (NEW.status = 'aprovada'),
+        solucoes_avaliadas = solucoes_avaliadas + (NEW.pontuacao_final IS NOT NULL),
+        soma_pontuacao = soma_pontuacao + IFNULL(NEW.pontuacao_final, 0),
+        updated_at = updated_at
+    WHERE id = NEW.problema_id;
+END ;;
+
+CREATE TRIGGER `after_solucao_contadores` AFTER UPDATE ON `solucoes` FOR EACH ROW BEGIN
+    IF NOT (OLD.status <=> NEW.status
+            AND OLD.pontuacao_final <=> NEW.pontuacao_final
+            AND OLD.problema_id <=> NEW.problema_id) THEN
+        UPDATE problemas
+        SET total_solucoes = total_solucoes - 1,
+            solucoes_pendentes = solucoes_pendentes - (OLD.status = 'em_analise'),
+            solucoes_aprovadas = solucoes_aprovadas - (OLD.status = 'aprovada'),
+            solucoes_avaliadas = solucoes_avaliadas - (OLD.pontuacao_final IS NOT NULL),
+            soma_pontuacao = soma_pontuacao - IFNULL(OLD.pontuacao_final, 0),
+            updated_at = updated_at
+        WHERE id = OLD.problema_id;
+
+        UPDATE problemas
+        SET total_solucoes = total_solucoes + 1,
+            solucoes_pendentes = solucoes_pendentes + (NEW.status = 'em_analise'),
+            solucoes_aprovadas = solucoes_aprovadas + (NEW.status = 'aprovada'),
+            solucoes_avaliadas = solucoes_avaliadas + (NEW.pontuacao_final IS NOT NULL),
+            soma_pontuacao = soma_pontuacao + IFNULL(NEW.pontuacao_final, 0),
+            updated_at = updated_at
+        WHERE id = NEW.problema_id;
+    END IF;
+END ;;
+
+CREATE TRIGGER `after_solucao_removida` AFTER DELETE ON `solucoes` FOR EACH ROW BEGIN
+    UPDATE problemas
+    SET total_solucoes = total_solucoes - 1,
+        solucoes_pendentes = solucoes_pendentes - (OLD.status = 'em_analise'),
+        solucoes_aprovadas = solucoes_aprovadas - (OLD.status = 'aprovada'),
+        solucoes_avaliadas = solucoes_avaliadas - (OLD.pontuacao_final IS NOT NULL),
+        soma_pontuacao = soma_pontuacao - IFNULL(OLD.pontuacao_final, 0),
+        updated_at = updated_at
+    WHERE id = OLD.problema_id;
+END ;;
+
+DELIMITER ;
+
+-- Carga inicial (depois dos triggers, para não perder soluções criadas no meio)
+UPDATE problemas p
+LEFT JOIN (
+    SELECT
+        problema_id,
+        COUNT(*) AS total,
+        SUM(status = 'em_analise') AS pendentes,
+        SUM(status = 'aprovada') AS aprovadas,
+        COUNT(pontuacao_final) AS avaliadas,
+        SUM(pontuacao_final) AS soma
+    FROM solucoes
+    GROUP BY problema_id
+) c ON c.problema_id = p.id
+SET p.total_solucoes = IFNULL(c.total, 0),
+    p.solucoes_pendentes = IFNULL(c.pendentes, 0),
+    p.solucoes_aprovadas = IFNULL(c.aprovadas, 0),
+    p.solucoes_avaliadas = IFNULL(c.avaliadas, 0),
+    p.soma_pontuacao = IFNULL(c.soma, 0),
+    p.updated_at = p.updated_at;
+
+-- A view passa a ler os contadores (sem JOIN em solucoes)
+CREATE OR REPLACE VIEW `view_problemas_ativos` AS
+SELECT
+    p.id, p.empresa_id, p.titulo, p.descricao, p.contexto_empresa, p.area,
+    p.nivel_dificuldade, p.tipo, p.objetivos, p.requisitos, p.recursos_fornecidos,
+    p.prazo_dias, p.pontos_recompensa, p.oferece_certificado, p.premio_descricao,
+    p.criterios_avaliacao, p.status, p.data_inicio, p.data_fim, p.max_participantes,
+    p.visualizacoes, p.created_at, p.updated_at,
+    e.nome_empresa,
+    e.logo_url AS empresa_logo,
+    p.total_solucoes,
+    p.media_pontuacao AS media_pontuacao_solucoes
+FROM problemas p
+INNER JOIN empresas e ON p.empresa_id = e.id
+WHERE p.status = 'ativo' AND p.data_fim >= CURDATE();
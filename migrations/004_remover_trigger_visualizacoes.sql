@@ -0,0 +1,6 @@
+-- As visualizações de problemas passam a ser contadas em memória e gravadas
+-- em lote pela API (app/services/visualizacoes_service.py). O trigger em
+-- logs_atividade somaria de novo cada visualização.
+-- Aplicar com: mysql -u root -p nerus < migrations/004_remover_trigger_visualizacoes.sql
+
+DROP TRIGGER IF EXISTS `after_problema_visualizado`;
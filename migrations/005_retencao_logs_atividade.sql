@@ -0,0 +1,50 @@
+-- Retenção do log de atividades (app/services/retencao_service.py)
+--
+-- logs_atividade          : só os dias recentes (ACTIVITY_LOG_HOT_DAYS), com as FKs
+-- logs_atividade_arquivo  : linhas antigas, particionadas por mês (sem FKs: o InnoDB
+--                           não permite FKs em tabelas particionadas); partições mais
+--                           antigas que ACTIVITY_LOG_RETENTION_DAYS são removidas
+-- atividade_diaria        : um registro por usuário e dia com atividade, mantido pelo
+--                           gravador do log (app/services/atividade_service.py)
+--
+-- Aplicar com: mysql -u root -p nerus < migrations/005_retencao_logs_atividade.sql
+-- (antes de subir a versão da API que grava o rollup)
+
+CREATE TABLE IF NOT EXISTS `atividade_diaria` (
+  `user_id` int NOT NULL,
+  `data` date NOT NULL,
+  `atividades` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`user_id`, `data`),
+  KEY `idx_data` (`data`, `user_id`),
+  CONSTRAINT `atividade_diaria_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `logs_atividade_arquivo` (
+  `id` int NOT NULL,
+  `user_id` int DEFAULT NULL,
+  `empresa_id` int DEFAULT NULL,
+  `tipo_usuario` enum('user','empresa') COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `acao` varchar(100) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `detalhes` json DEFAULT NULL,
+  `ip_address` varchar(45) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `user_agent` text COLLATE utf8mb4_unicode_ci,
+  `created_at` timestamp NOT NULL,
+  PRIMARY KEY (`id`, `created_at`),
+  KEY `idx_user_data` (`user_id`, `created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE (UNIX_TIMESTAMP(`created_at`)) (
+  PARTITION `p_antigo` VALUES LESS THAN (UNIX_TIMESTAMP('2025-01-01 00:00:00')),
+  PARTITION `p_futuro` VALUES LESS THAN MAXVALUE
+);
+
+-- Histórico recente do usuário (GET /users/me/atividades, dashboard)
+ALTER TABLE `logs_atividade`
+  ADD KEY `idx_user_data` (`user_id`, `created_at`);
+
+-- Carga inicial do rollup
+INSERT INTO `atividade_diaria` (user_id, data, atividades)
+SELECT user_id, DATE(created_at), COUNT(*)
+FROM logs_atividade
+WHERE tipo_usuario = 'user' AND user_id IS NOT NULL AND created_at IS NOT NULL
+GROUP BY user_id, DATE(created_at)
+ON DUPLICATE KEY UPDATE atividades = VALUES(atividades);
@@ -0,0 +1,35 @@
+-- Ranking mensal materializado (app/services/ranking_mensal_service.py)
+-- Cada aprovação soma na linha do mês; posicao_ranking é recalculada em lote por mês
+-- GET /ranking/mensal : WHERE ano = ? AND mes = ? ORDER BY posicao_ranking
+-- Reconstruir um mês: python -m app.services.ranking_mensal_service --ano A --mes M (ou --todos)
+-- Aplicar com: mysql -u root -p nerus < migrations/006_ranking_mensal.sql
+
+ALTER TABLE `ranking_mensal`
+  ADD KEY `idx_posicao` (`ano`, `mes`, `posicao_ranking`);
+
+-- Reconstrução de um mês: WHERE status = 'aprovada' AND data_avaliacao no intervalo
+ALTER TABLE `solucoes`
+  ADD KEY `idx_status_avaliacao` (`status`, `data_avaliacao`);
+
+-- Carga inicial a partir das soluções aprovadas
+DELETE FROM `ranking_mensal`;
+
+INSERT INTO `ranking_mensal` (user_id, mes, ano, pontos_mes, problemas_resolvidos)
+SELECT user_id, MONTH(data_avaliacao), YEAR(data_avaliacao), SUM(pontos_ganhos), COUNT(*)
+FROM solucoes
+WHERE status = 'aprovada' AND data_avaliacao IS NOT NULL
+GROUP BY user_id, YEAR(data_avaliacao), MONTH(data_avaliacao);
+
+UPDATE `ranking_mensal` rm
+INNER JOIN (
+  SELECT
+    r.id,
+    ROW_NUMBER() OVER (
+      PARTITION BY r.ano, r.mes
+      ORDER BY r.pontos_mes DESC, r.problemas_resolvidos DESC, r.user_id
+    ) AS posicao
+  FROM ranking_mensal r
+  INNER JOIN users u ON u.id = r.user_id
+  WHERE u.ativo = TRUE
+) p ON p.id = rm.id
+SET rm.posicao_ranking = p.posicao;
@@ -0,0 +1,62 @@
+-- Contador de problemas ativos desnormalizado em `empresas`
+-- Mantido pelos triggers de `problemas` (na mesma transação do INSERT/UPDATE/DELETE)
+-- GET /empresas : ORDER BY problemas_ativos DESC, id com busca por cursor no índice
+-- Aplicar com: mysql -u root -p nerus < migrations/007_problemas_ativos_empresas.sql
+
+ALTER TABLE `empresas`
+  ADD COLUMN `problemas_ativos` int NOT NULL DEFAULT '0',
+  ADD KEY `idx_ativo_problemas` (`ativo`, `problemas_ativos` DESC, `id`);
+
+-- `updated_at = updated_at`: mexer no contador não conta como edição da empresa
+
+DROP TRIGGER IF EXISTS `after_problema_inserido`;
+DROP TRIGGER IF EXISTS `after_problema_status`;
+DROP TRIGGER IF EXISTS `after_problema_removido`;
+
+DELIMITER ;;
+
+CREATE TRIGGER `after_problema_inserido` AFTER INSERT ON `problemas` FOR EACH ROW BEGIN
+    IF NEW.status = 'ativo' THEN
+        UPDATE empresas
+        SET problemas_ativos = problemas_ativos + 1,
+            updated_at = updated_at
+        WHERE id = NEW.empresa_id;
+    END IF;
+END ;;
+
+CREATE TRIGGER `after_problema_status` AFTER UPDATE ON `problemas` FOR EACH ROW BEGIN
+    IF NOT ((OLD.status = 'ativo') <=> (NEW.status = 'ativo')
+            AND OLD.empresa_id <=> NEW.empresa_id) THEN
+        UPDATE empresas
+        SET problemas_ativos = problemas_ativos - (OLD.status = 'ativo'),
+            updated_at = updated_at
+        WHERE id = OLD.empresa_id;
+
+        UPDATE empresas
+        SET problemas_ativos = problemas_ativos + (NEW.status = 'ativo'),
+            updated_at = updated_at
+        WHERE id = NEW.empresa_id;
+    END IF;
+END ;;
+
+CREATE TRIGGER `after_problema_removido` AFTER DELETE ON `problemas` FOR EACH ROW BEGIN
+    IF OLD.status = 'ativo' THEN
+        UPDATE empresas
+        SET problemas_ativos = problemas_ativos - 1,
+            updated_at = updated_at
+        WHERE id = OLD.empresa_id;
+    END IF;
+END ;;
+
+DELIMITER ;
+
+-- Carga inicial (depois dos triggers, para não perder problemas criados no meio)
+UPDATE empresas e
+LEFT JOIN (
+    SELECT empresa_id, COUNT(*) AS ativos
+    FROM problemas
+    WHERE status = 'ativo'
+    GROUP BY empresa_id
+) c ON c.empresa_id = e.id
+SET e.problemas_ativos = IFNULL(c.ativos, 0),
+    e.updated_at = e.updated_at;
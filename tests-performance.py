@@ -0,0 +1,548 @@
+"""
+Script de Benchmarks - NERUS Platform
+Mede a performance de endpoints críticos contra uma API em execução.
+
+Uso:
+    python tests-performance.py                  # todos os benchmarks
+    python tests-performance.py concorrencia     # apenas um benchmark
+
+Para comparar antes/depois de uma mudança, rode o mesmo benchmark
+com a versão antiga e a nova da API e compare os números.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import requests
+import httpx
+from datetime import datetime, timedelta
+
+# Configurações
+BASE_URL = "http://localhost:8000"
+API_URL = f"{BASE_URL}/api/v1"
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+def print_header(titulo):
+    """Imprime cabeçalho de um benchmark"""
+    print(f"\n{Colors.BLUE}{'='*60}")
+    print(titulo)
+    print(f"{'='*60}{Colors.END}\n")
+
+def print_result(name, valor):
+    """Imprime uma linha de resultado"""
+    print(f"{Colors.GREEN}📊 {name}:{Colors.END} {valor}")
+
+def percentil(valores, p):
+    """Percentil p (0-100) de uma lista de valores"""
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+def resumo_latencias(latencias):
+    """Resumo (ms) de uma lista de latências em segundos"""
+    ms = [l * 1000 for l in latencias]
+    return (
+        f"média {statistics.mean(ms):.1f}ms | p50 {percentil(ms, 50):.1f}ms | "
+        f"p99 {percentil(ms, 99):.1f}ms | max {max(ms):.1f}ms"
+    ) if ms else "sem amostras"
+
+# ==================== PREPARAÇÃO ====================
+
+def criar_conta(tipo):
+    """Registra, verifica e faz login de um user/empresa. Retorna (token, email)."""
+    timestamp = datetime.now().timestamp()
+
+    if tipo == "user":
+        email = f"bench_user_{timestamp}@email.com"
+        dados = {
+            "nome_completo": "Benchmark User",
+            "email": email,
+            "senha": "bench123",
+            "area_interesse": "Tecnologia"
+        }
+        response = requests.post(f"{API_URL}/auth/register/user", json=dados)
+    else:
+        email = f"bench_empresa_{timestamp}@empresa.ao"
+        dados = {
+            "nome_empresa": "Benchmark Empresa Lda",
+            "email_corporativo": email,
+            "senha": "bench123",
+            "nif": f"B{int(timestamp * 1000)}"
+        }
+        response = requests.post(f"{API_URL}/auth/register/empresa", json=dados)
+
+    response.raise_for_status()
+    requests.post(
+        f"{API_URL}/auth/verify-email",
+        json={"token": response.json()["verification_token"]}
+    )
+
+    response = requests.post(f"{API_URL}/auth/login", json={
+        "email": email,
+        "senha": "bench123",
+        "tipo_usuario": tipo
+    })
+    response.raise_for_status()
+    return response.json()["access_token"], email
+
+def criar_problemas(token_empresa, quantidade):
+    """Cria `quantidade` problemas e retorna os IDs"""
+    headers = {"Authorization": f"Bearer {token_empresa}"}
+    hoje = datetime.now().date()
+    fim = (datetime.now() + timedelta(days=30)).date()
+    ids = []
+
+    for i in range(quantidade):
+        response = requests.post(f"{API_URL}/problemas/", headers=headers, json={
+            "titulo": f"Problema de benchmark número {i}",
+            "descricao": "Problema criado automaticamente pelo script de benchmarks para medir a performance da API.",
+            "area": "Tecnologia",
+            "nivel_dificuldade": "intermediario",
+            "data_inicio": str(hoje),
+            "data_fim": str(fim)
+        })
+        response.raise_for_status()
+        ids.append(response.json()["problema_id"])
+
+    return ids
+
+# ==================== BENCHMARK: CONCORRÊNCIA ====================
+
+async def _submeter_concorrente(token, problemas_ids):
+    """Submete uma solução por problema, todas ao mesmo tempo"""
+    headers = {"Authorization": f"Bearer {token}"}
+    descricao = "Solução de benchmark. " * 10
+    latencias = []
+
+    async with httpx.AsyncClient(base_url=API_URL, timeout=120) as client:
+        async def submeter(problema_id):
+            inicio = time.perf_counter()
+            response = await client.post("/solucoes/", headers=headers, json={
+                "problema_id": problema_id,
+                "descricao_solucao": descricao
+            })
+            latencias.append(time.perf_counter() - inicio)
+            return response.status_code
+
+        async def health():
+            # Requisições leves concorrentes: ficam presas se o event loop bloquear
+            inicio = time.perf_counter()
+            await client.get(f"{BASE_URL}/health")
+            return time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(
+            *[submeter(pid) for pid in problemas_ids],
+            *[health() for _ in problemas_ids]
+        )
+        duracao = time.perf_counter() - inicio
+
+    status_codes = resultados[:len(problemas_ids)]
+    health_latencias = resultados[len(problemas_ids):]
+    return duracao, latencias, health_latencias, status_codes
+
+def bench_concorrencia(n=50):
+    """
+    Throughput de POST /solucoes/ com `n` requisições concorrentes,
+    misturadas com GET /health para detectar bloqueio do event loop
+    """
+    print_header(f"BENCHMARK: CONCORRÊNCIA EM POST /solucoes/ ({n} requisições)")
+
+    token_empresa, _ = criar_conta("empresa")
+    token_user, _ = criar_conta("user")
+    problemas_ids = criar_problemas(token_empresa, n)
+
+    duracao, latencias, health_latencias, status_codes = asyncio.run(
+        _submeter_concorrente(token_user, problemas_ids)
+    )
+
+    sucesso = sum(1 for s in status_codes if s == 201)
+    print_result("Submissões com sucesso", f"{sucesso}/{n}")
+    print_result("Throughput", f"{n / duracao:.1f} req/s ({duracao:.2f}s no total)")
+    print_result("Latência POST /solucoes/", resumo_latencias(latencias))
+    print_result("Latência GET /health (concorrente)", resumo_latencias(health_latencias))
+
+# ==================== BENCHMARK: CUSTO DE AUTENTICAÇÃO ====================
+
+def bench_auth(n=5000):
+    """
+    Microbenchmark local (sem API) do custo de verify_token por requisição:
+    decodificação completa (cache vazio) vs token já verificado (cache)
+    """
+    print_header(f"BENCHMARK: CUSTO DE AUTENTICAÇÃO ({n} verificações)")
+
+    from app.core import security
+
+    token = security.create_access_token({"sub": "1", "email": "bench@email.com", "tipo": "user"})
+
+    for nome, backend in security.JWT_BACKENDS.items():
+        try:
+            backend(token)
+        except ImportError:
+            print(f"{Colors.YELLOW}Backend {nome} não instalado, ignorando{Colors.END}")
+            continue
+
+        inicio = time.perf_counter()
+        for _ in range(n):
+            backend(token)
+        sem_cache = (time.perf_counter() - inicio) / n
+        print_result(f"Decodificação completa ({nome})", f"{sem_cache * 1e6:.1f}µs por requisição")
+
+    security.token_cache.clear()
+    security.verify_token(token)
+    inicio = time.perf_counter()
+    for _ in range(n):
+        security.verify_token(token)
+    com_cache = (time.perf_counter() - inicio) / n
+    print_result("verify_token com cache", f"{com_cache * 1e6:.1f}µs por requisição")
+
+# ==================== BENCHMARK: LOGIN SOB CARGA ====================
+
+async def _carga_login(email, logins, leituras):
+    """Dispara `logins` logins e `leituras` GETs não relacionados ao mesmo tempo"""
+    latencias = {"login": [], "leitura": []}
+    status_codes = {"login": [], "leitura": []}
+
+    limites = httpx.Limits(max_connections=logins + leituras)
+    async with httpx.AsyncClient(base_url=API_URL, timeout=120, limits=limites) as client:
+        async def login():
+            inicio = time.perf_counter()
+            response = await client.post("/auth/login", json={
+                "email": email,
+                "senha": "bench123",
+                "tipo_usuario": "user"
+            })
+            latencias["login"].append(time.perf_counter() - inicio)
+            status_codes["login"].append(response.status_code)
+
+        async def leitura():
+            inicio = time.perf_counter()
+            response = await client.get("/ranking/global", params={"limit": 10})
+            latencias["leitura"].append(time.perf_counter() - inicio)
+            status_codes["leitura"].append(response.status_code)
+
+        await asyncio.gather(
+            *[login() for _ in range(logins)],
+            *[leitura() for _ in range(leituras)]
+        )
+
+    return latencias, status_codes
+
+def bench_login(logins=100, leituras=100):
+    """
+    Teste de carga: rajada de logins (argon2) misturada com leituras
+    não relacionadas. Mostra p99 de cada tipo e quantos logins
+    receberam 503 pelo controle de admissão do pool de hashing.
+    """
+    print_header(f"BENCHMARK: LOGIN SOB CARGA ({logins} logins + {leituras} leituras)")
+
+    _, email = criar_conta("user")
+    latencias, status_codes = asyncio.run(_carga_login(email, logins, leituras))
+
+    ok = sum(1 for s in status_codes["login"] if s == 200)
+    recusados = sum(1 for s in status_codes["login"] if s == 503)
+    print_result("Logins", f"{ok} ok | {recusados} recusados (503)")
+    print_result("Latência login", resumo_latencias(latencias["login"]))
+    print_result("Latência leituras", resumo_latencias(latencias["leitura"]))
+
+# ==================== BENCHMARK: STREAM DA ANÁLISE (SSE) ====================
+
+def bench_stream(n=10):
+    """
+    Tempo até o primeiro byte vs. tempo total de POST /solucoes/stream
+    (análise AI enviada por Server-Sent Events)
+    """
+    print_header(f"BENCHMARK: STREAM DA ANÁLISE AI ({n} submissões)")
+
+    token_empresa, _ = criar_conta("empresa")
+    token_user, _ = criar_conta("user")
+    problemas_ids = criar_problemas(token_empresa, n)
+    headers = {"Authorization": f"Bearer {token_user}"}
+
+    primeiro_byte, totais, eventos = [], [], []
+    with httpx.Client(base_url=API_URL, timeout=120) as client:
+        for problema_id in problemas_ids:
+            inicio = time.perf_counter()
+            with client.stream("POST", "/solucoes/stream", headers=headers, json={
+                "problema_id": problema_id,
+                "descricao_solucao": "Solução de benchmark (stream). " * 10
+            }) as response:
+                recebidos = 0
+                for linha in response.iter_lines():
+                    if not linha.startswith("event:"):
+                        continue
+                    if recebidos == 0:
+                        primeiro_byte.append(time.perf_counter() - inicio)
+                    recebidos += 1
+            totais.append(time.perf_counter() - inicio)
+            eventos.append(recebidos)
+
+    print_result("Eventos por stream", f"média {statistics.mean(eventos):.1f}")
+    print_result("Tempo até o primeiro evento", resumo_latencias(primeiro_byte))
+    print_result("Tempo total do stream", resumo_latencias(totais))
+
+# ==================== BENCHMARK: PAGINAÇÃO (OFFSET VS CURSOR) ====================
+
+def _tempo_pagina(client, rota, params, repeticoes):
+    """Latências de `repeticoes` GETs da mesma página"""
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        client.get(rota, params=params).raise_for_status()
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+def _cursor_da_pagina(client, rota, limit, pagina):
+    """Percorre as páginas seguindo X-Next-Cursor e devolve o cursor da `pagina`"""
+    proximo = None
+    for _ in range(pagina - 1):
+        params = {"limit": limit}
+        if proximo:
+            params["cursor"] = proximo
+        proximo = client.get(rota, params=params).headers.get("X-Next-Cursor")
+        if not proximo:
+            return None
+    return proximo
+
+def bench_paginacao(limit=20, paginas=(1, 1000), repeticoes=20):
+    """
+    Latência da mesma página via `offset` e via cursor (X-Next-Cursor)
+    em GET /problemas/ e GET /ranking/global. Páginas que não existem
+    na base atual são ignoradas.
+    """
+    print_header(f"BENCHMARK: PAGINAÇÃO OFFSET VS CURSOR (limit={limit})")
+
+    with httpx.Client(base_url=API_URL, timeout=120) as client:
+        for rota in ("/problemas/", "/ranking/global"):
+            for pagina in paginas:
+                offset = (pagina - 1) * limit
+                if pagina > 1 and not client.get(rota, params={"limit": 1, "offset": offset}).json():
+                    print(f"{Colors.YELLOW}{rota}: página {pagina} não existe, ignorando{Colors.END}")
+                    continue
+
+                por_offset = _tempo_pagina(client, rota, {"limit": limit, "offset": offset}, repeticoes)
+                print_result(f"{rota} página {pagina} (offset)", resumo_latencias(por_offset))
+
+                params = {"limit": limit}
+                if pagina > 1:
+                    params["cursor"] = _cursor_da_pagina(client, rota, limit, pagina)
+                por_cursor = _tempo_pagina(client, rota, params, repeticoes)
+                print_result(f"{rota} página {pagina} (cursor)", resumo_latencias(por_cursor))
+
+# ==================== BENCHMARK: DASHBOARD DO USUÁRIO ====================
+
+async def _medir_dashboard(n):
+    """Latências de get_user_dashboard em sequência, concorrente e com cache parcial"""
+    import types
+    from app.core.async_database import AsyncDatabase
+    from app.services.ranking_service import leaderboard_global
+    from app.api.v1.endpoints import dashboard
+
+    async def em_sequencia(*corrotinas):
+        return [await corrotina for corrotina in corrotinas]
+
+    await AsyncDatabase.open()
+    try:
+        leaderboard_global.construir()
+        async with AsyncDatabase.get_cursor() as cursor:
+            await cursor.execute("SELECT id FROM users WHERE ativo = TRUE ORDER BY pontos_totais DESC LIMIT 1")
+            usuario = await cursor.fetchone()
+        if usuario is None:
+            return None
+        current_user = {"id": usuario["id"], "tipo_usuario": "user"}
+
+        async def medir(sem_cache):
+            latencias = []
+            for _ in range(n):
+                if sem_cache:
+                    dashboard.dashboard_cache.clear()
+                inicio = time.perf_counter()
+                await dashboard.get_user_dashboard(current_user=current_user)
+                latencias.append(time.perf_counter() - inicio)
+            return latencias
+
+        # Mesmas consultas, uma depois da outra (como na versão com um único cursor)
+        dashboard.asyncio = types.SimpleNamespace(gather=em_sequencia)
+        try:
+            sequencial = await medir(sem_cache=True)
+        finally:
+            dashboard.asyncio = asyncio
+        concorrente = await medir(sem_cache=True)
+        com_cache = await medir(sem_cache=False)
+        return sequencial, concorrente, com_cache
+    finally:
+        await AsyncDatabase.close()
+
+def bench_dashboard(n=50):
+    """
+    Microbenchmark no próprio processo (precisa do MySQL, não da API):
+    montagem de GET /dashboard/user/overview com as consultas em sequência
+    vs. concorrentes vs. concorrentes com o cache parcial por usuário
+    """
+    print_header(f"BENCHMARK: DASHBOARD DO USUÁRIO ({n} montagens)")
+
+    resultado = asyncio.run(_medir_dashboard(n))
+    if resultado is None:
+        print(f"{Colors.YELLOW}Nenhum usuário ativo no banco, ignorando{Colors.END}")
+        return
+
+    sequencial, concorrente, com_cache = resultado
+    print_result("Consultas em sequência", resumo_latencias(sequencial))
+    print_result("Consultas concorrentes", resumo_latencias(concorrente))
+    print_result("Concorrentes + cache parcial", resumo_latencias(com_cache))
+
+# ==================== BENCHMARK: BUSCA (FULLTEXT VS LIKE) ====================
+
+PALAVRAS_BUSCA = (
+    "análise dados vendas clientes logística estoque previsão demanda marketing "
+    "digital aplicativo mobile plataforma integração pagamentos segurança rede "
+    "automação processos inteligência artificial modelo recomendação painel "
+    "indicadores financeiro custos energia sustentabilidade reciclagem saúde "
+    "atendimento chatbot cadastro relatório nuvem migração banco consultas"
+).split()
+
+def _semear_corpus_busca(cursor, tabela, quantidade, rng):
+    """Cria `tabela` (mesmas colunas e índice FULLTEXT de problemas) com `quantidade` textos gerados"""
+    cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+    cursor.execute(f"""
+        CREATE TABLE {tabela} (
+            id int NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            titulo varchar(255) NOT NULL,
+            descricao text NOT NULL,
+            FULLTEXT KEY idx_fulltext (titulo, descricao)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    linhas = [
+        (
+            " ".join(rng.choices(PALAVRAS_BUSCA, k=6)).capitalize(),
+            " ".join(rng.choices(PALAVRAS_BUSCA, k=120)).capitalize() + "."
+        )
+        for _ in range(quantidade)
+    ]
+    for inicio in range(0, quantidade, 1000):
+        cursor.executemany(
+            f"INSERT INTO {tabela} (titulo, descricao) VALUES (%s, %s)",
+            linhas[inicio:inicio + 1000]
+        )
+
+def bench_busca(quantidade=20000, repeticoes=20, limit=20):
+    """
+    Microbenchmark no próprio processo (precisa do MySQL, não da API):
+    a mesma busca via MATCH ... AGAINST, via LIKE '%termo%' em título e
+    descrição e no índice invertido em memória (BM25), sobre um corpus
+    gerado numa tabela temporária (removida no fim)
+    """
+    import random
+    from app.core.database import Database
+    from app.services.busca_service import IndiceProblemas
+    from app.utils.helpers import expressao_fulltext, termos_busca
+
+    print_header(f"BENCHMARK: BUSCA FULLTEXT VS LIKE VS MEMÓRIA ({quantidade} problemas)")
+
+    tabela = "bench_busca_problemas"
+    rng = random.Random(42)
+    buscas = ["análise de dados", "previsão demanda estoque", "chatbot atendimento", "migração nuvem"]
+
+    with Database.get_cursor() as cursor:
+        _semear_corpus_busca(cursor, tabela, quantidade, rng)
+    try:
+        # Mesmo corpus no índice em memória (como GET /problemas/search com o índice pronto)
+        indice = IndiceProblemas(0)
+        with Database.get_cursor() as cursor:
+            cursor.execute(f"SELECT id, titulo, descricao FROM {tabela}")
+            for linha in cursor.fetchall():
+                indice._adicionar(linha)
+
+        with Database.get_cursor() as cursor:
+            for busca in buscas:
+                termos = termos_busca(busca)
+
+                fulltext = []
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    cursor.execute(f"""
+                        SELECT id, MATCH(titulo, descricao) AGAINST (%s IN BOOLEAN MODE) as relevancia
+                        FROM {tabela}
+                        WHERE MATCH(titulo, descricao) AGAINST (%s IN BOOLEAN MODE)
+                        ORDER BY relevancia DESC, id DESC
+                        LIMIT %s
+                    """, (expressao_fulltext(termos),) * 2 + (limit,))
+                    cursor.fetchall()
+                    fulltext.append(time.perf_counter() - inicio)
+
+                condicoes = " OR ".join(["titulo LIKE %s OR descricao LIKE %s"] * len(termos))
+                like = []
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    cursor.execute(f"""
+                        SELECT id FROM {tabela}
+                        WHERE {condicoes}
+                        ORDER BY id DESC
+                        LIMIT %s
+                    """, [f"%{termo}%" for termo in termos for _ in range(2)] + [limit])
+                    cursor.fetchall()
+                    like.append(time.perf_counter() - inicio)
+
+                memoria = []
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    indice.buscar(busca, limit)
+                    memoria.append(time.perf_counter() - inicio)
+
+                print_result(f'"{busca}" (FULLTEXT)', resumo_latencias(fulltext))
+                print_result(f'"{busca}" (LIKE)', resumo_latencias(like))
+                print_result(f'"{busca}" (índice em memória)', resumo_latencias(memoria))
+    finally:
+        with Database.get_cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+        Database.pool.close()
+
+# ==================== MAIN ====================
+
+BENCHMARKS = {
+    "concorrencia": bench_concorrencia,
+    "auth": bench_auth,
+    "login": bench_login,
+    "stream": bench_stream,
+    "paginacao": bench_paginacao,
+    "dashboard": bench_dashboard,
+    "busca": bench_busca,
+}
+
+# Benchmarks que rodam no próprio processo (não precisam da API no ar)
+BENCHMARKS_LOCAIS = {"auth", "dashboard", "busca"}
+
+def main():
+    """Executar os benchmarks"""
+    print(f"\n{Colors.GREEN}{'='*60}")
+    print(f"⏱️  NERUS PLATFORM - BENCHMARKS")
+    print(f"{'='*60}{Colors.END}\n")
+
+    escolhidos = sys.argv[1:] or list(BENCHMARKS)
+
+    if any(nome not in BENCHMARKS_LOCAIS for nome in escolhidos):
+        try:
+            requests.get(f"{BASE_URL}/health").raise_for_status()
+        except Exception:
+            print(f"{Colors.RED}⚠️  API não está respondendo! Verifique se está rodando.{Colors.END}")
+            return
+
+    for nome in escolhidos:
+        if nome not in BENCHMARKS:
+            print(f"{Colors.YELLOW}Benchmark desconhecido: {nome}{Colors.END}")
+            continue
+        BENCHMARKS[nome]()
+
+# ✅ Executa o script
+if __name__ == "__main__":
+    main()
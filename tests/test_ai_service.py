@@ -0,0 +1,51 @@
+#Testes do parser incremental da análise em streaming (app/services/ai_service.py)
+import json
+from app.services.ai_service import ParserAnaliseParcial
+
+RESPOSTA = json.dumps({
+    "pontuacao": 85,
+    "feedback": "Boa solução: cobre o \"checkout\" e a conciliação.\nFalta detalhar os custos — ok.",
+    "criterios": {
+        "compreensao_problema": 22,
+        "qualidade_solucao": 20.5,
+        "criatividade": 18
+    }
+}, ensure_ascii=True)
+
+def _alimentar_em_pedacos(tamanho: int):
+    parser = ParserAnaliseParcial()
+    feedback, criterios = "", []
+    for inicio in range(0, len(RESPOSTA), tamanho):
+        texto, novos = parser.alimentar(RESPOSTA[inicio:inicio + tamanho])
+        feedback += texto
+        criterios += novos
+    return parser, feedback, criterios
+
+def test_parser_reconstroi_feedback_em_qualquer_corte():
+    esperado = json.loads(RESPOSTA)["feedback"]
+    for tamanho in (1, 2, 3, 7, 50, len(RESPOSTA)):
+        _, feedback, _ = _alimentar_em_pedacos(tamanho)
+        assert feedback == esperado, tamanho
+
+def test_parser_emite_cada_criterio_uma_vez():
+    for tamanho in (1, 5, len(RESPOSTA)):
+        _, _, criterios = _alimentar_em_pedacos(tamanho)
+        assert criterios == [
+            ("compreensao_problema", 22),
+            ("qualidade_solucao", 20.5),
+            ("criatividade", 18)
+        ]
+
+def test_parser_nao_emite_escape_incompleto():
+    parser = ParserAnaliseParcial()
+    assert parser.alimentar('{"feedback": "ol') == ("ol", [])
+    assert parser.alimentar('\\') == ("", [])
+    assert parser.alimentar('u00e') == ("", [])
+    assert parser.alimentar('1!"') == ("á!", [])
+
+def test_parser_so_emite_criterio_fechado():
+    parser = ParserAnaliseParcial()
+    assert parser.alimentar('{"criterios": {"clareza": 1') == ("", [])
+    assert parser.alimentar('2') == ("", [])
+    assert parser.alimentar('}') == ("", [("clareza", 12)])
+    assert parser.texto == '{"criterios": {"clareza": 12}'
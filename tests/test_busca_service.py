@@ -0,0 +1,78 @@
+#Testes do índice de busca de problemas (BM25 + trie de prefixos)
+import pytest
+from app.services.busca_service import IndiceProblemas, TriePrefixos, tokenizar
+
+PROBLEMAS = [
+    {"id": 1, "titulo": "Análise de dados de vendas", "area": "Tecnologia",
+     "descricao": "Painel com indicadores de vendas", "nivel_dificuldade": "intermediario", "tipo": "desafio"},
+    {"id": 2, "titulo": "Redesign do aplicativo", "area": "Design",
+     "descricao": "Nova navegação para o aplicativo de pedidos", "nivel_dificuldade": "iniciante", "tipo": "projeto"},
+    {"id": 3, "titulo": "Integração de pagamentos", "area": "Tecnologia",
+     "descricao": "Conectar o checkout ao gateway e conciliar os dados", "nivel_dificuldade": "avancado", "tipo": "desafio"},
+    {"id": 4, "titulo": "Campanha de lançamento", "area": "Marketing",
+     "descricao": "Plano de comunicação para o lançamento", "nivel_dificuldade": "iniciante", "tipo": "projeto"},
+]
+
+@pytest.fixture
+def indice(monkeypatch):
+    indice = IndiceProblemas(intervalo=0)
+    monkeypatch.setattr(indice, "_ler_banco", lambda problema_id=None: [dict(p) for p in PROBLEMAS])
+    indice.construir()
+    return indice
+
+def _ids(resultados):
+    return [documento["id"] for _, documento in resultados]
+
+def test_tokenizar_remove_acentos_e_stopwords():
+    assert tokenizar("Integração de PAGAMENTOS e dados") == ["integracao", "pagamentos", "dados"]
+    assert tokenizar(None) == []
+
+def test_trie_prefixos():
+    trie = TriePrefixos()
+    for termo in ("dados", "dado", "design", "desafio"):
+        trie.inserir(termo)
+
+    assert sorted(trie.com_prefixo("de")) == ["desafio", "design"]
+    assert sorted(trie.com_prefixo("dad")) == ["dado", "dados"]
+    assert trie.com_prefixo("x") == []
+
+    trie.remover("dados")
+    assert trie.com_prefixo("dad") == ["dado"]
+    assert len(trie) == 3
+
+def test_buscar_ignora_acentos_e_maiusculas(indice):
+    assert _ids(indice.buscar("INTEGRACAO", 10)) == [3]
+    assert _ids(indice.buscar("lançamento", 10)) == [4]
+    assert _ids(indice.buscar("lancamento", 10)) == [4]
+
+def test_buscar_por_prefixo(indice):
+    assert _ids(indice.buscar("aplic", 10)) == [2]
+    assert set(_ids(indice.buscar("dad", 10))) == {1, 3}
+    # Última palavra ainda sendo digitada, mesmo sendo stopword ("da" -> "dados")
+    assert set(_ids(indice.buscar("da", 10))) == {1, 3}
+
+def test_buscar_ordena_por_relevancia(indice):
+    # "vendas" aparece no título e na descrição do problema 1
+    resultados = indice.buscar("vendas dados", 10)
+    assert _ids(resultados)[0] == 1
+    assert resultados[0][0] > resultados[1][0]
+
+def test_buscar_com_filtros(indice):
+    assert _ids(indice.buscar("dados", 10, area="tecnologia", nivel="avancado")) == [3]
+    assert set(_ids(indice.buscar("dados", 10, area="TECNOLOGÍA "))) == {1, 3}
+    assert _ids(indice.buscar("dados", 10, tipo="projeto")) == []
+
+def test_buscar_pagina_por_cursor(indice):
+    primeira = indice.buscar("dados", 1)
+    relevancia, documento = primeira[0]
+    segunda = indice.buscar("dados", 10, apos=(relevancia, documento["id"]))
+
+    assert len(segunda) == 1
+    assert _ids(primeira) + _ids(segunda) == _ids(indice.buscar("dados", 10))
+
+def test_atualizar_retira_problema_fechado(indice, monkeypatch):
+    monkeypatch.setattr(indice, "_ler_banco", lambda problema_id=None: [])
+    indice.atualizar(2)
+
+    assert indice.buscar("aplicativo", 10) == []
+    assert len(indice) == 3
@@ -0,0 +1,51 @@
+#Testes do cursor de paginação (app/utils/helpers.py)
+import base64
+import json
+from datetime import datetime
+import pytest
+from app.utils.helpers import codificar_cursor, decodificar_cursor
+
+CAMPOS = {"created_at": datetime, "id": int, "relevancia": float}
+
+def _cursor_cru(dados) -> str:
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+
+def test_cursor_ida_e_volta():
+    cursor = codificar_cursor({
+        "created_at": datetime(2024, 3, 1, 12, 30, 5),
+        "id": 42,
+        "relevancia": 1.5
+    })
+
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor, CAMPOS) == {
+        "created_at": "2024-03-01 12:30:05",
+        "id": 42,
+        "relevancia": 1.5
+    }
+
+def test_cursor_float_aceita_inteiro():
+    cursor = codificar_cursor({"relevancia": 3, "id": 7})
+    assert decodificar_cursor(cursor, {"relevancia": float, "id": int}) == {"relevancia": 3, "id": 7}
+
+@pytest.mark.parametrize("cursor", [
+    "nao-e-base64!!",
+    _cursor_cru([1, 2]),
+    base64.urlsafe_b64encode(b"{json quebrado").decode(),
+])
+def test_cursor_malformado(cursor):
+    with pytest.raises(ValueError):
+        decodificar_cursor(cursor, {"id": int})
+
+@pytest.mark.parametrize("dados", [
+    {"created_at": "2024-03-01 12:30:05", "relevancia": 1.0},
+    {"created_at": "2024-03-01 12:30:05", "id": "42", "relevancia": 1.0},
+    {"created_at": "2024-03-01 12:30:05", "id": True, "relevancia": 1.0},
+    {"created_at": "2024-03-01 12:30:05", "id": 1.5, "relevancia": 1.0},
+    {"created_at": "2024-03-01 12:30:05", "id": 42, "relevancia": "alta"},
+    {"created_at": "01/03/2024", "id": 42, "relevancia": 1.0},
+    {"created_at": 1709296205, "id": 42, "relevancia": 1.0},
+])
+def test_cursor_com_campo_faltando_ou_tipo_errado(dados):
+    with pytest.raises(ValueError):
+        decodificar_cursor(_cursor_cru(dados), CAMPOS)
@@ -0,0 +1,98 @@
+#Testes do ranking em memória (skip list indexável e leaderboard)
+import random
+from app.services.ranking_service import Leaderboard, SkipListIndexavel
+
+# ==================== SKIP LIST INDEXÁVEL ====================
+
+def test_skip_list_mantem_ordem_e_indices():
+    random.seed(1)
+    lista = SkipListIndexavel()
+    chaves = random.sample(range(10000), 500)
+    for chave in chaves:
+        lista.inserir(chave)
+
+    ordenadas = sorted(chaves)
+    assert len(lista) == 500
+    assert lista.fatia(0, 500) == ordenadas
+    for indice in (0, 1, 250, 499):
+        assert lista.indice(ordenadas[indice]) == indice
+    assert lista.indice(-1) is None
+
+def test_skip_list_fatia_e_contar_menores():
+    lista = SkipListIndexavel()
+    for chave in range(0, 100, 2):
+        lista.inserir(chave)
+
+    assert lista.fatia(10, 3) == [20, 22, 24]
+    assert lista.fatia(48, 10) == [96, 98]
+    assert lista.fatia(50, 1) == []
+    assert lista.fatia(-1, 1) == []
+    assert lista.contar_menores(21) == 11
+    assert lista.contar_menores(-5) == 0
+    assert lista.contar_menores(1000) == 50
+
+def test_skip_list_remover_atualiza_posicoes():
+    random.seed(2)
+    lista = SkipListIndexavel()
+    chaves = list(range(200))
+    random.shuffle(chaves)
+    for chave in chaves:
+        lista.inserir(chave)
+
+    for chave in range(0, 200, 3):
+        assert lista.remover(chave)
+    assert not lista.remover(0)
+
+    restantes = [c for c in range(200) if c % 3]
+    assert len(lista) == len(restantes)
+    assert lista.fatia(0, len(restantes)) == restantes
+    assert lista.indice(restantes[-1]) == len(restantes) - 1
+    assert lista.fatia(50, 5) == restantes[50:55]
+
+# ==================== LEADERBOARD ====================
+
+def _leaderboard():
+    ranking = Leaderboard(intervalo_reconciliacao=0)
+    ranking.carregar([
+        (1, 100, "bronze", "tecnologia"),
+        (2, 300, "prata", "design"),
+        (3, 200, "bronze", "tecnologia"),
+        (4, 200, "bronze", None),
+    ])
+    return ranking
+
+def test_leaderboard_pagina_desempata_por_id():
+    ranking = _leaderboard()
+
+    assert ranking.top(10) == [(1, 2, 300), (2, 3, 200), (3, 4, 200), (4, 1, 100)]
+    assert ranking.pagina(1, 2) == [(2, 3, 200), (3, 4, 200)]
+    assert ranking.pagina_apos(200, 3, 2) == [(3, 4, 200), (4, 1, 100)]
+    assert ranking.posicao(4) == 3
+    assert ranking.posicao(99) is None
+
+def test_leaderboard_posicoes_empatadas_e_por_grupo():
+    ranking = _leaderboard()
+
+    posicoes = ranking.posicoes(4)
+    assert posicoes["posicao_global"] == 2
+    assert posicoes["total_global"] == 4
+    assert (posicoes["posicao_patente"], posicoes["total_patente"]) == (1, 3)
+    assert posicoes["posicao_area"] is None
+
+    assert ranking.posicoes(1)["posicao_area"] == 2
+
+def test_leaderboard_atualizar_e_remover():
+    ranking = _leaderboard()
+
+    ranking.atualizar(1, pontos=500)
+    assert ranking.top(1) == [(1, 1, 500)]
+    assert ranking.posicoes(1)["posicao_area"] == 1
+
+    ranking.atualizar(3, patente="prata")
+    assert ranking.posicoes(3)["total_patente"] == 2
+    assert ranking.posicoes(4)["total_patente"] == 2
+
+    ranking.remover(2)
+    assert len(ranking) == 3
+    assert ranking.posicao(2) is None
+    assert ranking.pagina_apos(300, 2, 10) == [(2, 3, 200), (3, 4, 200)]